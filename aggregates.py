@@ -0,0 +1,172 @@
+"""Summary tables behind the Dashboard and Analytics charts.
+
+Each agg_* table holds one row per group and is kept current by triggers on
+the base tables, so the charts read O(groups) rows instead of re-running a
+GROUP BY over every listing or claim. NULL group keys are stored as ''.
+"""
+import sys
+import sqlite3
+
+# table -> (key column DDL, count columns; the first one decides whether the group exists)
+AGGREGATES = {
+    "agg_food_type": ("Food_Type TEXT NOT NULL", ["Count"]),
+    "agg_meal_type": ("Meal_Type TEXT NOT NULL", ["Count"]),
+    "agg_provider_type": ("Provider_Type TEXT NOT NULL", ["Count"]),
+    "agg_claim_status": ("Status TEXT NOT NULL", ["Count"]),
+    "agg_city_food": ("City TEXT NOT NULL", ["Provider_Count", "Food_Count"]),
+    "agg_receiver_claims": ("Receiver_ID INTEGER NOT NULL", ["Claim_Count"]),
+    "agg_receiver_city_claims": ("City TEXT NOT NULL", ["Claim_Count"]),
+}
+
+# Full recompute of each summary, in (key, counts...) column order
+RECOMPUTE = {
+    "agg_food_type": "SELECT IFNULL(Food_Type, ''), COUNT(*) FROM food_listings GROUP BY 1",
+    "agg_meal_type": "SELECT IFNULL(Meal_Type, ''), COUNT(*) FROM food_listings GROUP BY 1",
+    "agg_provider_type": "SELECT IFNULL(Provider_Type, ''), COUNT(*) FROM food_listings GROUP BY 1",
+    "agg_claim_status": "SELECT IFNULL(Status, ''), COUNT(*) FROM claims GROUP BY 1",
+    "agg_city_food": """
+        SELECT IFNULL(p.City, ''), COUNT(*),
+               SUM((SELECT COUNT(*) FROM food_listings f WHERE f.Provider_ID = p.Provider_ID))
+        FROM providers p GROUP BY 1""",
+    "agg_receiver_claims": """
+        SELECT Receiver_ID, COUNT(*) FROM claims
+        WHERE Receiver_ID IS NOT NULL GROUP BY Receiver_ID""",
+    "agg_receiver_city_claims": """
+        SELECT IFNULL(r.City, ''), COUNT(*)
+        FROM claims c JOIN receivers r ON r.Receiver_ID = c.Receiver_ID GROUP BY 1""",
+}
+
+# How a row of a base table contributes to a summary:
+# (name, summary table, base table, group key expression, {count column: weight}, watched columns).
+# {row} is replaced by NEW or OLD. A NULL key (e.g. a claim whose receiver
+# does not exist) contributes nothing.
+CONTRIBUTIONS = [
+    ("food_type", "agg_food_type", "food_listings",
+     "IFNULL({row}.Food_Type, '')", {"Count": "1"}, ("Food_Type",)),
+    ("meal_type", "agg_meal_type", "food_listings",
+     "IFNULL({row}.Meal_Type, '')", {"Count": "1"}, ("Meal_Type",)),
+    ("provider_type", "agg_provider_type", "food_listings",
+     "IFNULL({row}.Provider_Type, '')", {"Count": "1"}, ("Provider_Type",)),
+    ("claim_status", "agg_claim_status", "claims",
+     "IFNULL({row}.Status, '')", {"Count": "1"}, ("Status",)),
+    ("city_providers", "agg_city_food", "providers",
+     "IFNULL({row}.City, '')",
+     {"Provider_Count": "1",
+      "Food_Count": "(SELECT COUNT(*) FROM food_listings WHERE Provider_ID = {row}.Provider_ID)"},
+     ("Provider_ID", "City")),
+    ("city_food", "agg_city_food", "food_listings",
+     "(SELECT IFNULL(City, '') FROM providers WHERE Provider_ID = {row}.Provider_ID)",
+     {"Food_Count": "1"}, ("Provider_ID",)),
+    ("receiver_claims", "agg_receiver_claims", "claims",
+     "{row}.Receiver_ID", {"Claim_Count": "1"}, ("Receiver_ID",)),
+    ("receiver_city_claims", "agg_receiver_city_claims", "claims",
+     "(SELECT IFNULL(City, '') FROM receivers WHERE Receiver_ID = {row}.Receiver_ID)",
+     {"Claim_Count": "1"}, ("Receiver_ID",)),
+    ("receiver_city_receivers", "agg_receiver_city_claims", "receivers",
+     "IFNULL({row}.City, '')",
+     {"Claim_Count": "(SELECT COUNT(*) FROM claims WHERE Receiver_ID = {row}.Receiver_ID)"},
+     ("Receiver_ID", "City")),
+]
+
+# Summary table -> base tables whose writes change it
+AGGREGATE_SOURCES = {}
+for _, _table, _source, _, _, _ in CONTRIBUTIONS:
+    AGGREGATE_SOURCES.setdefault(_table, set()).add(_source)
+
+
+def _key_column(table):
+    return AGGREGATES[table][0].split()[0]
+
+
+def _add(table, key, weights, row):
+    key_col = _key_column(table)
+    cols = list(weights)
+    values = ", ".join(weights[c].format(row=row) for c in cols)
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in cols)
+    return (f"INSERT INTO {table} ({key_col}, {', '.join(cols)}) "
+            f"SELECT k, {values} FROM (SELECT {key.format(row=row)} AS k) WHERE k IS NOT NULL "
+            f"ON CONFLICT({key_col}) DO UPDATE SET {updates};")
+
+
+def _subtract(table, key, weights, row):
+    key_col = _key_column(table)
+    updates = ", ".join(f"{c} = {c} - {w.format(row=row)}" for c, w in weights.items())
+    return f"UPDATE {table} SET {updates} WHERE {key_col} = {key.format(row=row)};"
+
+
+def _cleanup(table, key, row):
+    presence = AGGREGATES[table][1][0]
+    return f"DELETE FROM {table} WHERE {_key_column(table)} = {key.format(row=row)} AND {presence} <= 0;"
+
+
+def _trigger_statements():
+    for name, table, source, key, weights, watched in CONTRIBUTIONS:
+        yield (f"trg_{name}_insert",
+               f"AFTER INSERT ON {source} BEGIN "
+               f"{_add(table, key, weights, 'NEW')} {_cleanup(table, key, 'NEW')} END")
+        yield (f"trg_{name}_delete",
+               f"AFTER DELETE ON {source} BEGIN "
+               f"{_subtract(table, key, weights, 'OLD')} {_cleanup(table, key, 'OLD')} END")
+        changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in watched)
+        yield (f"trg_{name}_update",
+               f"AFTER UPDATE OF {', '.join(watched)} ON {source} WHEN {changed} BEGIN "
+               f"{_subtract(table, key, weights, 'OLD')} {_add(table, key, weights, 'NEW')} "
+               f"{_cleanup(table, key, 'OLD')} {_cleanup(table, key, 'NEW')} END")
+
+
+def create_tables(cursor):
+    for table, (key_ddl, counts) in AGGREGATES.items():
+        count_ddl = ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in counts)
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({key_ddl} PRIMARY KEY, {count_ddl})")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agg_receiver_claims_count "
+                   "ON agg_receiver_claims (Claim_Count)")
+
+
+def create_triggers(cursor):
+    for name, body in _trigger_statements():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name, _ in _trigger_statements():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_aggregates(cursor):
+    """Recompute every summary table from the base tables"""
+    for table, (key_ddl, counts) in AGGREGATES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} ({_key_column(table)}, {', '.join(counts)}) {RECOMPUTE[table]}")
+
+
+def install(cursor):
+    """Migration step: create summary tables and triggers, then backfill"""
+    create_tables(cursor)
+    create_triggers(cursor)
+    rebuild_aggregates(cursor)
+
+
+def check_aggregates(conn):
+    """Compare each summary table with a full recompute; return {table: (missing, unexpected)}"""
+    mismatches = {}
+    for table, (key_ddl, counts) in AGGREGATES.items():
+        stored = set(conn.execute(f"SELECT {_key_column(table)}, {', '.join(counts)} FROM {table}"))
+        expected = set(conn.execute(RECOMPUTE[table]))
+        if stored != expected:
+            mismatches[table] = (sorted(expected - stored), sorted(stored - expected))
+    return mismatches
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else 'food_waste.db')
+    mismatches = check_aggregates(conn)
+    for table, (missing, unexpected) in mismatches.items():
+        print(f"{table}: {len(missing)} group(s) wrong or missing, {len(unexpected)} stale")
+        for row in missing[:5]:
+            print(f"  expected {row}")
+        for row in unexpected[:5]:
+            print(f"  stored   {row}")
+    conn.close()
+    if mismatches:
+        sys.exit(1)
+    print("All summary tables match a full recompute")
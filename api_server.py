@@ -0,0 +1,635 @@
+"""HTTP/JSON API over the DatabaseManager queries and the entity CRUD.
+
+An asyncio server (standard library only) handles the sockets. Every SQLite
+call runs on a fixed-size thread pool, so slow queries never block the event
+loop and at most --workers queries run at once.
+
+    GET    /health                      pool, cache and replica metrics
+    GET    /metrics                     per-statement timings, Prometheus text (with --profile)
+    GET    /changes?after=SEQ&limit=&wait=S
+                                        rows changed after cursor SEQ (changefeed.py):
+                                        {"cursor", "reset", "changes": {table: {"upserts", "deletes"}}};
+                                        waits up to S seconds for a commit when there is none yet.
+                                        Without after, starts at the end of the log
+    GET    /queries                     the available queries and their parameters
+    GET    /queries/<name>?param=value  e.g. /queries/food_by_city?city=Chennai
+    GET    /<table>?sort=&order=desc&limit=&after=&<filter>=value
+                                        one keyset page: {"items": [...], "next": cursor}
+    GET    /search?q=text&table=&limit=&after=&<filter>=value
+                                        full-text search of providers, receivers or food_listings,
+                                        best match first, paged like /<table>; the last word of q
+                                        matches as a prefix. Without table: the best matches of all
+                                        three as {"items": [{"Entity", "Row_ID", "Label", "Rank"}]}
+    GET    /nearby?lat=&lon=&table=&radius_km=&limit=
+                                        the providers (or table=receivers) nearest to lat/lon, within
+                                        radius_km if given, nearest first, with Lat, Lon and Distance_Km
+    GET    /within?min_lat=&max_lat=&min_lon=&max_lon=&table=&limit=
+                                        the providers (or receivers) inside a bounding box
+    POST   /<table>                     create from a JSON object; returns {"id": ...}
+    POST   /<table>/batch               {"insert": [objects], "update": [objects with the ID],
+                                         "delete": [IDs], "atomic": true} in one transaction;
+                                        returns {"applied", "ids", "errors": [{"op", "index", "error"}]},
+                                        409 if rows failed and nothing was written
+    POST   /claims/reserve              {"Food_ID", "Receiver_ID", "Quantity", "Status"}: claim units
+                                        of a listing without overallocating; 409 if not enough left.
+                                        Claims created by POST /claims and /claims/batch reserve
+                                        their units the same way (Quantity, default 1)
+    GET    /<table>/<id>
+    PUT    /<table>/<id>                update the given columns (PATCH is the same)
+    DELETE /<table>/<id>
+
+<table> is providers, receivers, food_listings or claims. Query results are
+JSON arrays. With ?format=ndjson or "Accept: application/x-ndjson" they are
+one JSON object per line instead. Results over STREAM_ROWS rows are sent
+chunked, STREAM_ROWS rows at a time.
+
+GET responses carry an ETag derived from PRAGMA data_version, which changes
+whenever any connection commits to the database file. A poll with a matching
+If-None-Match gets 304 without running the query. Encoded bodies are also
+kept by ETag, so a client without the ETag gets the bytes without the query
+or the JSON encoding being repeated.
+
+The row change log is compacted (changelog.compact) at startup and every
+COMPACT_SECONDS.
+
+With --replica, reads are served from an in-memory copy of the database
+(replica.py) and writes go to the file. Since a new ETag promises the new
+data, a commit from another process that moves data_version also brings the
+copy up to date before the next query; --max-staleness bounds how stale the
+copy may get otherwise.
+
+    python api_server.py [database] [--host HOST] [--port PORT] [--workers N] [--snapshot] [--olap duckdb]
+                         [--replica [--max-staleness S]]
+                         [--profile [--slow-ms MS] [--slow-log PATH] [--metrics-file PATH]]
+"""
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import backends
+import changefeed
+import changelog
+import crud
+import gazetteer
+import profiler
+import replica
+import reservations
+import search
+from db_pool import DEFAULT_DB_PATH, get_pool
+from db_queries import DatabaseManager
+from decoder import to_text
+from migrations import migrate
+from pagination import DEFAULT_PAGE_SIZE, ENTITIES
+from snapshot import Snapshot
+
+DEFAULT_PORT = 8502
+DEFAULT_WORKERS = 8
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_BODY_BYTES = 32 * 1024 * 1024
+STREAM_ROWS = 1000
+# Encoded GET bodies kept by ETag, so repeat requests skip the query and the JSON encoding
+BODY_CACHE_BYTES = 64 * 1024 * 1024
+MAX_CACHED_BODY = 16 * 1024 * 1024
+NDJSON = "application/x-ndjson"
+# GET /changes long poll
+MAX_CHANGES_WAIT = 60.0
+CHANGES_POLL_SECONDS = 0.25
+COMPACT_SECONDS = 3600
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def query_methods(manager):
+    """name -> bound method for the public read queries of a DatabaseManager"""
+    return {name[len("get_"):] if name.startswith("get_") else name: method
+            for name, method in inspect.getmembers(manager, inspect.ismethod)
+            if name.startswith("get_") and name != "get_connection" or name == "expiring_within"}
+
+
+def bind_params(method, args):
+    """Convert query-string args to the method's parameters, typed like their defaults"""
+    signature = inspect.signature(method)
+    unknown = set(args) - set(signature.parameters)
+    if unknown:
+        raise HTTPError(400, f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+    kwargs = {}
+    for name, param in signature.parameters.items():
+        if name not in args:
+            if param.default is inspect.Parameter.empty:
+                raise HTTPError(400, f"Missing parameter: {name}")
+            continue
+        kind = type(param.default) if param.default not in (inspect.Parameter.empty, None) else str
+        try:
+            kwargs[name] = kind(args[name])
+        except ValueError:
+            raise HTTPError(400, f"Parameter {name} must be {kind.__name__}")
+    return kwargs
+
+
+def encode_rows(frame, ndjson, first=True, last=True):
+    """JSON text for the rows of a DataFrame slice (NaN -> null, dates as stored)"""
+    frame = to_text(frame)
+    if ndjson:
+        return frame.to_json(orient="records", lines=True) if len(frame) else ""
+    body = frame.to_json(orient="records")[1:-1] if len(frame) else ""
+    return ("[" if first else ("," if body else "")) + body + ("]" if last else "")
+
+
+class ApiServer:
+    def __init__(self, db_path=DEFAULT_DB_PATH, workers=DEFAULT_WORKERS, snapshot=None, olap=None):
+        self.db_path = db_path
+        self.db = DatabaseManager(db_path, snapshot=snapshot, olap=olap)
+        self.queries = query_methods(self.db)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        # Only ever runs PRAGMA data_version, which sees commits from every other connection
+        self._watch = sqlite3.connect(db_path, check_same_thread=False)
+        self._watch_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._seen_version = None
+        self._own_version = None
+        self._bodies = OrderedDict()
+        self._inflight = {}
+        self._body_bytes = 0
+
+    # -- helpers -------------------------------------------------------------
+
+    def data_version(self):
+        """Changes whenever any connection commits.
+
+        Writes made through this server already invalidated the cached query
+        results of their table. After a commit from anywhere else (another
+        process, a CSV sync) the whole query cache is dropped.
+        """
+        with self._watch_lock:
+            version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._seen_version:
+                if self._seen_version is not None and version != self._own_version:
+                    self.db.cache.clear()
+                self._seen_version = version
+                self._bodies.clear()
+                self._body_bytes = 0
+        return version
+
+    def etag(self, target):
+        # date('now') queries change at midnight without any write
+        seed = f"{self.data_version()}|{date.today().isoformat()}|{target}"
+        return '"' + hashlib.sha1(seed.encode()).hexdigest()[:20] + '"'
+
+    def _own_write(self, fn, *args):
+        """Run a crud write on a worker thread and record the data_version it produced"""
+        with self._write_lock:
+            result = fn(*args)
+            with self._watch_lock:
+                self._own_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        return result
+
+    def cached_body(self, key):
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+        return body
+
+    def release(self, key):
+        """Wake requests waiting for the response with this key"""
+        waiting = self._inflight.pop(key, None)
+        if waiting is not None and not waiting.done():
+            waiting.set_result(None)
+
+    def store_body(self, key, body):
+        if len(body[1]) > MAX_CACHED_BODY or key in self._bodies:
+            return
+        self._bodies[key] = body
+        self._body_bytes += len(body[1])
+        while self._body_bytes > BODY_CACHE_BYTES:
+            _, (_, evicted) = self._bodies.popitem(last=False)
+            self._body_bytes -= len(evicted)
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    # -- routing -------------------------------------------------------------
+
+    async def dispatch(self, method, target, headers, body, ndjson=False):
+        """Return (status, payload, extra headers); payload is bytes, a dict or a DataFrame"""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        args = dict(parse_qsl(url.query, keep_blank_values=True))
+
+        if method == "GET" and parts == ["health"]:
+            return (*await self.get(parts, args), {})
+        if method == "GET" and parts == ["metrics"]:
+            active = profiler.current()
+            if active is None:
+                raise HTTPError(404, "Profiling is off; start the server with --profile")
+            return 200, active.metrics_text().encode(), {"Content-Type": "text/plain; version=0.0.4"}
+        if method == "GET" and parts == ["changes"]:
+            # Not ETag-cached: a long poll answers once the data has changed
+            return 200, await self.changes(args), {}
+        if method == "GET":
+            etag = self.etag(target)
+            if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+                return 304, b"", {"ETag": etag}
+            key = (etag, ndjson)
+            if key in self._inflight:
+                # The same response is being built for another client; wait and reuse it
+                await asyncio.shield(self._inflight[key])
+            cached = self.cached_body(key)
+            if cached is not None:
+                return 200, cached[1], {"ETag": etag, "Content-Type": cached[0]}
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+            try:
+                status, payload = await self.get(parts, args)
+            except BaseException:
+                self.release(key)
+                raise
+            return status, payload, {"ETag": etag}
+        if len(parts) in (1, 2) and parts[0] in ENTITIES:
+            return (*await self.write(method, parts, body), {})
+        raise HTTPError(405 if parts and parts[0] in ("health", "queries", "changes") else 404,
+                        f"{method} {url.path} is not supported")
+
+    async def get(self, parts, args):
+        if parts == ["health"]:
+            return 200, {"status": "ok", "data_version": self.data_version(),
+                         "pool": get_pool(self.db_path).metrics(), "cache": self.db.cache.stats(),
+                         "reservations": reservations.metrics(), "replica": self.replica_metrics()}
+        if parts == ["queries"]:
+            return 200, [{"name": name, "params": list(inspect.signature(method).parameters),
+                          "doc": inspect.getdoc(method)} for name, method in sorted(self.queries.items())]
+        if parts == ["search"]:
+            return 200, await self.run(self.search, args)
+        if parts in (["nearby"], ["within"]):
+            return 200, await self.run(self.geo, parts[0], args)
+        if len(parts) == 2 and parts[0] == "queries":
+            method = self.queries.get(parts[1])
+            if method is None:
+                raise HTTPError(404, f"Unknown query {parts[1]!r}")
+            args.pop("format", None)
+            return 200, await self.run(self.call_query, parts[1], method, bind_params(method, args))
+        if len(parts) == 1 and parts[0] in ENTITIES:
+            return 200, await self.run(self.list_page, parts[0], args)
+        if len(parts) == 2 and parts[0] in ENTITIES:
+            row = await self.run(crud.get_by_id, parts[0], self.row_id(parts[1]), self.db_path)
+            if row is None:
+                raise HTTPError(404, f"No {parts[0]} row {parts[1]}")
+            return 200, json.loads(to_text(row).to_json())
+        raise HTTPError(404, f"Unknown path /{'/'.join(parts)}")
+
+    def replica_metrics(self):
+        active = replica.current(self.db_path)
+        return active.metrics() if active is not None else None
+
+    @staticmethod
+    def call_query(name, method, params):
+        with profiler.labelled(f"/queries/{name}"):
+            return method(**params)
+
+    def list_page(self, table, args):
+        args.pop("format", None)
+        sort = args.pop("sort", None)
+        descending = args.pop("order", "asc").lower() == "desc"
+        page_size = args.pop("limit", DEFAULT_PAGE_SIZE)
+        after = args.pop("after", None)
+        try:
+            after = tuple(json.loads(after)) if after else None
+            page, cursor = crud.get_page(table, sort, descending, args, after, int(page_size), self.db_path)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e))
+        return {"items": json.loads(to_text(page).to_json(orient="records")), "next": cursor}
+
+    def search(self, args):
+        args.pop("format", None)
+        text = args.pop("q", "")
+        table = args.pop("table", None)
+        page_size = args.pop("limit", search.SUGGESTIONS if table is None else DEFAULT_PAGE_SIZE)
+        after = args.pop("after", None)
+        try:
+            if table is None:
+                if args or after:
+                    raise ValueError("Filters and after need a table")
+                rows = crud.suggest(text, int(page_size), self.db_path)
+                return {"items": json.loads(rows.to_json(orient="records")), "next": None}
+            after = tuple(json.loads(after)) if after else None
+            page, cursor = crud.search_page(table, text, args, after, int(page_size), self.db_path)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e))
+        return {"items": json.loads(to_text(page).to_json(orient="records")), "next": cursor}
+
+    def geo(self, route, args):
+        args.pop("format", None)
+        table = args.pop("table", "providers")
+        limit = args.pop("limit", DEFAULT_PAGE_SIZE)
+        names = ["lat", "lon", "radius_km"] if route == "nearby" else ["min_lat", "max_lat", "min_lon", "max_lon"]
+        unknown = set(args) - set(names)
+        if unknown:
+            raise HTTPError(400, f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+        try:
+            values = [float(args[name]) if args.get(name) else None for name in names]
+            if None in values[:2 if route == "nearby" else 4]:
+                raise ValueError(f"{', '.join(names if route == 'within' else names[:2])} are required")
+            if route == "nearby":
+                rows = crud.nearby(table, *values, int(limit), self.db_path)
+            else:
+                rows = crud.within(table, *values, int(limit), self.db_path)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e))
+        return {"items": json.loads(to_text(rows).to_json(orient="records"))}
+
+    async def changes(self, args):
+        try:
+            after = int(args["after"]) if args.get("after") else None
+            limit = int(args.get("limit", changefeed.BATCH_ENTRIES))
+            wait = min(float(args.get("wait", 0)), MAX_CHANGES_WAIT)
+        except ValueError as e:
+            raise HTTPError(400, f"after, limit and wait must be numbers: {e}")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        if after is None:
+            after = await self.run(self.read_last_seq)
+        while True:
+            version = self.data_version()
+            batch = await self.run(self.read_changes, after, limit)
+            if batch["cursor"] != after or loop.time() >= deadline:
+                return batch
+            while self.data_version() == version and loop.time() < deadline:
+                await asyncio.sleep(CHANGES_POLL_SECONDS)
+
+    def read_last_seq(self):
+        with get_pool(self.db_path).connection() as conn:
+            return changelog.last_seq(conn)
+
+    def read_changes(self, after, limit):
+        with get_pool(self.db_path).connection() as conn:
+            batch = changefeed.read_batch(conn, after, limit)
+        for change in batch["changes"].values():
+            change["upserts"] = json.loads(to_text(change["upserts"]).to_json(orient="records"))
+        return batch
+
+    def compact_log(self):
+        with get_pool(self.db_path).connection() as conn:
+            return changelog.compact(conn)
+
+    async def compact_periodically(self):
+        while True:
+            await asyncio.sleep(COMPACT_SECONDS)
+            # Recorded as this server's own write, so the query cache is kept
+            await self.run(self._own_write, self.compact_log)
+
+    async def write(self, method, parts, body):
+        table = parts[0]
+        if parts[1:] == ["batch"] and method == "POST":
+            return await self.batch(table, self.json_object(body))
+        if parts == ["claims", "reserve"] and method == "POST":
+            return await self.reserve(self.json_object(body))
+        if len(parts) == 1 and method == "POST":
+            try:
+                new_id = await self.run(self._own_write, crud.insert, table, self.json_object(body), self.db_path)
+            except (reservations.NotAvailable, reservations.ReservationConflict) as e:
+                raise HTTPError(409, str(e))
+            return 201, {"id": new_id}
+        if len(parts) == 2 and method in ("PUT", "PATCH"):
+            values = self.json_object(body)
+            if not await self.run(self._own_write, crud.update, table, self.row_id(parts[1]), values, self.db_path):
+                raise HTTPError(404, f"No {table} row {parts[1]}")
+            return 200, {"updated": True}
+        if len(parts) == 2 and method == "DELETE":
+            if not await self.run(self._own_write, crud.delete, table, self.row_id(parts[1]), self.db_path):
+                raise HTTPError(404, f"No {table} row {parts[1]}")
+            return 204, b""
+        raise HTTPError(405, f"{method} /{'/'.join(parts)} is not supported")
+
+    async def batch(self, table, body):
+        unknown = set(body) - {"insert", "update", "delete", "atomic"}
+        if unknown:
+            raise HTTPError(400, f"Unknown batch field(s): {', '.join(sorted(unknown))}")
+        rows = {op: body.get(op, []) for op in ("insert", "update", "delete")}
+        for op, values in rows.items():
+            if not isinstance(values, list):
+                raise HTTPError(400, f"Batch field {op} must be a JSON array")
+        result = await self.run(self._own_write, crud.apply_batch, table, rows["insert"], rows["update"],
+                                rows["delete"], bool(body.get("atomic", True)), self.db_path)
+        return (409 if result["errors"] and not result["applied"] else 200), result
+
+    async def reserve(self, body):
+        unknown = set(body) - {"Food_ID", "Receiver_ID", "Quantity", "Status"}
+        if unknown:
+            raise HTTPError(400, f"Unknown reservation field(s): {', '.join(sorted(unknown))}")
+        missing = {"Food_ID", "Receiver_ID"} - set(body)
+        if missing:
+            raise HTTPError(400, f"Missing reservation field(s): {', '.join(sorted(missing))}")
+        try:
+            claim_id = await self.run(self._own_write, reservations.reserve_claim, body["Food_ID"],
+                                      body["Receiver_ID"], body.get("Quantity", 1), body.get("Status", "Pending"),
+                                      None, self.db_path)
+        except (reservations.NotAvailable, reservations.ReservationConflict) as e:
+            raise HTTPError(409, str(e))
+        except TypeError as e:
+            raise HTTPError(400, f"Reservation fields must be integers: {e}")
+        return 201, {"id": claim_id}
+
+    @staticmethod
+    def row_id(text):
+        try:
+            return int(text)
+        except ValueError:
+            raise HTTPError(400, f"Row ID must be an integer, not {text!r}")
+
+    @staticmethod
+    def json_object(body):
+        try:
+            values = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+        if not isinstance(values, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return values
+
+    # -- HTTP ----------------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {"error": "Request headers too large"}, keep_alive=False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                batch = urlsplit(target).path.rstrip("/").endswith("/batch")
+                if length > (MAX_BATCH_BODY_BYTES if batch else MAX_BODY_BYTES):
+                    await self.respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                ndjson = "format=ndjson" in target or NDJSON in headers.get("accept", "")
+                try:
+                    status, payload, extra = await self.dispatch(method, target, headers, body, ndjson)
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, {}
+                except sqlite3.IntegrityError as e:
+                    status, payload, extra = 409, {"error": str(e)}, {}
+                except ValueError as e:
+                    status, payload, extra = 400, {"error": str(e)}, {}
+                except Exception as e:
+                    print(f"Error handling {method} {target}: {e!r}")
+                    status, payload, extra = 500, {"error": "Internal server error"}, {}
+                try:
+                    await self.respond(writer, status, payload, extra, keep_alive, ndjson)
+                finally:
+                    if "ETag" in extra:
+                        self.release((extra["ETag"], ndjson))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, extra=None, keep_alive=True, ndjson=False):
+        headers = {"Connection": "keep-alive" if keep_alive else "close", **(extra or {})}
+        if status in (204, 304):
+            await self._send(writer, status, headers, b"")
+        elif hasattr(payload, "to_json"):
+            await self._send_frame(writer, status, headers, payload, ndjson)
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, default=str).encode()
+            headers.setdefault("Content-Type", "application/json")
+            if status == 200 and "ETag" in headers and not isinstance(payload, bytes):
+                self.store_body((headers["ETag"], ndjson), (headers["Content-Type"], body))
+            await self._send(writer, status, headers, body)
+
+    async def _send(self, writer, status, headers, body):
+        if status not in (204, 304):
+            headers["Content-Length"] = str(len(body))
+        writer.write(self._head(status, headers) + body)
+        await writer.drain()
+
+    async def _send_frame(self, writer, status, headers, frame, ndjson):
+        """Query results: one body when small, otherwise chunked STREAM_ROWS rows at a time"""
+        headers["Content-Type"] = NDJSON if ndjson else "application/json"
+        key = (headers.get("ETag"), ndjson)
+        if len(frame) <= STREAM_ROWS:
+            body = encode_rows(frame, ndjson).encode()
+            if key[0]:
+                self.store_body(key, (headers["Content-Type"], body))
+            await self._send(writer, status, headers, body)
+            return
+        headers["Transfer-Encoding"] = "chunked"
+        writer.write(self._head(status, headers))
+        parts, size = [], 0
+        for start in range(0, len(frame), STREAM_ROWS):
+            chunk = frame.iloc[start:start + STREAM_ROWS]
+            text = await self.run(encode_rows, chunk, ndjson, start == 0, start + STREAM_ROWS >= len(frame))
+            data = text.encode()
+            if data:
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+            if parts is not None:
+                parts.append(data)
+                size += len(data)
+                if size > MAX_CACHED_BODY:
+                    parts = None
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        if key[0] and parts is not None:
+            self.store_body(key, (headers["Content-Type"], b"".join(parts)))
+
+    @staticmethod
+    def _head(status, headers):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving {self.db_path} on http://{host}:{port} ({self.workers} DB workers)")
+        compacting = asyncio.create_task(self.compact_periodically())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            compacting.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON API for the food_waste database")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="threads running SQLite calls (also the connection pool size)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="answer the reporting queries from the columnar snapshot (snapshot.py)")
+    parser.add_argument("--olap", choices=sorted(backends.BACKENDS),
+                        help="run the aggregate reports on this backend (backends.py; duckdb needs the duckdb package)")
+    parser.add_argument("--replica", action="store_true",
+                        help="serve reads from an in-memory copy of the database (replica.py)")
+    parser.add_argument("--max-staleness", type=float, default=replica.DEFAULT_MAX_STALENESS,
+                        help="seconds a --replica read may lag commits from other processes")
+    parser.add_argument("--profile", action="store_true", help="record per-statement timings (served at /metrics)")
+    parser.add_argument("--slow-ms", type=float, default=profiler.DEFAULT_SLOW_MS,
+                        help="log statements slower than this, with their query plan")
+    parser.add_argument("--slow-log", default=profiler.DEFAULT_SLOW_LOG)
+    parser.add_argument("--metrics-file", help="also write the /metrics text to this file periodically")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiler.enable(args.slow_ms, args.slow_log, args.metrics_file)
+
+    # Size the connection pool to the worker threads before anything checks one out
+    get_pool(args.database, max_size=args.workers)
+    with get_pool(args.database).connection() as conn:
+        migrate(conn)
+        changelog.compact(conn)
+        gazetteer.resolve(conn)
+    if args.replica:
+        replica.attach(args.database, args.max_staleness)
+    olap = backends.open_backend(args.olap, args.database) if args.olap else None
+    server = ApiServer(args.database, args.workers, Snapshot(args.database) if args.snapshot else None, olap)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        profiler.disable()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Query backends for DatabaseManager: SQLite, or DuckDB for the aggregate reports.
+
+A backend answers read_frame(query, params, schema) with a typed DataFrame
+(decoder.read_typed), so the same SQL text and schema work on either one.
+
+- SQLiteBackend reads the database through the connection pool, as
+  DatabaseManager always has (or its in-memory replica, replica.py).
+- DuckDBBackend keeps an in-process DuckDB copy of the four base tables and
+  runs the query on DuckDB's columnar, vectorized engine. The copy is
+  brought up to date from change_log (changelog.py) before each query, so
+  writes stay on SQLite and show up in the next report. A RESET entry, a
+  log trimmed past the copy's Seq, or more changed rows than
+  FULL_REFRESH_FRACTION of the copy, reloads it.
+  DuckDB cannot attach the SQLite file without its sqlite extension, which
+  it downloads on first use; the copy works offline.
+
+DatabaseManager(olap=backend) sends the queries in ANALYTICAL, the
+GROUP BY reports over the base tables, to that backend and everything else
+to SQLite. The claims_fact reports stay on SQLite: they read a trigger-
+maintained fact table and decode dimension codes against it.
+
+    python backends.py [database] [--check]   # load the DuckDB copy; --check compares every report
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from changelog import LOGGED_TABLES, changes_since, last_seq
+from db_pool import DEFAULT_DB_PATH, get_pool
+from decoder import read_typed
+from profiler import read_frame
+
+try:
+    import duckdb
+except ImportError:  # optional: only DuckDBBackend needs it
+    duckdb = None
+
+LOAD_CHUNK_ROWS = 200_000
+FULL_REFRESH_FRACTION = 0.25
+ID_BATCH = 500
+
+# DatabaseManager methods whose query runs on DatabaseManager.olap when one is set
+ANALYTICAL = [
+    "get_waste_stats_by_food_type",
+    "get_waste_stats_by_provider_type",
+    "get_waste_stats_by_city",
+    "get_claims_statistics",
+    "get_top_providers",
+    "get_donations_by_city",
+    "get_donations_by_food_type",
+    "get_donations_by_meal_type",
+    "get_most_active_providers",
+    "get_total_quantity_by_city",
+    "get_claims_by_receiver",
+    "get_avg_quantity_by_food_type",
+    "get_most_claimed_food",
+    "get_claim_status_breakdown",
+    "get_donation_vs_claimed",
+    "get_claims_daily_trend",
+]
+
+# SQLite declared type -> DuckDB column type; anything else is VARCHAR
+_TYPES = {"INTEGER": "BIGINT", "REAL": "DOUBLE"}
+
+
+class SQLiteBackend:
+    """Queries on the SQLite database itself"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.pool = get_pool(db_path)
+
+    def read_frame(self, query, params=None, schema=None):
+        with self.pool.read_connection() as conn:
+            return read_frame(conn, query, params or None, schema)
+
+    def close(self):
+        pass
+
+
+class DuckDBBackend:
+    """Queries on an in-memory DuckDB copy of the base tables, kept current from change_log"""
+
+    name = "duckdb"
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        if duckdb is None:
+            raise ImportError("The duckdb backend needs the duckdb package (pip install duckdb)")
+        self.pool = get_pool(db_path)
+        self.duck = duckdb.connect()
+        self.seq = None
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    # copying
+
+    def _columns(self, conn, table):
+        return [(name, _TYPES.get(declared.upper(), "VARCHAR"))
+                for _, name, declared, *_ in conn.execute(f"PRAGMA table_info({table})")]
+
+    def _copy(self, conn, table, columns, where="", params=()):
+        """Append table's rows (matching where) from SQLite; return how many"""
+        names = [name for name, _ in columns]
+        cursor = conn.execute(f"SELECT {', '.join(names)} FROM {table} {where}", params)
+        copied = 0
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_ROWS)
+            if not rows:
+                break
+            self.duck.register("chunk", pd.DataFrame.from_records(rows, columns=names).astype(object))
+            self.duck.execute(f"INSERT INTO {table} SELECT * FROM chunk")
+            self.duck.unregister("chunk")
+            copied += len(rows)
+        return copied
+
+    def _reload(self, conn):
+        seq = last_seq(conn)
+        rows = 0
+        self.duck.execute("BEGIN")
+        for table in LOGGED_TABLES:
+            columns = self._columns(conn, table)
+            self.duck.execute(f"DROP TABLE IF EXISTS {table}")
+            self.duck.execute(f"CREATE TABLE {table} ({', '.join(f'{name} {kind}' for name, kind in columns)})")
+            rows += self._copy(conn, table, columns)
+        self.duck.execute("COMMIT")
+        self.seq, self.rows = seq, rows
+
+    def _apply(self, conn, changed):
+        """Replace the copied rows whose primary key changed"""
+        self.duck.execute("BEGIN")
+        for table, ids in changed.items():
+            pk, ids = LOGGED_TABLES[table], sorted(ids)
+            columns = self._columns(conn, table)
+            for start in range(0, len(ids), ID_BATCH):
+                batch = ids[start:start + ID_BATCH]
+                marks = ", ".join("?" * len(batch))
+                self.duck.execute(f"DELETE FROM {table} WHERE {pk} IN ({marks})", batch)
+                self._copy(conn, table, columns, f"WHERE {pk} IN ({marks})", batch)
+        self.duck.execute("COMMIT")
+
+    def refresh(self, full=False):
+        """Bring the copy up to date; return "current", "incremental" or "full" """
+        with self._lock, self.pool.connection() as conn:
+            if full or self.seq is None:
+                self._reload(conn)
+                return "full"
+            if last_seq(conn) == self.seq:
+                return "current"
+            reset, changed, seq = changes_since(conn, self.seq)
+            if reset or sum(len(ids) for ids in changed.values()) > FULL_REFRESH_FRACTION * max(self.rows, 1):
+                self._reload(conn)
+                return "full"
+            self._apply(conn, changed)
+            self.seq = seq
+            return "incremental"
+
+    # querying
+
+    def read_frame(self, query, params=None, schema=None):
+        self.refresh()
+        cursor = self.duck.cursor()
+        try:
+            return read_typed(cursor, query, params, schema)
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.duck.close()
+
+
+BACKENDS = {backend.name: backend for backend in (SQLiteBackend, DuckDBBackend)}
+
+
+def open_backend(name, db_path=DEFAULT_DB_PATH):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}; use one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](db_path)
+
+
+def check_parity(db_path=DEFAULT_DB_PATH, olap=None):
+    """Run every ANALYTICAL query on SQLite and on olap; return the names whose results differ"""
+    from db_queries import DatabaseManager
+    from query_cache import QueryCache
+    from snapshot import canonical
+
+    olap = olap or DuckDBBackend(db_path)
+    sql = DatabaseManager(db_path, cache=QueryCache(ttl=0))
+    other = DatabaseManager(db_path, cache=QueryCache(ttl=0), olap=olap)
+    mismatched = []
+    for name in ANALYTICAL:
+        expected, got = getattr(sql, name)(), getattr(other, name)()
+        if list(expected.dtypes.items()) != list(got.dtypes.items()) or canonical(expected) != canonical(got):
+            mismatched.append(name)
+    return mismatched
+
+
+def _write_round(conn):
+    """A mix of inserts, updates and deletes across the four tables, as the app and API make them"""
+    conn.execute("UPDATE food_listings SET Quantity = Quantity + 1 WHERE Food_ID % 97 = 0")
+    conn.execute("UPDATE claims SET Status = 'Cancelled' WHERE Claim_ID % 89 = 0")
+    conn.execute("DELETE FROM claims WHERE Claim_ID % 101 = 0")
+    conn.execute("UPDATE providers SET City = 'Parity Town' WHERE Provider_ID % 53 = 0")
+    conn.execute("INSERT INTO receivers (Name, Type, City, Contact) VALUES ('Parity Receiver', 'NGO', 'Parity Town', '')")
+    conn.execute("INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) "
+                 "SELECT MIN(Food_ID), last_insert_rowid(), 'Pending', datetime('now') FROM food_listings")
+    conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the DuckDB copy and compare its reports with SQLite")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--check", action="store_true",
+                        help="compare every analytical report, then again after writes to a copy of the database")
+    args = parser.parse_args(argv)
+
+    olap = DuckDBBackend(args.database)
+    start = time.perf_counter()
+    olap.refresh()
+    print(f"DuckDB copy of {olap.rows:,} rows loaded in {time.perf_counter() - start:.2f}s")
+    if not args.check:
+        return 0
+
+    mismatched = check_parity(args.database, olap)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The writes go to a copy; its DuckDB copy is loaded first so they arrive through change_log
+        path = os.path.join(tmp, os.path.basename(args.database))
+        source, target = sqlite3.connect(args.database), sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        copy = DuckDBBackend(path)
+        copy.refresh()
+        _write_round(target)
+        target.close()
+        kind = copy.refresh()
+        mismatched += [f"{name} (after writes, {kind} refresh)" for name in check_parity(path, copy)]
+        copy.close()
+        get_pool(path).close()
+    if mismatched:
+        print(f"Reports differing between SQLite and DuckDB: {', '.join(mismatched)}")
+        return 1
+    print(f"All {len(ANALYTICAL)} analytical reports match on SQLite and DuckDB, before and after writes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Load test for api_server.py: latency percentiles and requests/sec.
+
+Run from the repository root:
+    python -m benchmarks.bench_api                          # 100k listings, 16 clients, 10 s per scenario
+    python -m benchmarks.bench_api 1000000 --clients 64 --seconds 30
+    python -m benchmarks.bench_api --url http://127.0.0.1:8502   # an already running server
+
+Without --url a synthetic database is built and the server is started in a
+child process. Each client is one keep-alive connection sending requests
+back to back. "stream" fetches large NDJSON results. The "poll" scenario sends If-None-Match with the last ETag, as
+a polling partner would. The "mixed" scenario writes a claim every tenth request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+import sqlite3
+
+DEFAULT_PORT = 8612
+
+
+async def request(reader, writer, method, path, headers=None, body=None):
+    """Send one request on a keep-alive connection; return (status, headers, body)"""
+    lines = [f"{method} {path} HTTP/1.1", "Host: bench"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    data = json.dumps(body).encode() if body is not None else b""
+    if data:
+        lines += ["Content-Type: application/json", f"Content-Length: {len(data)}"]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + data)
+    await writer.drain()
+
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    response_headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            response_headers[name.strip().lower()] = value.strip()
+    if response_headers.get("transfer-encoding") == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n"))[:-2], 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            chunks.append(chunk[:-2])
+        return status, response_headers, b"".join(chunks)
+    length = int(response_headers.get("content-length") or 0)
+    return status, response_headers, await reader.readexactly(length) if length else b""
+
+
+def scenarios(cities, food_ids, receiver_ids):
+    """name -> function returning the next (method, path, body) for a client"""
+    def queries():
+        return "GET", random.choice([
+            f"/queries/food_by_city?city={quote(random.choice(cities))}",
+            f"/queries/expiring_food_by_city?city={quote(random.choice(cities))}&days=3",
+            "/queries/top_providers?limit=10",
+            "/queries/claims_statistics",
+        ]), None
+
+    def stream():
+        # Tens of thousands of rows, sent as chunked NDJSON
+        return "GET", f"/queries/food_expiring_soon?days={random.randint(0, 3)}&format=ndjson", None
+
+    def pages():
+        return "GET", random.choice([
+            f"/food_listings?limit=50&sort=Expiry_Date&after={quote(json.dumps(['2020-01-01', 0]))}",
+            f"/providers?City={quote(random.choice(cities))}",
+            f"/food_listings/{random.choice(food_ids)}",
+            f"/claims?Receiver_ID={random.choice(receiver_ids)}",
+        ]), None
+
+    def mixed():
+        if random.random() < 0.1:
+            return "POST", "/claims", {"Food_ID": random.choice(food_ids), "Receiver_ID": random.choice(receiver_ids),
+                                       "Status": "Pending", "Timestamp": "2026-01-01 00:00:00"}
+        return random.choice([queries, pages])()
+
+    return {"queries": queries, "pages": pages, "stream": stream, "poll": queries, "mixed": mixed}
+
+
+async def client(host, port, next_request, deadline, latencies, statuses, poll):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    etags = {}
+    try:
+        while time.perf_counter() < deadline:
+            method, path, body = next_request()
+            headers = {"If-None-Match": etags[path]} if poll and path in etags else None
+            start = time.perf_counter()
+            status, response_headers, _ = await request(reader, writer, method, path, headers, body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if "etag" in response_headers:
+                etags[path] = response_headers["etag"]
+    finally:
+        writer.close()
+
+
+async def run_scenario(host, port, name, next_request, clients, seconds):
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, next_request, start + seconds, latencies, statuses, name == "poll")
+                           for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    codes = " ".join(f"{code}:{count}" for code, count in sorted(statuses.items()))
+    print(f"{name:>8} {len(latencies):>9,} {len(latencies) / elapsed:>9,.0f} "
+          f"{quantiles[49] * 1000:>8.2f} {quantiles[98] * 1000:>8.2f}  {codes}")
+
+
+def sample_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    cities = [row[0] for row in conn.execute("SELECT DISTINCT City FROM providers LIMIT 200")]
+    food_ids = [row[0] for row in conn.execute("SELECT Food_ID FROM food_listings ORDER BY random() LIMIT 1000")]
+    receiver_ids = [row[0] for row in conn.execute("SELECT Receiver_ID FROM receivers ORDER BY random() LIMIT 1000")]
+    conn.close()
+    return cities, food_ids, receiver_ids
+
+
+async def wait_for_server(host, port, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            status, _, _ = await request(reader, writer, "GET", "/health")
+            writer.close()
+            if status == 200:
+                return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test api_server.py")
+    parser.add_argument("listings", nargs="?", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--database", help="database for --url, to sample IDs and cities from")
+    parser.add_argument("--scenario", action="append", choices=["queries", "pages", "stream", "poll", "mixed"])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port
+            db_path = args.database or "food_waste.db"
+        else:
+            host, port = "127.0.0.1", DEFAULT_PORT
+            db_path = os.path.join(tmp, f"api_{args.listings}.db")
+            build_database(db_path, args.listings)
+            conn = sqlite3.connect(db_path)
+            migrate(conn)
+            conn.close()
+            server = subprocess.Popen([sys.executable, "api_server.py", db_path, "--port", str(port),
+                                       "--workers", str(args.workers)], stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_server(host, port))
+            cases = scenarios(*sample_ids(db_path))
+            print(f"{'scenario':>8} {'requests':>9} {'req/sec':>9} {'p50 ms':>8} {'p99 ms':>8}  status counts")
+            for name in args.scenario or list(cases):
+                asyncio.run(run_scenario(host, port, name, cases[name], args.clients, args.seconds))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
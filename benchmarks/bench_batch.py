@@ -0,0 +1,63 @@
+"""Row-at-a-time CRUD vs crud.apply_batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch                # 100k listings, batches of 100 and 2,000 rows
+    python -m benchmarks.bench_batch 1000000 500 5000
+
+For each batch size: inserting listings, moving claims from one status to
+another and deleting listings, once with one crud call (one transaction) per
+row and once with a single batch. The derived-table triggers run in both.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import crud
+from db_pool import get_pool
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+DEFAULT_SIZES = [100, 2000]
+
+
+def listing(i):
+    return {"Food_Name": f"Bulk {i}", "Quantity": i % 50 + 1, "Expiry_Date": "2030-01-01", "Provider_ID": i % 100 + 1,
+            "Provider_Type": "Restaurant", "Location": "Bulk", "Food_Type": "Vegan", "Meal_Type": "Lunch"}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(n=100_000, *sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "batch.db")
+        build_database(path, n)
+        with get_pool(path).connection() as conn:
+            migrate(conn)
+            claim_ids = [row[0] for row in conn.execute("SELECT Claim_ID FROM claims ORDER BY Claim_ID")]
+
+        print(f"{'rows':>7} {'operation':>14} {'per row ms':>11} {'batch ms':>9} {'speedup':>8}")
+        for size in sizes or DEFAULT_SIZES:
+            records = [listing(i) for i in range(size)]
+            ids = []
+            per_row = timed(lambda: ids.extend(crud.insert("food_listings", record, path) for record in records))
+            batch = timed(lambda: ids.extend(crud.insert_many("food_listings", records, db_path=path)["ids"]))
+            print(f"{size:>7,} {'insert':>14} {per_row * 1000:>11.1f} {batch * 1000:>9.1f} {per_row / batch:>7.1f}x")
+
+            first, second = claim_ids[:size], claim_ids[size:2 * size]
+            per_row = timed(lambda: [crud.update("claims", claim_id, {"Status": "Claimed"}, path) for claim_id in first])
+            batch = timed(lambda: crud.update_many("claims", [{"Claim_ID": claim_id, "Status": "Claimed"}
+                                                              for claim_id in second], db_path=path))
+            print(f"{'':>7} {'status change':>14} {per_row * 1000:>11.1f} {batch * 1000:>9.1f} {per_row / batch:>7.1f}x")
+
+            per_row = timed(lambda: [crud.delete("food_listings", food_id, path) for food_id in ids[:size]])
+            batch = timed(lambda: crud.delete_many("food_listings", ids[size:], db_path=path))
+            print(f"{'':>7} {'delete':>14} {per_row * 1000:>11.1f} {batch * 1000:>9.1f} {per_row / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
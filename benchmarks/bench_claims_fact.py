@@ -0,0 +1,105 @@
+"""Claim reports: four-way joins over TEXT columns vs claims_fact with coded dimensions.
+
+Run from the repository root:
+    python -m benchmarks.bench_claims_fact                 # 100k and 1M listings
+    python -m benchmarks.bench_claims_fact 10000000        # custom tiers
+
+Reports time per call and DataFrame memory (deep) for each report, and the
+cost the fact triggers add to writing a claim.
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import claims_fact
+from db_queries import DatabaseManager
+from migrations import migrate
+from query_cache import QueryCache
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+WRITES = 2000
+
+# The join queries the fact table replaced
+LEGACY = {
+    "get_claims_full_details": """
+        SELECT
+            c.Claim_ID, c.Status, c.Timestamp,
+            f.Food_ID, f.Food_Name, f.Food_Type, f.Meal_Type, f.Quantity, f.Expiry_Date,
+            p.Provider_ID, p.Name AS Provider_Name, p.City AS Provider_City,
+            r.Receiver_ID, r.Name AS Receiver_Name, r.City AS Receiver_City
+        FROM claims c
+        JOIN food_listings f ON f.Food_ID = c.Food_ID
+        JOIN providers p ON p.Provider_ID = f.Provider_ID
+        JOIN receivers r ON r.Receiver_ID = c.Receiver_ID""",
+    "get_claims_by_food_type": """
+        SELECT f.Food_Type, COUNT(c.Claim_ID) AS Total_Claims
+        FROM claims c
+        JOIN food_listings f ON c.Food_ID = f.Food_ID
+        GROUP BY f.Food_Type
+        ORDER BY Total_Claims DESC""",
+    "get_claims_by_receiver_city": """
+        SELECT r.City, COUNT(*) AS Total_Claims
+        FROM claims c
+        JOIN receivers r ON c.Receiver_ID = r.Receiver_ID
+        GROUP BY r.City
+        ORDER BY Total_Claims DESC""",
+}
+
+
+def time_calls(fn, repeat=3):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def megabytes(frame):
+    return frame.memory_usage(index=True, deep=True).sum() / 2**20
+
+
+def time_writes(conn, n):
+    """Seconds per claim insert + status update, in one transaction"""
+    start = time.perf_counter()
+    for i in range(n):
+        cursor = conn.execute("INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) "
+                              "VALUES (?, ?, 'Pending', datetime('now'))", (i + 1, i % 100 + 1))
+        conn.execute("UPDATE claims SET Status = 'Completed' WHERE Claim_ID = ?", (cursor.lastrowid,))
+    conn.rollback()
+    return (time.perf_counter() - start) / n
+
+
+def main(tiers):
+    print(f"{'listings':>10} {'report':>28} {'join ms':>9} {'fact ms':>9} {'join MB':>8} {'fact MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"fact_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            db = DatabaseManager(path, cache=QueryCache(ttl=0))
+            for method, query in LEGACY.items():
+                legacy = lambda: pd.read_sql_query(query, conn)
+                fact = getattr(db, method)
+                assert len(legacy()) == len(fact()), "result mismatch"
+                print(f"{n:>10,} {method:>28} {time_calls(legacy) * 1000:>9.1f} {time_calls(fact) * 1000:>9.1f} "
+                      f"{megabytes(legacy()):>8.1f} {megabytes(fact()):>8.1f}")
+
+            with_triggers = time_writes(conn, WRITES)
+            claims_fact.drop_triggers(conn.cursor())
+            without = time_writes(conn, WRITES)
+            print(f"{'':>10} {'claim insert + update':>28} {without * 1e6:>7.0f} us -> {with_triggers * 1e6:.0f} us "
+                  f"with fact triggers")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
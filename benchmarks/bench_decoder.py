@@ -0,0 +1,78 @@
+"""Result decoding: pd.read_sql_query vs decoder.read_typed.
+
+Run from the repository root:
+    python -m benchmarks.bench_decoder                 # 100k and 1M listings
+    python -m benchmarks.bench_decoder 10000000        # custom tiers
+
+For each statement, time per call and DataFrame memory (deep) of both
+readers. read_sql_query is followed by the pd.to_datetime the pages used to
+apply to its date columns, so both rows end with usable dates.
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from decoder import kind_of, read_typed
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+
+STATEMENTS = {
+    "listings": "SELECT * FROM food_listings",
+    "claims": "SELECT * FROM claims",
+    "listings + provider": """
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Provider_ID, f.Provider_Type, f.Location,
+               f.Food_Type, f.Meal_Type, p.Name AS Provider_Name, p.City AS Provider_City
+        FROM food_listings f
+        JOIN providers p ON p.Provider_ID = f.Provider_ID""",
+    "page of 50": "SELECT * FROM food_listings ORDER BY Expiry_Date, Food_ID LIMIT 51",
+}
+
+
+def read_sql_with_dates(conn, query):
+    frame = pd.read_sql_query(query, conn)
+    for column in frame.columns:
+        if kind_of(column) in ("date", "datetime"):
+            frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+
+def time_calls(fn, repeat=3):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def megabytes(frame):
+    return frame.memory_usage(index=True, deep=True).sum() / 2**20
+
+
+def main(tiers):
+    print(f"{'listings':>10} {'statement':>20} {'pandas ms':>10} {'typed ms':>9} {'pandas MB':>10} {'typed MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"decoder_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            for name, query in STATEMENTS.items():
+                pandas = lambda: read_sql_with_dates(conn, query)
+                typed = lambda: read_typed(conn, query)
+                assert len(pandas()) == len(typed()), "result mismatch"
+                print(f"{n:>10,} {name:>20} {time_calls(pandas) * 1000:>10.2f} {time_calls(typed) * 1000:>9.2f} "
+                      f"{megabytes(pandas()):>10.2f} {megabytes(typed()):>9.2f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,88 @@
+"""Near-expiry lookups: legacy queries vs expiry.expiring_within_query.
+
+Run from the repository root:
+    python -m benchmarks.bench_expiry                 # 100k and 1M listings
+    python -m benchmarks.bench_expiry 10000000        # custom tiers
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from expiry import expiring_within_query
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+DAYS = [1, 2, 3, 5, 7]
+
+
+def legacy_expiring(conn, days, city=None):
+    """The pre-queue queries: days formatted into the SQL, every row in the window sorted"""
+    if city is None:
+        query = f"""
+            SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name as Provider_Name, p.City
+            FROM food_listings f
+            JOIN providers p ON f.Provider_ID = p.Provider_ID
+            WHERE date(f.Expiry_Date) BETWEEN date('now') AND date('now', '+{days} days')
+            ORDER BY f.Expiry_Date"""
+        return conn.execute(query).fetchall()
+    query = f"""
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name as Provider_Name, p.City
+        FROM food_listings f
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        WHERE p.City = ? AND date(f.Expiry_Date) BETWEEN date('now') AND date('now', '+{days} days')
+        ORDER BY f.Expiry_Date"""
+    return conn.execute(query, (city,)).fetchall()
+
+
+def queue_expiring(conn, days, city=None, limit=50):
+    query, params = expiring_within_query(days, city, limit)
+    return conn.execute(query, params).fetchall()
+
+
+def time_calls(fn, repeat=5):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(tiers):
+    print(f"{'listings':>12} {'query':>24} {'legacy ms':>10} {'queue ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"expiry_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            city = conn.execute("SELECT City FROM providers LIMIT 1").fetchone()[0]
+
+            # Same rows in the window (legacy breaks expiry ties arbitrarily)
+            for days in DAYS:
+                full = queue_expiring(conn, days, limit=None)
+                assert sorted(full) == sorted(legacy_expiring(conn, days)), "result mismatch"
+
+            cases = [
+                ("top 50, all cities", lambda: [legacy_expiring(conn, d)[:50] for d in DAYS],
+                 lambda: [queue_expiring(conn, d) for d in DAYS]),
+                ("top 50, one city", lambda: [legacy_expiring(conn, d, city)[:50] for d in DAYS],
+                 lambda: [queue_expiring(conn, d, city) for d in DAYS]),
+                ("full window, all cities", lambda: [legacy_expiring(conn, d) for d in DAYS],
+                 lambda: [queue_expiring(conn, d, limit=None) for d in DAYS]),
+            ]
+            for name, legacy, queue in cases:
+                legacy_s = time_calls(legacy) / len(DAYS)
+                queue_s = time_calls(queue) / len(DAYS)
+                print(f"{n:>12,} {name:>24} {legacy_s * 1000:>10.2f} {queue_s * 1000:>10.2f} "
+                      f"{legacy_s / queue_s:>7.1f}x")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,90 @@
+"""Point lookups on the R*Tree indexes (gazetteer.py) vs B-tree indexed Lat/Lon columns.
+
+Run from the repository root:
+    python -m benchmarks.bench_geo                 # 100k and 1M listings
+    python -m benchmarks.bench_geo 10000000        # custom tiers
+
+Each tier is a datagen.py database. The comparison table holds the same
+provider points in plain Lat and Lon columns with a B-tree index on each,
+the usual alternative: the index narrows one coordinate and the other is
+filtered row by row. For each box size, the median of REPEAT runs over
+BOXES boxes centred on provider cities; then nearby() against reading the
+same nearest providers, full rows and all, by computing the distance to every
+provider in SQL.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import datagen
+import gazetteer
+from migrations import migrate
+from profiler import read_frame
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+REPEAT = 5
+BOXES = 50
+RADII_KM = [10, 50, 250]
+NEAREST = 10
+# Spherical law of cosines, in radians; the order is the same as by distance
+SCAN_NEAREST = ("SELECT p.*, g.Lat, g.Lon FROM plain_geo g JOIN providers p ON p.Provider_ID = g.Provider_ID "
+                "ORDER BY acos(min(1.0, sin(radians(?)) * sin(radians(g.Lat)) + cos(radians(?)) * "
+                "cos(radians(g.Lat)) * cos(radians(g.Lon - ?)))), g.Provider_ID LIMIT ?")
+
+
+def time_calls(fn, repeat=REPEAT):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(tiers):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"geo_{n}.db")
+            datagen.generate(path, n, report=lambda message: None)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            conn.execute("CREATE TEMP TABLE plain_geo AS SELECT Provider_ID, Min_Lat AS Lat, Min_Lon AS Lon "
+                         "FROM provider_geo")
+            conn.execute("CREATE INDEX temp.idx_plain_lat ON plain_geo (Lat)")
+            conn.execute("CREATE INDEX temp.idx_plain_lon ON plain_geo (Lon)")
+            points = conn.execute("SELECT Lat, Lon FROM plain_geo").fetchall()
+            centres = random.Random(0).sample(points, min(BOXES, len(points)))
+            plain = "SELECT Provider_ID, Lat, Lon FROM plain_geo WHERE Lat BETWEEN ? AND ? AND Lon BETWEEN ? AND ?"
+            rtree = gazetteer.point_query("providers")
+
+            print(f"\n{n:,} listings: {len(points):,} provider points")
+            print(f"{'lookup':>24} {'rows':>8} {'B-tree ms':>10} {'R*Tree ms':>10} {'speedup':>8}")
+            for radius in RADII_KM:
+                boxes = [gazetteer.bounding_box(lat, lon, radius) for lat, lon in centres]
+                rows = sum(len(conn.execute(rtree, box).fetchall()) for box in boxes) / len(boxes)
+                on_btree = time_calls(lambda: [conn.execute(plain, box).fetchall() for box in boxes]) / len(boxes)
+                on_rtree = time_calls(lambda: [conn.execute(rtree, box).fetchall() for box in boxes]) / len(boxes)
+                print(f"{f'{radius} km box':>24} {rows:>8,.0f} {on_btree * 1000:>10.3f} {on_rtree * 1000:>10.3f} "
+                      f"{on_btree / on_rtree:>7.1f}x")
+
+            def scan():
+                for lat, lon in centres:
+                    read_frame(conn, SCAN_NEAREST, (lat, lat, lon, NEAREST))
+
+            def grow():
+                for lat, lon in centres:
+                    gazetteer.nearby(conn, "providers", lat, lon, limit=NEAREST)
+            on_scan = time_calls(scan) / len(centres)
+            on_grow = time_calls(grow) / len(centres)
+            print(f"{f'{NEAREST} nearest':>24} {NEAREST:>8} {on_scan * 1000:>10.3f} {on_grow * 1000:>10.3f} "
+                  f"{on_scan / on_grow:>7.1f}x")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,106 @@
+"""Cold start of the Streamlit app: import time and database bootstrap.
+
+Run from the repository root:
+    python -m benchmarks.bench_import              # median of 5 fresh interpreters
+    python -m benchmarks.bench_import --runs 10
+
+Import times come from python -X importtime in a fresh interpreter each
+run. "startup" is everything app.py imports at the top (read from its
+source), i.e. the cost before any page is drawn; each page row is what
+opening that page adds on top. The bootstrap rows time ensure_database
+on a copy of food_waste.db: the first call, a repeat call, and the full
+schema check it replaced on every script run.
+"""
+import argparse
+import ast
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from views import PAGES
+
+BOOTSTRAP_SCRIPT = """
+import sys, time
+import bootstrap
+from db_pool import get_pool
+path = sys.argv[1]
+start = time.perf_counter()
+bootstrap.ensure_database(path)
+first = time.perf_counter() - start
+start = time.perf_counter()
+bootstrap.ensure_database(path)
+repeat = time.perf_counter() - start
+start = time.perf_counter()
+with get_pool(path).connection() as conn:
+    bootstrap._init_db(conn)
+unguarded = time.perf_counter() - start
+print(first, repeat, unguarded)
+"""
+
+
+def app_imports(path="app.py"):
+    """Top-level modules app.py imports, in order"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_seconds(targets, preload=()):
+    """Cumulative import time of targets in a fresh interpreter, after preload is imported"""
+    code = "".join(f"import {module}\n" for module in (*preload, *targets))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  ") and name.strip() in targets:
+            total += int(cumulative)
+    return total / 1e6
+
+
+def median_of(runs, fn, *args):
+    return statistics.median(fn(*args) for _ in range(runs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and bootstrap cost of app.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", default="food_waste.db")
+    args = parser.parse_args(argv)
+
+    startup = app_imports()
+    print(f"{'imports':>22} {'ms':>8}")
+    print(f"{'startup':>22} {median_of(args.runs, import_seconds, startup) * 1000:>8.0f}   ({', '.join(startup)})")
+    for page, module in PAGES.items():
+        seconds = median_of(args.runs, import_seconds, [module], startup)
+        print(f"{'+ ' + page:>22} {seconds * 1000:>8.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bootstrap.db")
+        shutil.copy(args.database, path)
+        subprocess.run([sys.executable, "-c", BOOTSTRAP_SCRIPT, path], capture_output=True, check=True)  # migrate
+        samples = []
+        for _ in range(args.runs):
+            output = subprocess.run([sys.executable, "-c", BOOTSTRAP_SCRIPT, path],
+                                    capture_output=True, text=True, check=True).stdout
+            samples.append([float(value) for value in output.split()[-3:]])
+        first, repeat, unguarded = (statistics.median(column) for column in zip(*samples))
+    print(f"\n{'bootstrap':>22} {'ms':>8}")
+    print(f"{'first call':>22} {first * 1000:>8.2f}")
+    print(f"{'later calls':>22} {repeat * 1000:>8.4f}")
+    print(f"{'unguarded (old rerun)':>22} {unguarded * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
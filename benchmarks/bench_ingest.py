@@ -0,0 +1,106 @@
+"""CSV load time and peak memory: legacy read_csv/to_sql path vs ingest.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest                  # 100k, 1M and 10M listings
+    python -m benchmarks.bench_ingest 1000000          # custom tiers
+
+The legacy loader holds whole files in memory, so it is only run up to
+LEGACY_MAX_LISTINGS. Each load runs in a child process so its peak RSS can
+be measured on its own.
+"""
+import csv
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from ingest import SOURCES, ingest
+from migrations import migrate
+from benchmarks.synthetic import SCHEMA, build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000, 10_000_000]
+LEGACY_MAX_LISTINGS = 1_000_000
+
+
+def export_csv(db_path, csv_dir):
+    """Write each table of a synthetic database to <table>.csv, streaming rows"""
+    conn = sqlite3.connect(db_path)
+    for table, filename in SOURCES:
+        cursor = conn.execute(f"SELECT * FROM {table}")
+        with open(os.path.join(csv_dir, filename), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([column[0] for column in cursor.description])
+            writer.writerows(cursor)
+    conn.close()
+
+
+def _empty_database(path):
+    conn = sqlite3.connect(path)
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    conn.commit()
+    return conn
+
+
+def legacy_load(db_path, csv_dir):
+    conn = _empty_database(db_path)
+    for table, filename in SOURCES:
+        df = pd.read_csv(os.path.join(csv_dir, filename))
+        df.to_sql(table, conn, if_exists='append', index=False)
+    conn.commit()
+    migrate(conn)
+    conn.close()
+
+
+def streaming_load(db_path, csv_dir):
+    conn = _empty_database(db_path)
+    ingest(conn, csv_dir=csv_dir, report=lambda message: None)
+    conn.close()
+
+
+def _run(loader, db_path, csv_dir, results):
+    start = time.perf_counter()
+    loader(db_path, csv_dir)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def measure(loader, db_path, csv_dir):
+    """Run loader in a child process; return (seconds, peak RSS in MB)"""
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_run, args=(loader, db_path, csv_dir, results))
+    child.start()
+    elapsed, peak_mb = results.get()
+    child.join()
+    return elapsed, peak_mb
+
+
+def main(tiers):
+    print(f"{'listings':>12} {'loader':>10} {'seconds':>9} {'rows/sec':>12} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            source = os.path.join(tmp, f"source_{n}.db")
+            build_database(source, n)
+            export_csv(source, tmp)
+            conn = sqlite3.connect(source)
+            total_rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table, _ in SOURCES)
+            conn.close()
+            os.remove(source)
+
+            loaders = [("ingest", streaming_load)]
+            if n <= LEGACY_MAX_LISTINGS:
+                loaders.insert(0, ("legacy", legacy_load))
+            for name, loader in loaders:
+                target = os.path.join(tmp, f"{name}_{n}.db")
+                elapsed, peak_mb = measure(loader, target, tmp)
+                os.remove(target)
+                print(f"{n:>12,} {name:>10} {elapsed:>9.2f} {total_rows / elapsed:>12,.0f} {peak_mb:>9.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,66 @@
+"""Per-render cost of the Dashboard KPIs: legacy eight-query path vs kpi_engine.
+
+Run from the repository root:
+    python -m benchmarks.bench_kpi                 # 10k, 1M and 10M listings
+    python -m benchmarks.bench_kpi 10000 1000000   # custom tiers
+"""
+import os
+import sys
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from kpi_engine import compute_kpis
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [10_000, 1_000_000, 10_000_000]
+
+LEGACY_QUERIES = [
+    "SELECT COUNT(*) FROM food_listings",
+    "SELECT COUNT(*) FROM providers",
+    "SELECT COUNT(*) FROM receivers",
+    "SELECT COUNT(*) FROM claims",
+    "SELECT COUNT(DISTINCT Food_ID) FROM claims WHERE Status = 'Claimed'",
+    "SELECT COUNT(*) FROM claims WHERE Status = 'Pending'",
+    "SELECT COUNT(*) FROM claims WHERE Status = 'Cancelled'",
+    "SELECT COUNT(*) FROM food_listings WHERE Expiry_Date < date('now')",
+]
+
+
+def legacy_kpis(conn):
+    return [pd.read_sql(query, conn).iloc[0, 0] for query in LEGACY_QUERIES]
+
+
+def time_renders(fn, conn, repeat):
+    fn(conn)  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(conn)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(tiers):
+    print(f"{'listings':>12} {'legacy ms':>12} {'engine ms':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"kpi_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            legacy = legacy_kpis(conn)
+            engine = compute_kpis(conn)
+            assert [int(v) for v in legacy] == list(engine.as_dict().values()), "KPI mismatch"
+            repeat = 20 if n <= 1_000_000 else 5
+            legacy_s = time_renders(legacy_kpis, conn, repeat)
+            engine_s = time_renders(compute_kpis, conn, repeat)
+            print(f"{n:>12,} {legacy_s * 1000:>12.2f} {engine_s * 1000:>12.2f} {legacy_s / engine_s:>7.1f}x")
+            conn.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,113 @@
+"""Claim matching: nested-loop greedy vs matching.match.
+
+Run from the repository root:
+    python -m benchmarks.bench_matching                    # 1M listings x 100k receivers
+    python -m benchmarks.bench_matching 100000 10000       # custom listings, receivers
+    python -m benchmarks.bench_matching --db 100000        # end to end on a synthetic database
+
+Arrays are random with one city per 100 receivers, like benchmarks.synthetic.
+The nested-loop baseline is only timed on a sample of cities and scaled up,
+because the full run would take hours.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from matching import MAX_PER_RECEIVER, WEIGHTS, match, propose_claims
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+N_FOOD_TYPES = 3
+N_MEAL_TYPES = 4
+BASELINE_CITIES = 20
+
+
+def random_inputs(n_listings, n_receivers, seed=0):
+    rng = np.random.default_rng(seed)
+    n_cities = max(n_receivers // 100, 1)
+    food_pref = rng.dirichlet(np.ones(N_FOOD_TYPES), n_receivers)
+    meal_pref = rng.dirichlet(np.ones(N_MEAL_TYPES), n_receivers)
+    return (rng.integers(0, n_cities, n_listings), rng.integers(0, N_FOOD_TYPES, n_listings),
+            rng.integers(0, N_MEAL_TYPES, n_listings), rng.integers(1, 51, n_listings).astype(float),
+            rng.integers(0, n_cities, n_receivers), food_pref, meal_pref,
+            rng.uniform(1, 50, n_receivers))
+
+
+def nested_loop_match(listing_city, listing_food, listing_meal, listing_qty,
+                      receiver_city, food_pref, meal_pref, receiver_qty, max_per_receiver=MAX_PER_RECEIVER):
+    """One listing at a time, scanning every receiver for the best one with capacity left"""
+    capacity = [max_per_receiver] * len(receiver_city)
+    assigned = []
+    for i in range(len(listing_city)):
+        best, best_score = None, -1.0
+        for r in range(len(receiver_city)):
+            if receiver_city[r] != listing_city[i] or not capacity[r]:
+                continue
+            qty, usual = listing_qty[i], receiver_qty[r]
+            score = (WEIGHTS["food_type"] * food_pref[r][listing_food[i]]
+                     + WEIGHTS["meal_type"] * meal_pref[r][listing_meal[i]]
+                     + WEIGHTS["quantity"] * (1 - abs(qty - usual) / max(qty, usual, 1)))
+            if score > best_score:
+                best, best_score = r, score
+        if best is not None:
+            capacity[best] -= 1
+            assigned.append((i, best, best_score))
+    return assigned
+
+
+def check_assignment(inputs, listings, receivers):
+    listing_city, receiver_city = inputs[0], inputs[4]
+    assert len(np.unique(listings)) == len(listings), "listing assigned twice"
+    assert (listing_city[listings] == receiver_city[receivers]).all(), "cross-city match"
+    assert np.bincount(receivers).max(initial=0) <= MAX_PER_RECEIVER, "receiver over capacity"
+
+
+def bench_arrays(n_listings, n_receivers):
+    inputs = random_inputs(n_listings, n_receivers)
+    start = time.perf_counter()
+    listings, receivers, scores = match(*inputs)
+    vectorized_s = time.perf_counter() - start
+    check_assignment(inputs, listings, receivers)
+
+    # Baseline on the listings and receivers of a few cities, scaled by listing count
+    listing_city, receiver_city = inputs[0], inputs[4]
+    sample = np.isin(listing_city, np.arange(BASELINE_CITIES))
+    sample_receivers = np.isin(receiver_city, np.arange(BASELINE_CITIES))
+    sample_inputs = ([column[sample] for column in inputs[:4]]
+                     + [column[sample_receivers] for column in inputs[4:]])
+    start = time.perf_counter()
+    nested_loop_match(*[column.tolist() for column in sample_inputs])
+    baseline_s = (time.perf_counter() - start) * n_listings / max(sample.sum(), 1)
+    # Full receiver scans make the real nested loop n_cities times slower again
+    baseline_s *= len(receiver_city) / max(sample_receivers.sum(), 1)
+
+    print(f"{'listings':>12} {'receivers':>10} {'matched':>10} {'loop s (est)':>13} {'numpy s':>9} {'speedup':>9}")
+    print(f"{n_listings:>12,} {n_receivers:>10,} {len(listings):>10,} {baseline_s:>13,.0f} "
+          f"{vectorized_s:>9.2f} {baseline_s / vectorized_s:>8,.0f}x")
+
+
+def bench_database(n_listings):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"matching_{n_listings}.db")
+        build_database(path, n_listings)
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        print(f"{'listings':>12} {'days':>5} {'matched':>10} {'seconds':>9}")
+        for days in (3, 7, 30):
+            start = time.perf_counter()
+            proposals = propose_claims(conn, days)
+            elapsed = time.perf_counter() - start
+            print(f"{n_listings:>12,} {days:>5} {len(proposals):>10,} {elapsed:>9.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--db"]:
+        bench_database(int(args[1]) if len(args) > 1 else 1_000_000)
+    else:
+        bench_arrays(int(args[0]) if args else 1_000_000, int(args[1]) if len(args) > 1 else 100_000)
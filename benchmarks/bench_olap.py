@@ -0,0 +1,72 @@
+"""Aggregate reports on SQLite vs the DuckDB backend (backends.py), per query.
+
+Run from the repository root:
+    python -m benchmarks.bench_olap                 # 100k and 1M listings
+    python -m benchmarks.bench_olap 10000000        # custom tiers
+
+Each tier is a datagen.py database. For every backends.ANALYTICAL query,
+the median of REPEAT uncached runs on each backend (the DuckDB copy already
+loaded), then what keeping the copy current costs: the initial load, and
+an incremental refresh after a round of writes.
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import backends
+import datagen
+from db_queries import DatabaseManager
+from migrations import migrate
+from query_cache import QueryCache
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+REPEAT = 5
+
+
+def time_calls(fn, repeat=REPEAT):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(tiers):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"olap_{n}.db")
+            datagen.generate(path, n, report=lambda message: None)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+
+            olap = backends.DuckDBBackend(path)
+            start = time.perf_counter()
+            olap.refresh()
+            loaded = time.perf_counter() - start
+            sql = DatabaseManager(path, cache=QueryCache(ttl=0))
+            duck = DatabaseManager(path, cache=QueryCache(ttl=0), olap=olap)
+
+            print(f"\n{n:,} listings: DuckDB copy of {olap.rows:,} rows loaded in {loaded:.2f}s")
+            print(f"{'query':>34} {'SQLite ms':>10} {'DuckDB ms':>10} {'speedup':>8}")
+            for name in backends.ANALYTICAL:
+                on_sqlite = time_calls(getattr(sql, name))
+                on_duckdb = time_calls(getattr(duck, name))
+                print(f"{name:>34} {on_sqlite * 1000:>10.2f} {on_duckdb * 1000:>10.2f} "
+                      f"{on_sqlite / on_duckdb:>7.1f}x")
+
+            backends._write_round(conn)
+            changed = conn.execute("SELECT COUNT(*) FROM change_log WHERE Seq > ?", (olap.seq,)).fetchone()[0]
+            start = time.perf_counter()
+            kind = olap.refresh()
+            print(f"{kind} refresh after {changed:,} changed rows: {(time.perf_counter() - start) * 1000:.1f} ms")
+            conn.close()
+            olap.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
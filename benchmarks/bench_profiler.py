@@ -0,0 +1,60 @@
+"""Overhead of profiler.read_frame with profiling off and on.
+
+Run from the repository root:
+    python -m benchmarks.bench_profiler               # 100k listings, 2,000 calls per statement
+    python -m benchmarks.bench_profiler 1000000 500
+
+Times pd.read_sql_query directly, read_frame with no profiler enabled, and
+read_frame with a profiler enabled (no slow log), for a point lookup and a
+small aggregate.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import profiler
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+STATEMENTS = {
+    "point lookup": ("SELECT * FROM food_listings WHERE Food_ID = ?", (42,)),
+    "aggregate": ("SELECT NULLIF(Food_Type, '') AS Food_Type, Count FROM agg_food_type ORDER BY Food_Type", None),
+}
+
+
+def per_call(fn, calls, rounds=3):
+    """Best of rounds, seconds per call"""
+    fn()
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def main(n=100_000, calls=2000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiler.db")
+        build_database(path, n)
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        print(f"{'statement':>14} {'direct us':>10} {'off us':>8} {'on us':>8} {'off overhead':>13}")
+        for name, (query, params) in STATEMENTS.items():
+            direct = per_call(lambda: pd.read_sql_query(query, conn, params=params), calls)
+            off = per_call(lambda: profiler.read_frame(conn, query, params), calls)
+            profiler.enable(slow_log=None)
+            on = per_call(lambda: profiler.read_frame(conn, query, params), calls)
+            profiler.disable()
+            print(f"{name:>14} {direct * 1e6:>10.1f} {off * 1e6:>8.1f} {on * 1e6:>8.1f} "
+                  f"{(off - direct) / direct:>12.1%}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,214 @@
+"""Every DatabaseManager query and data_layer loader at each scale tier, against stored baselines.
+
+Run from the repository root:
+    python -m benchmarks.bench_queries                          # 10k and 100k listings
+    python -m benchmarks.bench_queries 1000000 10000000 --data-dir /data/tiers
+    python -m benchmarks.bench_queries --save-baseline          # accept this run as the new baseline
+
+Each tier is a datagen.py database (seed datagen.SEED, anchored on today),
+migrated as the app would. With --data-dir the databases are kept and
+reused, which matters from 10M listings up. Every call is timed cold: the
+shared and session caches are cleared before it, so the number is the
+query and its decoding, not a cache hit. The median of --repeat runs is
+reported (one run once a call takes over SLOW_SECONDS).
+
+The report (--report, JSON) has per tier the build times and, per query,
+the median and fastest milliseconds and the rows returned. Each query is
+compared with the same tier in the baseline file on its fastest run, the
+least noisy number: over tolerance times the baseline (and at least
+MIN_REGRESSION_MS slower) is a regression, and the run exits 1. Baselines
+are only comparable on the machine that recorded them.
+"""
+import argparse
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import datagen
+from migrations import migrate
+
+DEFAULT_TIERS = [10_000, 100_000]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DB_NAME = "food_waste.db"
+REPEAT = 5
+SLOW_SECONDS = 10.0
+TOLERANCE = 1.5
+MIN_REGRESSION_MS = 5.0
+
+# Sample arguments by parameter name; "city" is replaced by the tier's biggest city
+SAMPLE_ARGS = {
+    "city": None,
+    "food_type": "Vegetarian",
+    "meal_type": "Dinner",
+    "provider_type": "Restaurant",
+    "status": "Pending",
+    "limit": 10,
+    "days": 3,
+    "table": "food_listings",
+    "row_id": 1,
+    "food_id": 1,
+    "text": "rice",
+}
+
+
+def _rows(result):
+    if isinstance(result, tuple):
+        result = result[0]
+    return len(result) if hasattr(result, "__len__") else 1
+
+
+def _calls(manager):
+    """(name, call) for every get_ method of DatabaseManager and get_ function of data_layer"""
+    import data_layer
+    from db_queries import DatabaseManager
+
+    calls = []
+    for prefix, owner, functions in [("db_queries", manager, inspect.getmembers(DatabaseManager, inspect.isfunction)),
+                                     ("data_layer", data_layer, inspect.getmembers(data_layer, inspect.isfunction))]:
+        for name, function in functions:
+            if not name.startswith("get_") or name == "get_connection" or function.__module__ != prefix:
+                continue
+            required = [parameter.name for parameter in inspect.signature(function).parameters.values()
+                        if parameter.default is parameter.empty and parameter.name != "self"]
+            args = [SAMPLE_ARGS[parameter] for parameter in required]
+            calls.append((f"{prefix}.{name}", getattr(owner, name), args))
+    return calls
+
+
+def measure_tier(directory, repeat):
+    """Time every call against directory/food_waste.db; runs in its own process"""
+    # The pages' data_layer reads food_waste.db in the working directory
+    os.chdir(directory)
+    import data_layer
+    from db_queries import DatabaseManager
+    from query_cache import get_cache
+    # st.session_state outside `streamlit run` warns on every access
+    for name in ("streamlit.runtime.scriptrunner_utils.script_run_context",
+                 "streamlit.runtime.state.session_state_proxy"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    conn = sqlite3.connect(DB_NAME)
+    SAMPLE_ARGS["city"] = conn.execute("SELECT Location FROM food_listings GROUP BY Location "
+                                       "ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    conn.close()
+    manager = DatabaseManager(DB_NAME)
+    results = {}
+    for name, call, args in _calls(manager):
+        samples = []
+        try:
+            for _ in range(repeat):
+                get_cache(DB_NAME).clear()
+                data_layer.session_cache().clear()
+                start = time.perf_counter()
+                result = call(*args)
+                samples.append(time.perf_counter() - start)
+                if samples[-1] > SLOW_SECONDS:
+                    break
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        results[name] = {"median_ms": round(statistics.median(samples) * 1000, 3),
+                         "min_ms": round(min(samples) * 1000, 3), "rows": _rows(result)}
+    return results
+
+
+def build_tier(directory, listings):
+    """Generate and migrate the tier's database unless directory already has it; return build info"""
+    path = os.path.join(directory, DB_NAME)
+    if os.path.exists(path):
+        return {"reused": True}
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    datagen.generate(path, listings, report=lambda message: print(f"  {message}"))
+    generated = time.perf_counter()
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+    return {"generate_seconds": round(generated - start, 2), "migrate_seconds": round(time.perf_counter() - generated, 2)}
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """Return [(tier, query, baseline ms, ms)] for every query whose fastest run regressed past tolerance"""
+    regressions = []
+    for tier, result in report["tiers"].items():
+        before = baseline.get("tiers", {}).get(tier, {}).get("queries", {})
+        for name, timing in result["queries"].items():
+            old = before.get(name, {}).get("min_ms")
+            new = timing.get("min_ms")
+            if old is None or new is None:
+                continue
+            if new > old * tolerance and new - old > MIN_REGRESSION_MS:
+                regressions.append((tier, name, old, new))
+    return regressions
+
+
+def main(tiers, data_dir=None, report_path="bench_queries.json", baseline_path=BASELINE_PATH, repeat=REPEAT,
+         tolerance=TOLERANCE, save_baseline=False):
+    report = {
+        "date": date.today().isoformat(),
+        "seed": datagen.SEED,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "tiers": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for listings in tiers:
+            directory = os.path.join(data_dir or tmp, str(listings))
+            print(f"{listings:,} listings")
+            tier = build_tier(directory, listings)
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                tier["queries"] = pool.apply(measure_tier, (directory, repeat))
+            tier["rows"] = datagen.sizes(listings)
+            report["tiers"][str(listings)] = tier
+            for name, timing in tier["queries"].items():
+                if "error" in timing:
+                    print(f"  {name:<48} {timing['error']}")
+                else:
+                    print(f"  {name:<48} {timing['median_ms']:>10.2f} ms {timing['rows']:>10,} rows")
+
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_path}")
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    regressions = compare(report, baseline, tolerance)
+    for tier, name, old, new in regressions:
+        print(f"  REGRESSION {int(tier):,} listings {name}: {old:.2f} -> {new:.2f} ms ({new / old:.1f}x)")
+    if save_baseline:
+        # Tiers not run this time keep their old baseline
+        baseline.update({key: value for key, value in report.items() if key != "tiers"})
+        baseline.setdefault("tiers", {}).update(report["tiers"])
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    elif regressions:
+        sys.exit(1)
+    elif baseline:
+        print(f"No query more than {tolerance}x slower than its baseline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every query and page loader at each scale tier")
+    parser.add_argument("tiers", nargs="*", type=int, help="food listings per tier")
+    parser.add_argument("--data-dir", help="keep the tier databases here and reuse them on later runs")
+    parser.add_argument("--report", default="bench_queries.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    main(args.tiers or DEFAULT_TIERS, args.data_dir, args.report, args.baseline, args.repeat, args.tolerance,
+         args.save_baseline)
@@ -0,0 +1,90 @@
+"""DatabaseManager queries read from the file vs the in-memory replica (replica.py).
+
+Run from the repository root:
+    python -m benchmarks.bench_replica                 # 100k and 1M listings
+    python -m benchmarks.bench_replica 10000000        # custom tiers
+
+Each tier is a datagen.py database. For every get_ query of DatabaseManager,
+the median of REPEAT uncached runs reading the file and reading the replica,
+then what the replica costs: the first copy, and a refresh after a round of
+writes (every refresh copies the whole file).
+"""
+import inspect
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import backends
+import datagen
+import replica
+from benchmarks.bench_queries import SAMPLE_ARGS
+from db_queries import DatabaseManager
+from migrations import migrate
+from query_cache import QueryCache
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+REPEAT = 5
+
+
+def time_calls(fn, repeat=REPEAT):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def queries(manager):
+    """(name, call) for every get_ query of manager, with SAMPLE_ARGS for its parameters"""
+    calls = []
+    for name, method in inspect.getmembers(manager, inspect.ismethod):
+        if name.startswith("get_") and name != "get_connection":
+            required = [parameter.name for parameter in inspect.signature(method).parameters.values()
+                        if parameter.default is parameter.empty]
+            args = [SAMPLE_ARGS[parameter] for parameter in required]
+            calls.append((name, lambda method=method, args=args: method(*args)))
+    return calls
+
+
+def main(tiers):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"replica_{n}.db")
+            datagen.generate(path, n, report=lambda message: None)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            SAMPLE_ARGS["city"] = conn.execute("SELECT Location FROM food_listings GROUP BY Location "
+                                               "ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+            manager = DatabaseManager(path, cache=QueryCache(ttl=0))
+            calls = queries(manager)
+            on_file = {name: time_calls(call) for name, call in calls}
+
+            # Only the writes below move the copy on
+            copy = replica.attach(path, max_staleness=float("inf"))
+            copy.refresh()
+            loaded = copy.metrics()
+            on_memory = {name: time_calls(call) for name, call in calls}
+
+            print(f"\n{n:,} listings: {loaded['bytes'] / 2 ** 20:,.0f} MB copied into memory "
+                  f"in {loaded['refresh_seconds_last']:.2f}s")
+            print(f"{'query':>34} {'file ms':>10} {'memory ms':>10} {'speedup':>8}")
+            for name, _ in calls:
+                print(f"{name:>34} {on_file[name] * 1000:>10.2f} {on_memory[name] * 1000:>10.2f} "
+                      f"{on_file[name] / on_memory[name]:>7.1f}x")
+            print(f"{'total':>34} {sum(on_file.values()) * 1000:>10.2f} {sum(on_memory.values()) * 1000:>10.2f}")
+
+            backends._write_round(conn)
+            start = time.perf_counter()
+            copy.refresh()
+            print(f"refresh after a round of writes: {(time.perf_counter() - start) * 1000:.0f} ms")
+            replica.detach(path)
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
@@ -0,0 +1,99 @@
+"""Name search: LIKE '%text%' scans vs the FTS5 indexes in search.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_search                 # 100k and 1M listings
+    python -m benchmarks.bench_search 10000000        # custom tiers
+
+The synthetic names ("Provider 12") are replaced with two words drawn from a
+vocabulary of VOCABULARY made-up words, plus COMMON_WORD in one name in ten,
+so terms have realistic selectivity. For each search, the time to the first
+page of PAGE rows and the number of matching rows. The LIKE scan stops at
+PAGE rows (unranked); the FTS page is ranked over up to search.RANKED_MATCHES
+matches.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import search
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+VOCABULARY = 5000
+COMMON_WORD = "fresh"
+PAGE = 50
+SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "ne", "so", "vi", "da", "pe", "zu", "ho", "ri", "ban", "tor", "mel"]
+
+
+def vocabulary(seed=7):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def rename(conn, words):
+    """Give every listing, provider and receiver a made-up two-word name"""
+    rng = random.Random(11)
+
+    def name(_):
+        first = COMMON_WORD if rng.random() < 0.1 else rng.choice(words)
+        return f"{first.capitalize()} {rng.choice(words).capitalize()}"
+
+    conn.create_function("made_up_name", 1, name)
+    conn.execute("UPDATE food_listings SET Food_Name = made_up_name(Food_ID)")
+    conn.execute("UPDATE providers SET Name = made_up_name(Provider_ID)")
+    conn.execute("UPDATE receivers SET Name = made_up_name(Receiver_ID)")
+    conn.commit()
+
+
+def like_query(text):
+    return "SELECT * FROM food_listings WHERE Food_Name LIKE ? OR Location LIKE ? LIMIT ?", (f"%{text}%",) * 2 + (PAGE,)
+
+
+def time_calls(fn, repeat=5):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(tiers):
+    words = vocabulary()
+    rare = words[len(words) // 2]
+    searches = {
+        "word": rare,
+        "two words": f"{COMMON_WORD} {rare}",
+        "typing (3 chars)": rare[:3],
+        "common word": COMMON_WORD,
+    }
+    print(f"{'listings':>10} {'search':>18} {'matches':>9} {'LIKE ms':>9} {'FTS ms':>8} {'typeahead ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"search_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            rename(conn, words)
+            migrate(conn)
+            for label, text in searches.items():
+                sql, params = search.search_query("food_listings", text, page_size=PAGE)
+                count = conn.execute("SELECT COUNT(*) FROM food_listings_fts WHERE food_listings_fts MATCH ?",
+                                     (search.match_expression(text),)).fetchone()[0]
+                like = time_calls(lambda: conn.execute(*like_query(text)).fetchall())
+                fts = time_calls(lambda: conn.execute(sql, params).fetchall())
+                typeahead = time_calls(lambda: conn.execute(*search.suggest_query(text)).fetchall())
+                print(f"{n:>10,} {label:>18} {count:>9,} {like * 1000:>9.2f} {fts * 1000:>8.2f} {typeahead * 1000:>13.2f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
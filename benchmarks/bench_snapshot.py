@@ -0,0 +1,104 @@
+"""Reporting queries: SQL joins vs the columnar snapshot (snapshot.py).
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshot                 # 100k and 1M listings
+    python -m benchmarks.bench_snapshot 10000000        # custom tiers
+
+For each tier: full export time and size on disk, every report through
+DatabaseManager with the result cache off vs from the snapshot, and an
+incremental refresh after CHANGES random writes to claims, listings and
+providers. Results are compared with snapshot.check_snapshot first.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from db_queries import DatabaseManager
+from migrations import migrate
+from query_cache import QueryCache
+from snapshot import REPORTS, Snapshot, check_snapshot
+from benchmarks.synthetic import build_database
+
+DEFAULT_TIERS = [100_000, 1_000_000]
+CHANGES = 1000
+
+
+def time_calls(fn, repeat=3):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def random_changes(conn, n, seed=0):
+    rng = random.Random(seed)
+    max_food = conn.execute("SELECT MAX(Food_ID) FROM food_listings").fetchone()[0]
+    max_claim = conn.execute("SELECT MAX(Claim_ID) FROM claims").fetchone()[0]
+    max_provider = conn.execute("SELECT MAX(Provider_ID) FROM providers").fetchone()[0]
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.5:
+            conn.execute("UPDATE claims SET Status = ? WHERE Claim_ID = ?",
+                         (rng.choice(["Pending", "Completed", "Cancelled"]), rng.randint(1, max_claim)))
+        elif kind < 0.8:
+            conn.execute("INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) "
+                         "VALUES (?, 1, 'Pending', datetime('now'))", (rng.randint(1, max_food),))
+        elif kind < 0.95:
+            conn.execute("UPDATE food_listings SET Quantity = Quantity + 1 WHERE Food_ID = ?",
+                         (rng.randint(1, max_food),))
+        else:
+            conn.execute("UPDATE providers SET Name = Name || '*' WHERE Provider_ID = ?",
+                         (rng.randint(1, max_provider),))
+    conn.commit()
+
+
+def size_on_disk(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main(tiers):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tiers:
+            path = os.path.join(tmp, f"snapshot_{n}.db")
+            build_database(path, n)
+            conn = sqlite3.connect(path)
+            migrate(conn)
+
+            snapshot = Snapshot(path)
+            start = time.perf_counter()
+            snapshot.refresh(conn, full=True)
+            export_s = time.perf_counter() - start
+            print(f"\n{n:,} listings: export {export_s:.2f} s, "
+                  f"{size_on_disk(snapshot.path) / 2**20:.1f} MB on disk "
+                  f"(database {os.path.getsize(path) / 2**20:.1f} MB)")
+
+            mismatched = check_snapshot(path, snapshot)
+            assert not mismatched, f"result mismatch: {mismatched}"
+
+            sql = DatabaseManager(path, cache=QueryCache(ttl=0))
+            print(f"{'report':>28} {'rows':>10} {'sql ms':>10} {'snapshot ms':>12} {'speedup':>8}")
+            for report, method in REPORTS.items():
+                sql_s = time_calls(getattr(sql, method))
+                snapshot_s = time_calls(getattr(snapshot, report))
+                rows = len(getattr(snapshot, report)())
+                print(f"{report:>28} {rows:>10,} {sql_s * 1000:>10.1f} {snapshot_s * 1000:>12.1f} "
+                      f"{sql_s / snapshot_s:>7.1f}x")
+
+            random_changes(conn, CHANGES)
+            start = time.perf_counter()
+            kind = snapshot.refresh(conn)
+            print(f"{kind} refresh after {CHANGES:,} changes: {time.perf_counter() - start:.2f} s")
+            mismatched = check_snapshot(path, snapshot)
+            assert not mismatched, f"result mismatch after refresh: {mismatched}"
+            conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_TIERS)
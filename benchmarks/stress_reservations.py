@@ -0,0 +1,117 @@
+"""Concurrent claimers vs reservations.reserve_claim.
+
+Run from the repository root:
+    python -m benchmarks.stress_reservations                # 8 processes x 4 threads, 10 listings of 200 units
+    python -m benchmarks.stress_reservations 16 8 5 1000    # processes, threads, listings, units per listing
+
+Every claimer thread reserves 1-3 units of a random hot listing until all
+of them are gone. Processes share one WAL database file, as separate app or
+API workers would. Afterwards the claims are counted against the listings:
+the run fails (exit 1) if any listing is reserved beyond its quantity, if a
+unit was lost, or if food_stock disagrees with a recompute.
+"""
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import reservations
+from db_pool import get_pool
+from migrations import migrate
+from benchmarks.synthetic import build_database
+
+MAX_UNITS = 3
+
+
+def claimer(path, food_ids, seconds):
+    """Reserve until every listing is exhausted; append (units reserved, latency) per success"""
+    most = {food_id: MAX_UNITS for food_id in food_ids}
+    rng = random.Random()
+    while most:
+        food_id = rng.choice(list(most))
+        quantity = rng.randint(1, most[food_id])
+        start = time.perf_counter()
+        try:
+            reservations.reserve_claim(food_id, 1, quantity, db_path=path)
+        except reservations.NotAvailable:
+            # Fewer than quantity left: only ask for less from now on
+            most[food_id] = quantity - 1
+            if not most[food_id]:
+                del most[food_id]
+            continue
+        except reservations.ReservationConflict:
+            continue
+        seconds.append((quantity, time.perf_counter() - start))
+
+
+def worker(args):
+    """Run threads claimers; return (samples, counters, start, end) with wall-clock times"""
+    path, food_ids, threads = args
+    seconds = []
+    start = time.time()
+    claimers = [threading.Thread(target=claimer, args=(path, food_ids, seconds)) for _ in range(threads)]
+    for thread in claimers:
+        thread.start()
+    for thread in claimers:
+        thread.join()
+    end = time.time()
+    get_pool(path).close()
+    return seconds, reservations.metrics(), start, end
+
+
+def main(processes=8, threads=4, listings=10, units=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reservations.db")
+        build_database(path, 10_000)
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        food_ids = [row[0] for row in conn.execute("SELECT Food_ID FROM food_listings ORDER BY Food_ID LIMIT ?",
+                                                   (listings,))]
+        conn.executemany("UPDATE food_listings SET Quantity = ? WHERE Food_ID = ?",
+                         [(units, food_id) for food_id in food_ids])
+        conn.commit()
+
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            results = pool.map(worker, [(path, food_ids, threads)] * processes)
+        # From the first claimer starting to the last one finishing (process start-up excluded)
+        elapsed = max(end for *_, end in results) - min(start for *_, start, _ in results)
+
+        samples = [sample for seconds, *_ in results for sample in seconds]
+        counts = {name: sum(result[1][name] for result in results) for name in results[0][1]}
+        latencies = sorted(latency for _, latency in samples)
+        print(f"{processes} processes x {threads} threads, {listings} listings x {units} units")
+        print(f"  {counts['reserved']:,} reservations in {elapsed:.2f}s: {counts['reserved'] / elapsed:,.0f}/s, "
+              f"{counts['conflicts']:,} version conflicts retried, {counts['gave_up']} gave up")
+        print(f"  latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+        held = dict(conn.execute(f"""
+            SELECT c.Food_ID, SUM(r.Quantity) FROM claims c JOIN claim_reservations r ON r.Claim_ID = c.Claim_ID
+            WHERE c.Food_ID IN ({', '.join('?' * len(food_ids))}) GROUP BY c.Food_ID""", food_ids))
+        missing, unexpected = reservations.check_stock(conn)
+        conn.close()
+        over = {food_id: units_held for food_id, units_held in held.items() if units_held > units}
+        reserved = sum(quantity for quantity, _ in samples)
+        print(f"  {sum(held.values()):,} of {listings * units:,} units reserved in the database, "
+              f"{reserved:,} reported by the claimers")
+        failures = []
+        if over:
+            failures.append(f"{len(over)} listing(s) reserved beyond their quantity: {over}")
+        if sum(held.values()) != listings * units or reserved != listings * units:
+            failures.append("reserved units do not add up to the listings' quantity")
+        if missing or unexpected:
+            failures.append(f"food_stock differs from a recompute in {len(missing) + len(unexpected)} row(s)")
+        for failure in failures:
+            print(f"  FAIL: {failure}")
+        if failures:
+            sys.exit(1)
+        print("  ok: no listing overallocated, every unit reserved exactly once")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
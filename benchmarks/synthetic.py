@@ -0,0 +1,57 @@
+import sqlite3
+
+FOOD_NAMES = '["Bread","Chicken","Dairy","Fish","Fruits","Pasta","Rice","Salad","Soup","Vegetables"]'
+PROVIDER_TYPES = '["Catering Service","Grocery Store","Restaurant","Supermarket"]'
+RECEIVER_TYPES = '["Charity","Individual","NGO","Shelter"]'
+FOOD_TYPES = '["Non-Vegetarian","Vegan","Vegetarian"]'
+MEAL_TYPES = '["Breakfast","Dinner","Lunch","Snacks"]'
+STATUSES = '["Cancelled","Claimed","Completed","Pending"]'
+
+SCHEMA = [
+    '''CREATE TABLE providers (
+        Provider_ID INTEGER PRIMARY KEY, Name TEXT, Type TEXT, Address TEXT, City TEXT, Contact TEXT)''',
+    '''CREATE TABLE receivers (
+        Receiver_ID INTEGER PRIMARY KEY, Name TEXT, Type TEXT, City TEXT, Contact TEXT)''',
+    '''CREATE TABLE food_listings (
+        Food_ID INTEGER PRIMARY KEY, Food_Name TEXT, Quantity INTEGER, Expiry_Date DATE,
+        Provider_ID INTEGER, Provider_Type TEXT, Location TEXT, Food_Type TEXT, Meal_Type TEXT)''',
+    '''CREATE TABLE claims (
+        Claim_ID INTEGER PRIMARY KEY, Food_ID INTEGER, Receiver_ID INTEGER, Status TEXT, Timestamp DATETIME)''',
+]
+
+
+def _pick(choices):
+    return f"json_extract('{choices}', '$[' || (abs(random()) % json_array_length('{choices}')) || ']')"
+
+
+def build_database(path, n_listings):
+    """Create a database at path with n_listings food listings and proportional other tables"""
+    n_entities = max(n_listings // 10, 10)
+    n_cities = max(n_entities // 10, 5)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+
+    seq = "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < ?) "
+    conn.execute(seq + f"""
+        INSERT INTO providers
+        SELECT i, 'Provider ' || i, {_pick(PROVIDER_TYPES)}, i || ' Main St',
+               'City ' || (abs(random()) % {n_cities}), '+1-555-0100' FROM seq""", (n_entities,))
+    conn.execute(seq + f"""
+        INSERT INTO receivers
+        SELECT i, 'Receiver ' || i, {_pick(RECEIVER_TYPES)},
+               'City ' || (abs(random()) % {n_cities}), '+1-555-0199' FROM seq""", (n_entities,))
+    conn.execute(seq + f"""
+        INSERT INTO food_listings
+        SELECT i, {_pick(FOOD_NAMES)}, 1 + abs(random()) % 50,
+               date('now', ((abs(random()) % 30) - 10) || ' days'),
+               1 + abs(random()) % {n_entities}, {_pick(PROVIDER_TYPES)}, 'City ' || (abs(random()) % {n_cities}),
+               {_pick(FOOD_TYPES)}, {_pick(MEAL_TYPES)} FROM seq""", (n_listings,))
+    conn.execute(seq + f"""
+        INSERT INTO claims
+        SELECT i, 1 + abs(random()) % {n_listings}, 1 + abs(random()) % {n_entities}, {_pick(STATUSES)},
+               datetime('now', '-' || (abs(random()) % 720) || ' hours') FROM seq""", (n_listings,))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,114 @@
+"""One-time database setup for the Streamlit app.
+
+Streamlit executes app.py on every interaction, but imported modules stay
+loaded for the life of the worker process. ensure_database therefore runs
+the schema check, the first-run CSV load, the migrations, the change
+log compaction and placing new cities in the gazetteer once per process and
+database; later calls are a set lookup. sync_csv applies CSV edits and is
+called once per browser session.
+"""
+import threading
+
+import changelog
+import gazetteer
+from db_pool import DEFAULT_DB_PATH, get_pool
+from ingest import ingest, SOURCES
+from migrations import migrate
+from query_cache import get_cache
+from sync import sync_all
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS providers (
+        Provider_ID INTEGER PRIMARY KEY,
+        Name TEXT,
+        Type TEXT,
+        Address TEXT,
+        City TEXT,
+        Contact TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS receivers (
+        Receiver_ID INTEGER PRIMARY KEY,
+        Name TEXT,
+        Type TEXT,
+        City TEXT,
+        Contact TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS food_listings (
+        Food_ID INTEGER PRIMARY KEY,
+        Food_Name TEXT,
+        Quantity INTEGER,
+        Expiry_Date DATE,
+        Provider_ID INTEGER,
+        Provider_Type TEXT,
+        Location TEXT,
+        Food_Type TEXT,
+        Meal_Type TEXT,
+        FOREIGN KEY (Provider_ID) REFERENCES providers(Provider_ID)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS claims (
+        Claim_ID INTEGER PRIMARY KEY,
+        Food_ID INTEGER,
+        Receiver_ID INTEGER,
+        Status TEXT,
+        Timestamp DATETIME,
+        FOREIGN KEY (Food_ID) REFERENCES food_listings(Food_ID),
+        FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID)
+    )
+    ''',
+]
+
+_ready = set()
+_lock = threading.Lock()
+
+
+def _init_db(conn):
+    cursor = conn.cursor()
+    for ddl in SCHEMA:
+        cursor.execute(ddl)
+
+    # Stream CSV data into any empty tables (rebuilds indexes and summary tables)
+    empty = [(table, filename) for table, filename in SOURCES
+             if not cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]]
+    if empty:
+        ingest(conn, empty)
+        sync_all(conn, empty, baseline=True, report=lambda message: None)
+
+    # Bring indexes and derived tables up to the current schema version
+    migrate(conn)
+    changelog.compact(conn)
+    # Cities written by anything other than crud since the last start
+    gazetteer.resolve(conn)
+
+
+def ensure_database(db_path=DEFAULT_DB_PATH):
+    """Create, load and migrate db_path the first time this process asks; return True if it ran"""
+    if db_path in _ready:
+        return False
+    with _lock:
+        if db_path in _ready:
+            return False
+        with get_pool(db_path).connection() as conn:
+            _init_db(conn)
+        _ready.add(db_path)
+        return True
+
+
+def sync_csv(db_path=DEFAULT_DB_PATH):
+    """Apply rows added, changed or removed in the CSV files since the last sync.
+
+    A stat() per file when nothing changed. Returns the tables that changed.
+    """
+    with get_pool(db_path).connection() as conn:
+        changed = [result for result in sync_all(conn, report=lambda message: None) if result.changed]
+        if changed:
+            gazetteer.resolve(conn)
+    if changed:
+        get_cache(db_path).invalidate(*[result.table for result in changed])
+    return [result.table for result in changed]
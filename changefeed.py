@@ -0,0 +1,148 @@
+"""Change batches from the row change log, for consumers that apply deltas.
+
+read_batch(conn, after) turns the change_log entries (changelog.py) after a
+cursor into, per table, the rows to upsert and the IDs to delete, plus the
+cursor to pass next time. Rows are read as they are now, so several changes
+to one row arrive as one upsert or one delete, and applying a batch twice is
+harmless. A reset batch (the log was re-installed after a bulk load, or
+trimmed past the cursor) carries no rows: reload the tables, then carry on
+from its cursor.
+
+- subscribe() yields batches as they are committed, by any connection or
+  process, waiting on PRAGMA data_version in between.
+- api_server.py serves the same batches at GET /changes, as a long poll.
+- TableWatcher only reports which tables changed. data_layer uses it to drop
+  the shared results another process's writes made stale, instead of
+  waiting out the cache TTL.
+
+    python changefeed.py [database] [--after SEQ]   # print batches as they are committed
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from changelog import LOGGED_TABLES, changes_since, last_seq
+from db_pool import DEFAULT_DB_PATH, get_pool
+from profiler import read_frame
+
+BATCH_ENTRIES = 10_000
+POLL_SECONDS = 0.5
+ID_BATCH = 500
+
+
+def _rows(conn, table, ids):
+    """Current rows of table whose primary key is in ids"""
+    pk = LOGGED_TABLES[table]
+    frames = []
+    for start in range(0, len(ids), ID_BATCH):
+        batch = ids[start:start + ID_BATCH]
+        frames.append(read_frame(conn, f"SELECT * FROM {table} WHERE {pk} IN ({', '.join('?' * len(batch))})",
+                                 batch))
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def read_batch(conn, after, limit=BATCH_ENTRIES):
+    """Changes in up to limit log entries after cursor after.
+
+    Returns {"cursor": Seq to read after next, "reset": bool, "changes":
+    {table: {"upserts": DataFrame of current rows, "deletes": [IDs]}}} with
+    only the tables that changed.
+    """
+    began = not conn.in_transaction
+    if began:
+        # The log and the rows it points at are read from one snapshot
+        conn.execute("BEGIN")
+    try:
+        reset, changed, cursor = changes_since(conn, after, limit)
+        changes = {}
+        if not reset:
+            for table, ids in changed.items():
+                if not ids:
+                    continue
+                upserts = _rows(conn, table, sorted(ids))
+                found = set(upserts[LOGGED_TABLES[table]].tolist())
+                changes[table] = {"upserts": upserts, "deletes": sorted(ids - found)}
+    finally:
+        if began:
+            conn.commit()
+    return {"cursor": cursor, "reset": reset, "changes": changes}
+
+
+def subscribe(db_path=DEFAULT_DB_PATH, after=None, limit=BATCH_ENTRIES, poll=POLL_SECONDS, timeout=None):
+    """Yield change batches after cursor after as they are committed; None starts at the end of the log.
+
+    Checks for commits every poll seconds; with a timeout, returns after that
+    many seconds without a change.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        if after is None:
+            after = last_seq(conn)
+        version = None
+        idle_since = time.monotonic()
+        while True:
+            current = conn.execute("PRAGMA data_version").fetchone()[0]
+            if current != version:
+                version = current
+                while True:
+                    batch = read_batch(conn, after, limit)
+                    if batch["cursor"] == after:
+                        break
+                    after = batch["cursor"]
+                    idle_since = time.monotonic()
+                    yield batch
+            elif timeout is not None and time.monotonic() - idle_since >= timeout:
+                return
+            else:
+                time.sleep(poll)
+    finally:
+        conn.close()
+
+
+class TableWatcher:
+    """Which logged tables changed since the last poll, by any connection or process"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.seq = None
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Tables changed since the previous call (all of them after a reset); none on the first call"""
+        with self._lock, get_pool(self.db_path).connection() as conn:
+            last = last_seq(conn)
+            if self.seq is None or last == self.seq:
+                self.seq = last
+                return []
+            names = {name for (name,) in conn.execute(
+                "SELECT DISTINCT Table_Name FROM change_log WHERE Seq > ? AND Seq <= ?", (self.seq, last))}
+            self.seq = last
+        # RESET and TRIMMED entries are logged for table '*'
+        return list(LOGGED_TABLES) if "*" in names else sorted(names & set(LOGGED_TABLES))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print change batches as they are committed")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--after", type=int, help="cursor to start after (default: the end of the log)")
+    args = parser.parse_args(argv)
+
+    try:
+        for batch in subscribe(args.database, args.after):
+            if batch["reset"]:
+                print(f"Seq {batch['cursor']}: reset, reload every table")
+                continue
+            summary = ", ".join(f"{table} {len(change['upserts'])} upserted, {len(change['deletes'])} deleted"
+                                for table, change in batch["changes"].items())
+            print(f"Seq {batch['cursor']}: {summary}")
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
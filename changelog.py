@@ -0,0 +1,159 @@
+"""Row-level change log of the four base tables.
+
+Triggers append one (Table_Name, Row_ID, Op) row to change_log for every
+inserted, updated or deleted row. An update that changes a primary key
+logs both the old and the new ID. Seq only ever grows, so a consumer
+remembers the last Seq it applied and reads the entries after it.
+
+Bulk loads (ingest.py) drop these triggers and do not log row by row.
+Re-installing the log (as the migrations do after a load) appends a
+RESET entry, which tells consumers to rebuild from scratch.
+
+compact() keeps the log small. Only the newest entry per row is kept, which
+loses nothing: consumers re-read the rows whose IDs changed. Entries older
+than RETENTION_DAYS, or past the newest MAX_ENTRIES, are deleted and a
+TRIMMED entry takes the last deleted Seq, so a consumer whose Seq is behind
+it rebuilds as after a RESET. changefeed.py reads the log as change batches.
+
+    python changelog.py [database] [--compact]   # entries per table and op; --compact first
+"""
+import argparse
+import sqlite3
+import sys
+
+RESET = "RESET"
+TRIMMED = "TRIMMED"
+
+RETENTION_DAYS = 7
+MAX_ENTRIES = 1_000_000
+
+LOG_DDL = """CREATE TABLE IF NOT EXISTS change_log (
+    Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    Table_Name TEXT NOT NULL,
+    Row_ID INTEGER,
+    Op TEXT NOT NULL,
+    Changed_At TEXT NOT NULL DEFAULT (datetime('now'))
+)"""
+
+# table -> primary key
+LOGGED_TABLES = {
+    "providers": "Provider_ID",
+    "receivers": "Receiver_ID",
+    "food_listings": "Food_ID",
+    "claims": "Claim_ID",
+}
+
+
+def _triggers():
+    triggers = {}
+    for table, pk in LOGGED_TABLES.items():
+        log = f"INSERT INTO change_log (Table_Name, Row_ID, Op) VALUES ('{table}', {{row}}.{pk}, '{{op}}');"
+        triggers[f"trg_log_{table}_insert"] = (
+            f"AFTER INSERT ON {table} BEGIN {log.format(row='NEW', op='INSERT')} END")
+        triggers[f"trg_log_{table}_delete"] = (
+            f"AFTER DELETE ON {table} BEGIN {log.format(row='OLD', op='DELETE')} END")
+        triggers[f"trg_log_{table}_update"] = (
+            f"AFTER UPDATE ON {table} BEGIN {log.format(row='NEW', op='UPDATE')} "
+            f"INSERT INTO change_log (Table_Name, Row_ID, Op) SELECT '{table}', OLD.{pk}, 'DELETE' "
+            f"WHERE OLD.{pk} IS NOT NEW.{pk}; END")
+    return triggers
+
+
+TRIGGERS = _triggers()
+
+
+def create_tables(cursor):
+    cursor.execute(LOG_DDL)
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def install(cursor):
+    """Migration step: create the log and its triggers. Anything logged before
+    this point may be incomplete, so consumers are told to rebuild."""
+    create_tables(cursor)
+    create_triggers(cursor)
+    cursor.execute("INSERT INTO change_log (Table_Name, Op) VALUES ('*', ?)", (RESET,))
+
+
+def last_seq(conn):
+    """Highest Seq in the log (0 when empty or not installed)"""
+    try:
+        return conn.execute("SELECT IFNULL(MAX(Seq), 0) FROM change_log").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def changes_since(conn, seq, limit=None):
+    """Return (reset, {table: set of row IDs}, new last Seq) for entries after seq (at most limit of them).
+
+    reset is set when the log was re-installed or trimmed past seq: the
+    consumer missed changes and must rebuild.
+    """
+    reset, changed, last = False, {table: set() for table in LOGGED_TABLES}, seq
+    rows = conn.execute("SELECT Seq, Table_Name, Row_ID, Op FROM change_log WHERE Seq > ? ORDER BY Seq LIMIT ?",
+                        (seq, -1 if limit is None else limit))
+    for entry_seq, table, row_id, op in rows:
+        last = entry_seq
+        if op in (RESET, TRIMMED):
+            reset = True
+        elif table in changed and row_id is not None:
+            changed[table].add(row_id)
+    return reset, changed, last
+
+
+def compact(conn, retention_days=RETENTION_DAYS, max_entries=MAX_ENTRIES):
+    """Merge the entries of each row and trim the log to its retention; return (merged, trimmed).
+
+    The newest entry is always kept, so last_seq never goes back.
+    """
+    merged = conn.execute("DELETE FROM change_log WHERE Seq NOT IN "
+                          "(SELECT MAX(Seq) FROM change_log GROUP BY Table_Name, Row_ID)").rowcount
+    last = last_seq(conn)
+    # Seq only grows with Changed_At, so the scan stops at the first entry inside the retention
+    row = conn.execute("SELECT Seq FROM change_log WHERE Changed_At >= datetime('now', ?) ORDER BY Seq LIMIT 1",
+                       (f"-{retention_days} days",)).fetchone()
+    keep_from = row[0] if row else last
+    row = conn.execute("SELECT Seq FROM change_log ORDER BY Seq DESC LIMIT 1 OFFSET ?",
+                       (max(max_entries, 1) - 1,)).fetchone()
+    if row:
+        keep_from = max(keep_from, row[0])
+    keep_from = min(keep_from, last)
+    trimmed = conn.execute("DELETE FROM change_log WHERE Seq < ? AND Op != ?", (keep_from, TRIMMED)).rowcount
+    if trimmed:
+        # One TRIMMED entry, just below the oldest entry kept
+        conn.execute("DELETE FROM change_log WHERE Seq < ?", (keep_from,))
+        conn.execute("INSERT INTO change_log (Seq, Table_Name, Op) VALUES (?, '*', ?)", (keep_from - 1, TRIMMED))
+    conn.commit()
+    return merged, trimmed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize (and compact) the row change log")
+    parser.add_argument("database", nargs="?", default="food_waste.db")
+    parser.add_argument("--compact", action="store_true",
+                        help=f"merge each row's entries and trim to {RETENTION_DAYS} days / {MAX_ENTRIES:,} entries")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.database)
+    if args.compact:
+        merged, trimmed = compact(conn)
+        print(f"Merged {merged:,} and trimmed {trimmed:,} entries")
+    for table, op, count in conn.execute(
+            "SELECT Table_Name, Op, COUNT(*) FROM change_log GROUP BY 1, 2 ORDER BY 1, 2"):
+        print(f"{table:>14} {op:>7} {count:>10,}")
+    print(f"Last Seq: {last_seq(conn)}")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import sys
+import sqlite3
+import inspect
+import re
+
+from db_queries import DatabaseManager
+from migrations import migrate
+from pagination import ENTITIES, build_page_query, not_null_columns
+from expiry import expiring_within_query, expired_query
+
+# Queries that return every row of a table (or anti-join against all of it);
+# a scan is the correct plan for these.
+FULL_SCAN_EXPECTED = {
+    "get_all_food_listings",
+    "get_food_with_provider_details",
+    "get_claims_full_details",
+    "get_unclaimed_food",
+}
+
+# Sample arguments for query method parameters
+SAMPLE_ARGS = {
+    "city": "New Jessica",
+    "food_type": "Vegetarian",
+    "meal_type": "Dinner",
+    "provider_type": "Restaurant",
+    "status": "Pending",
+    "limit": 10,
+    "days": 3,
+}
+
+# A bare "SCAN t" (no "USING [COVERING] INDEX") is a full table scan
+FULL_SCAN = re.compile(r"SCAN \w+")
+
+
+class _CapturingManager(DatabaseManager):
+    """DatabaseManager that records SQL instead of running it"""
+
+    def __init__(self):
+        self.captured = []
+        self.snapshot = None
+
+    def execute_query(self, query, params=None, schema=None, analytical=False):
+        self.captured.append((query, params or (), schema))
+
+
+def collect_queries():
+    manager = _CapturingManager()
+    queries = {}
+    for name, method in inspect.getmembers(DatabaseManager, inspect.isfunction):
+        if not name.startswith("get_") or name == "get_connection":
+            continue
+        params = list(inspect.signature(method).parameters)[1:]
+        manager.captured = []
+        getattr(manager, name)(*[SAMPLE_ARGS[p] for p in params])
+        queries[name] = manager.captured
+    return queries
+
+
+def collect_page_queries(conn):
+    """One keyset page query per table, sort column and direction, past a cursor"""
+    queries = {}
+    for table, (pk, sortable, _) in ENTITIES.items():
+        not_null = not_null_columns(conn, table)
+        for sort in sortable:
+            for descending in (False, True):
+                name = f"page {table} by {sort} {'desc' if descending else 'asc'}"
+                after = (1, 1) if sort == pk else ("m", 1)
+                queries[name] = [build_page_query(table, sort, descending, after=after, not_null=not_null)]
+    return queries
+
+
+def collect_expiry_queries():
+    return {
+        "expiring_within": [expiring_within_query(3)],
+        "expiring_within city": [expiring_within_query(3, SAMPLE_ARGS["city"])],
+        "expired": [expired_query()],
+    }
+
+
+def full_scans(conn, query, params):
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    # Scans of materialized subqueries read a temp result, not a table
+    derived = {line.split()[-1] for line in plan if line.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+    return [line for line in plan if FULL_SCAN.fullmatch(line) and line.split()[-1] not in derived]
+
+
+def check_query_plans(db_path='food_waste.db'):
+    """Return {method: [plan lines]} for every query method that does a full table scan"""
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    failures = {}
+    queries = collect_queries()
+    queries.update(collect_page_queries(conn))
+    queries.update(collect_expiry_queries())
+    for name, statements in sorted(queries.items()):
+        scans = [line for query, params, *_ in statements for line in full_scans(conn, query, params)]
+        if scans and name not in FULL_SCAN_EXPECTED:
+            failures[name] = scans
+        status = "FAIL" if name in failures else "ok"
+        print(f"{status:>4}  {name}" + (f"  ({'; '.join(scans)})" if scans else ""))
+    conn.close()
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_query_plans(sys.argv[1] if len(sys.argv) > 1 else 'food_waste.db')
+    if failures:
+        print(f"\n{len(failures)} query method(s) fall back to a full table scan")
+        sys.exit(1)
+    print("\nNo unexpected full table scans")
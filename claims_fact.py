@@ -0,0 +1,210 @@
+"""Denormalized claims fact table with integer-coded categorical columns.
+
+claims_fact holds one row per claim with its listing, provider and receiver
+columns copied in, so the claim reports read a single table instead of
+joining four. Status, Food_Type, Meal_Type, Provider_Type and the two cities
+are stored as small integer codes into dim_* lookup tables (Code, Value).
+Codes are assigned on first sight and never reused, so a reader can map
+them to pandas Categoricals (dimension) without sending the strings over.
+
+A claim whose listing, provider or receiver does not exist has NULL in the
+copied columns of that side, so an inner join becomes "<side>_ID IS NOT
+NULL". Triggers on all four base tables keep the fact current; install
+backfills it.
+"""
+import sys
+import sqlite3
+
+import numpy as np
+
+from query_cache import register_derived
+
+# dim table -> base (table, column) pairs it encodes
+DIMENSIONS = {
+    "dim_status": [("claims", "Status")],
+    "dim_food_type": [("food_listings", "Food_Type")],
+    "dim_meal_type": [("food_listings", "Meal_Type")],
+    "dim_provider_type": [("food_listings", "Provider_Type")],
+    "dim_city": [("providers", "City"), ("receivers", "City")],
+}
+
+
+def _code(dim, value):
+    return f"(SELECT Code FROM {dim} WHERE Value = {value})"
+
+
+# (fact column, type, expression over claims c / food_listings f / providers p / receivers r)
+FACT_COLUMNS = [
+    ("Claim_ID", "INTEGER PRIMARY KEY", "c.Claim_ID"),
+    ("Status_Code", "INTEGER", _code("dim_status", "c.Status")),
+    ("Timestamp", "TEXT", "c.Timestamp"),
+    ("Food_ID", "INTEGER", "f.Food_ID"),
+    ("Food_Name", "TEXT", "f.Food_Name"),
+    ("Food_Type_Code", "INTEGER", _code("dim_food_type", "f.Food_Type")),
+    ("Meal_Type_Code", "INTEGER", _code("dim_meal_type", "f.Meal_Type")),
+    ("Provider_Type_Code", "INTEGER", _code("dim_provider_type", "f.Provider_Type")),
+    ("Quantity", "INTEGER", "f.Quantity"),
+    ("Expiry_Date", "TEXT", "f.Expiry_Date"),
+    ("Provider_ID", "INTEGER", "p.Provider_ID"),
+    ("Provider_Name", "TEXT", "p.Name"),
+    ("Provider_City_Code", "INTEGER", _code("dim_city", "p.City")),
+    ("Receiver_ID", "INTEGER", "r.Receiver_ID"),
+    ("Receiver_Name", "TEXT", "r.Name"),
+    ("Receiver_City_Code", "INTEGER", _code("dim_city", "r.City")),
+]
+
+# Coded fact column -> its dimension
+CODED_COLUMNS = {
+    "Status_Code": "dim_status",
+    "Food_Type_Code": "dim_food_type",
+    "Meal_Type_Code": "dim_meal_type",
+    "Provider_Type_Code": "dim_provider_type",
+    "Provider_City_Code": "dim_city",
+    "Receiver_City_Code": "dim_city",
+}
+
+FACT_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS claims_fact (
+        {', '.join(f'{name} {kind}' for name, kind, _ in FACT_COLUMNS)}
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_claims_fact_food ON claims_fact (Food_ID)",
+    "CREATE INDEX IF NOT EXISTS idx_claims_fact_food_type ON claims_fact (Food_Type_Code, Food_ID)",
+    "CREATE INDEX IF NOT EXISTS idx_claims_fact_receiver_city ON claims_fact (Receiver_City_Code, Receiver_ID)",
+]
+
+RECOMPUTE = f"""
+    SELECT {', '.join(expression for _, _, expression in FACT_COLUMNS)}
+    FROM claims c
+    LEFT JOIN food_listings f ON f.Food_ID = c.Food_ID
+    LEFT JOIN providers p ON p.Provider_ID = f.Provider_ID
+    LEFT JOIN receivers r ON r.Receiver_ID = c.Receiver_ID"""
+
+_INSERT = f"INSERT INTO claims_fact ({', '.join(name for name, _, _ in FACT_COLUMNS)})"
+
+# Trigger statements avoid OR REPLACE / OR IGNORE: in the DO UPDATE branch of
+# an upsert (sync.py) the outer statement's conflict handling overrides them.
+
+
+def _refresh(where):
+    """Re-derive the fact rows of the claims matching where (a condition on claims c)"""
+    return (f"DELETE FROM claims_fact WHERE Claim_ID IN (SELECT c.Claim_ID FROM claims c WHERE {where}); "
+            f"{_INSERT} {RECOMPUTE} WHERE {where};")
+
+
+def _add_values(table, row):
+    """Give the coded columns of one base row a code if they do not have one yet"""
+    return " ".join(f"INSERT INTO {dim} (Value) SELECT {row}.{column} WHERE {row}.{column} IS NOT NULL "
+                    f"AND NOT EXISTS (SELECT 1 FROM {dim} WHERE Value = {row}.{column});"
+                    for dim, sources in DIMENSIONS.items() for source, column in sources if source == table)
+
+
+def _update_trigger(table, watched, body):
+    changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in watched)
+    return f"AFTER UPDATE OF {', '.join(watched)} ON {table} WHEN {changed} BEGIN {body} END"
+
+
+_LISTING_CLAIMS = "c.Food_ID IN (SELECT Food_ID FROM food_listings WHERE Provider_ID IN ({ids}))"
+
+TRIGGERS = {
+    "trg_fact_claim_insert": f"AFTER INSERT ON claims BEGIN {_add_values('claims', 'NEW')} "
+                             f"{_refresh('c.Claim_ID = NEW.Claim_ID')} END",
+    "trg_fact_claim_delete": "AFTER DELETE ON claims BEGIN DELETE FROM claims_fact WHERE Claim_ID = OLD.Claim_ID; END",
+    "trg_fact_claim_update": _update_trigger(
+        "claims", ("Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"),
+        f"DELETE FROM claims_fact WHERE Claim_ID = OLD.Claim_ID; {_add_values('claims', 'NEW')} "
+        f"{_refresh('c.Claim_ID = NEW.Claim_ID')}"),
+    "trg_fact_listing_insert": f"AFTER INSERT ON food_listings BEGIN {_add_values('food_listings', 'NEW')} "
+                               f"{_refresh('c.Food_ID = NEW.Food_ID')} END",
+    "trg_fact_listing_delete": f"AFTER DELETE ON food_listings BEGIN {_refresh('c.Food_ID = OLD.Food_ID')} END",
+    "trg_fact_listing_update": _update_trigger(
+        "food_listings", ("Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+                          "Food_Type", "Meal_Type"),
+        f"{_add_values('food_listings', 'NEW')} {_refresh('c.Food_ID IN (OLD.Food_ID, NEW.Food_ID)')}"),
+    "trg_fact_provider_insert": f"AFTER INSERT ON providers BEGIN {_add_values('providers', 'NEW')} "
+                                f"{_refresh(_LISTING_CLAIMS.format(ids='NEW.Provider_ID'))} END",
+    "trg_fact_provider_delete": f"AFTER DELETE ON providers BEGIN "
+                                f"{_refresh(_LISTING_CLAIMS.format(ids='OLD.Provider_ID'))} END",
+    "trg_fact_provider_update": _update_trigger(
+        "providers", ("Provider_ID", "Name", "City"),
+        f"{_add_values('providers', 'NEW')} "
+        f"{_refresh(_LISTING_CLAIMS.format(ids='OLD.Provider_ID, NEW.Provider_ID'))}"),
+    "trg_fact_receiver_insert": f"AFTER INSERT ON receivers BEGIN {_add_values('receivers', 'NEW')} "
+                                f"{_refresh('c.Receiver_ID = NEW.Receiver_ID')} END",
+    "trg_fact_receiver_delete": f"AFTER DELETE ON receivers BEGIN {_refresh('c.Receiver_ID = OLD.Receiver_ID')} END",
+    "trg_fact_receiver_update": _update_trigger(
+        "receivers", ("Receiver_ID", "Name", "City"),
+        f"{_add_values('receivers', 'NEW')} {_refresh('c.Receiver_ID IN (OLD.Receiver_ID, NEW.Receiver_ID)')}"),
+}
+
+register_derived("claims_fact", ("claims", "food_listings", "providers", "receivers"))
+for _dim, _sources in DIMENSIONS.items():
+    register_derived(_dim, {table for table, _ in _sources})
+
+
+def create_tables(cursor):
+    for dim in DIMENSIONS:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {dim} (Code INTEGER PRIMARY KEY, Value TEXT NOT NULL UNIQUE)")
+    for ddl in FACT_DDL:
+        cursor.execute(ddl)
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_fact(cursor):
+    """Code any new dimension values, then recompute every fact row"""
+    for dim, sources in DIMENSIONS.items():
+        for table, column in sources:
+            cursor.execute(f"INSERT OR IGNORE INTO {dim} (Value) "
+                           f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL")
+    cursor.execute("DELETE FROM claims_fact")
+    cursor.execute(f"{_INSERT} {RECOMPUTE}")
+
+
+def install(cursor):
+    """Migration step: create the dimensions, fact table and triggers, then backfill"""
+    create_tables(cursor)
+    create_triggers(cursor)
+    rebuild_fact(cursor)
+
+
+def dimension(conn, dim):
+    """(positions, categories) of a dim table: positions[code] indexes categories, -1 if unknown.
+
+    Read the dimension after the fact rows: codes are never reused, so every
+    code read is then present. decoder.py maps "dim_*" columns through this.
+    """
+    rows = conn.execute(f"SELECT Code, Value FROM {dim} ORDER BY Code").fetchall()
+    codes = np.array([code for code, _ in rows], dtype=np.int64)
+    positions = np.full(int(codes.max(initial=0)) + 1, -1, dtype=np.int64)
+    positions[codes] = np.arange(len(rows))
+    return positions, [value for _, value in rows]
+
+
+def check_fact(conn):
+    """Compare claims_fact with a full recompute; return (missing, unexpected) rows"""
+    columns = ", ".join(name for name, _, _ in FACT_COLUMNS)
+    stored = set(conn.execute(f"SELECT {columns} FROM claims_fact"))
+    expected = set(conn.execute(RECOMPUTE))
+    return sorted(expected - stored, key=repr), sorted(stored - expected, key=repr)
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else 'food_waste.db')
+    missing, unexpected = check_fact(conn)
+    conn.close()
+    if missing or unexpected:
+        print(f"claims_fact: {len(missing)} row(s) missing or wrong, {len(unexpected)} stale")
+        for row in missing[:5]:
+            print(f"  expected {row}")
+        for row in unexpected[:5]:
+            print(f"  stored   {row}")
+        sys.exit(1)
+    print("claims_fact matches a full recompute")
@@ -0,0 +1,423 @@
+"""Create/read/update/delete for the four entity tables.
+
+Shared by the Streamlit pages and api_server.py. Writes go through the pooled
+connection for db_path and invalidate that database's cached query results;
+reads of entity pages and single rows go through the same cache, or through
+the cache passed in (data_layer passes a per-session one), and run on the
+in-memory replica when one is attached (replica.py). Column
+names are whitelisted in COLUMNS, and values are always bound as parameters.
+
+apply_batch (and insert_many, update_many, delete_many) writes many rows in
+one transaction, with executemany, and reports failures per row. Claim
+inserts, single or batched, reserve their units (reservations.reserve) and
+fail with NotAvailable instead of over-claiming a listing; they may carry a
+Quantity to reserve (1 by default). A write
+that brings in a new city places it in the gazetteer (gazetteer.resolve)
+before it commits, so the row is on the map and in nearby() right away.
+"""
+import sqlite3
+from itertools import groupby
+
+import gazetteer
+from db_pool import DEFAULT_DB_PATH, get_pool
+from profiler import read_frame
+from query_cache import get_cache, table_written
+from reservations import (NotAvailable, OVERDRAWN_MESSAGE, STATEMENTS as RESERVATION_STATEMENTS, reserve,
+                          reserve_claim)
+from search import search_query, suggest_query
+from pagination import ENTITIES, DEFAULT_PAGE_SIZE, build_page_query, split_page, lookup_query, not_null_columns
+
+# table -> writable columns (everything but the primary key)
+COLUMNS = {
+    "providers": ("Name", "Type", "Address", "City", "Contact"),
+    "receivers": ("Name", "Type", "City", "Contact"),
+    "food_listings": ("Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+                      "Location", "Food_Type", "Meal_Type"),
+    "claims": ("Food_ID", "Receiver_ID", "Status", "Timestamp"),
+}
+
+
+# Claim inserts may also say how many units to reserve
+RESERVED = "Quantity"
+
+
+def _claim_values(values):
+    """(claim columns, units to reserve) of a claim insert"""
+    values = dict(values)
+    quantity = values.pop(RESERVED, 1)
+    missing = [column for column in ("Food_ID", "Receiver_ID") if values.get(column) is None]
+    if missing:
+        raise ValueError(f"a claim needs {' and '.join(missing)}")
+    return values, quantity
+
+
+def _check(table, values=()):
+    if table not in COLUMNS:
+        raise ValueError(f"Unknown table {table!r}")
+    unknown = [column for column in values if column not in COLUMNS[table]]
+    if unknown:
+        raise ValueError(f"{unknown} are not writable columns of {table}")
+
+
+# Low-level helpers
+def read_sql(query, params=None, db_path=DEFAULT_DB_PATH, cache=None):
+    def load():
+        with get_pool(db_path).read_connection() as conn:
+            return read_frame(conn, query, params)
+    return (cache if cache is not None else get_cache(db_path)).get_or_load(query, params, load)
+
+
+def _place_new_names(conn, queries):
+    if any(table_written(query) in gazetteer.PLACE_COLUMNS for query in queries):
+        gazetteer.resolve(conn)
+
+
+def execute_write(query, params, db_path=DEFAULT_DB_PATH):
+    """Run one write statement; return the cursor (lastrowid, rowcount)"""
+    with get_pool(db_path).connection() as conn:
+        cursor = conn.execute(query, params)
+        _place_new_names(conn, [query])
+    get_cache(db_path).invalidate_for(query)
+    return cursor
+
+
+def execute_many(query, rows, db_path=DEFAULT_DB_PATH):
+    with get_pool(db_path).connection() as conn:
+        cursor = conn.executemany(query, rows)
+        _place_new_names(conn, [query])
+    get_cache(db_path).invalidate_for(query)
+    return cursor
+
+
+# Generic entity operations
+def _insert_sql(table, columns):
+    if not columns:
+        return f"INSERT INTO {table} DEFAULT VALUES"
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def _update_sql(table, columns):
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE {table} SET {assignments} WHERE {ENTITIES[table][0]} = ?"
+
+
+def _delete_sql(table):
+    return f"DELETE FROM {table} WHERE {ENTITIES[table][0]} = ?"
+
+
+def insert(table, values, db_path=DEFAULT_DB_PATH):
+    """Insert a row from a {column: value} mapping; return its primary key"""
+    if table == "claims":
+        values, quantity = _claim_values(values)
+        _check(table, values)
+        return reserve_claim(values["Food_ID"], values["Receiver_ID"], quantity, values.get("Status", "Pending"),
+                             values.get("Timestamp"), db_path)
+    _check(table, values)
+    columns = list(values)
+    return execute_write(_insert_sql(table, columns), [values[column] for column in columns], db_path).lastrowid
+
+
+def update(table, row_id, values, db_path=DEFAULT_DB_PATH):
+    """Set the given columns of one row; return True if the row exists"""
+    _check(table, values)
+    if not values:
+        return get_by_id(table, row_id, db_path) is not None
+    return execute_write(_update_sql(table, list(values)), [*values.values(), row_id], db_path).rowcount > 0
+
+
+def delete(table, row_id, db_path=DEFAULT_DB_PATH):
+    """Delete one row; return True if it existed"""
+    _check(table)
+    return execute_write(_delete_sql(table), (row_id,), db_path).rowcount > 0
+
+
+# Batch operations. A batch is one transaction. Its rows are grouped into runs
+# of the same statement and each run is one executemany. A row SQLite rejects
+# only undoes its own statement, so the error is recorded against that row
+# and the run resumes after it. atomic=True then rolls the whole batch back;
+# with atomic=False the rows that succeeded are kept. No savepoint is held
+# while the rows run (with temp_store=MEMORY the savepoint journal made
+# trigger-heavy runs several times slower), except when the caller already
+# has a transaction open.
+
+# Errors caused by one row's values (not by the connection or the database)
+_ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError, OverflowError)
+# Row IDs per existence check (bound parameters per statement)
+ID_CHUNK = 500
+# Plan step "statement" of a claim insert, run by _reserve_run instead of executemany
+_RESERVE = "reserve"
+
+
+def _error(op, index, message):
+    return {"op": op, "index": index, "error": str(message)}
+
+
+def _plan(table, inserts, updates, deletes):
+    """Return ([(op, index, sql, params, row_id)], validation errors) for a batch"""
+    pk = ENTITIES[table][0]
+    plan, errors = [], []
+    for index, record in enumerate(inserts):
+        try:
+            if not isinstance(record, dict):
+                raise TypeError("an insert must be a {column: value} object")
+            if table == "claims":
+                record, quantity = _claim_values(record)
+                _check(table, record)
+                plan.append(("insert", index, _RESERVE, (record, quantity), None))
+                continue
+            _check(table, record)
+            plan.append(("insert", index, _insert_sql(table, list(record)), list(record.values()), None))
+        except (TypeError, ValueError) as e:
+            errors.append(_error("insert", index, e))
+    for index, record in enumerate(updates):
+        try:
+            if not isinstance(record, dict) or pk not in record:
+                raise TypeError(f"an update must be an object with {pk} and the columns to set")
+            values = {column: value for column, value in record.items() if column != pk}
+            if not values:
+                raise ValueError("no columns to update")
+            _check(table, values)
+            row_id = int(record[pk])
+            plan.append(("update", index, _update_sql(table, list(values)), [*values.values(), row_id], row_id))
+        except (TypeError, ValueError) as e:
+            errors.append(_error("update", index, e))
+    deleted = set()
+    for index, row_id in enumerate(deletes):
+        try:
+            row_id = int(row_id)
+        except (TypeError, ValueError) as e:
+            errors.append(_error("delete", index, f"invalid row ID: {e}"))
+            continue
+        if row_id in deleted:
+            errors.append(_error("delete", index, f"{table} row {row_id} is deleted twice"))
+            continue
+        deleted.add(row_id)
+        plan.append(("delete", index, _delete_sql(table), (row_id,), row_id))
+    return plan, errors
+
+
+def _existing_ids(conn, table, row_ids):
+    pk = ENTITIES[table][0]
+    row_ids = list(set(row_ids))
+    found = set()
+    for start in range(0, len(row_ids), ID_CHUNK):
+        chunk = row_ids[start:start + ID_CHUNK]
+        found.update(row[0] for row in conn.execute(
+            f"SELECT {pk} FROM {table} WHERE {pk} IN ({', '.join('?' * len(chunk))})", chunk))
+    return found
+
+
+def _apply_run(conn, op, sql, run, ids, errors):
+    """executemany one run of (index, params), resuming after each rejected row; return rows written"""
+    written, start = 0, 0
+    while start < len(run):
+        current = start
+
+        def params():
+            # executemany binds and runs one row before asking for the next
+            nonlocal current
+            for current in range(start, len(run)):
+                yield run[current][1]
+
+        try:
+            conn.executemany(sql, params())
+            end, failure = len(run), None
+        except _ROW_ERRORS as e:
+            end, failure = current, e
+        written += end - start
+        if op == "insert" and end > start:
+            # Rowids of one executemany's inserts are consecutive
+            last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            for offset in range(start, end):
+                ids[run[offset][0]] = last - (end - 1 - offset)
+        if failure is not None:
+            errors.append(_error(op, run[end][0], failure))
+            end += 1
+        start = end
+    return written
+
+
+def _reserve_run(conn, run, ids, errors):
+    """Reserve each claim of a run of (index, (values, quantity)); return claims written"""
+    written = 0
+    for index, (values, quantity) in run:
+        try:
+            ids[index] = reserve(conn, values["Food_ID"], values["Receiver_ID"], quantity,
+                                 values.get("Status", "Pending"), values.get("Timestamp"))
+            written += 1
+        except (NotAvailable, ValueError, TypeError, *_ROW_ERRORS) as e:
+            errors.append(_error("insert", index, e))
+    return written
+
+
+def apply_batch(table, inserts=(), updates=(), deletes=(), atomic=True, db_path=DEFAULT_DB_PATH):
+    """Insert, update and delete many rows of table in one transaction.
+
+    inserts are {column: value} objects, updates are objects with the
+    primary key and the columns to set, deletes are primary keys. They are
+    applied in that order. Returns {"applied": rows written, "ids": primary
+    keys of the inserts (None where one failed), "errors": [{"op", "index",
+    "error"}]}; with atomic=True nothing is written if any row fails.
+    """
+    _check(table)
+    inserts, updates, deletes = list(inserts), list(updates), list(deletes)
+    plan, errors = _plan(table, inserts, updates, deletes)
+    ids = [None] * len(inserts)
+    written, statements = 0, set()
+    with get_pool(db_path).connection() as conn:
+        nested = conn.in_transaction
+        conn.execute("SAVEPOINT batch" if nested else "BEGIN IMMEDIATE")
+        existing = _existing_ids(conn, table, [row_id for *_, row_id in plan if row_id is not None])
+        for op, index, _, _, row_id in plan:
+            if row_id is not None and row_id not in existing:
+                errors.append(_error(op, index, f"no {table} row {row_id}"))
+        plan = [step for step in plan if step[4] is None or step[4] in existing]
+        # Run every valid row even when the batch is already failing, so all bad rows are reported
+        for (op, sql), steps in groupby(plan, key=lambda step: (step[0], step[2])):
+            run = [(index, params) for _, index, _, params, _ in steps]
+            if sql == _RESERVE:
+                written += _reserve_run(conn, run, ids, errors)
+                statements.update(RESERVATION_STATEMENTS)
+                continue
+            written += _apply_run(conn, op, sql, run, ids, errors)
+            statements.add(sql)
+        if atomic and errors:
+            conn.execute("ROLLBACK TO batch" if nested else "ROLLBACK")
+            written, ids, statements = 0, [None] * len(inserts), set()
+        _place_new_names(conn, statements)
+        if nested:
+            conn.execute("RELEASE batch")
+    for sql in statements:
+        get_cache(db_path).invalidate_for(sql)
+    order = {"insert": 0, "update": 1, "delete": 2}
+    errors.sort(key=lambda error: (order[error["op"]], error["index"]))
+    return {"applied": written, "ids": ids, "errors": errors}
+
+
+def insert_many(table, records, atomic=True, db_path=DEFAULT_DB_PATH):
+    return apply_batch(table, inserts=records, atomic=atomic, db_path=db_path)
+
+
+def update_many(table, records, atomic=True, db_path=DEFAULT_DB_PATH):
+    return apply_batch(table, updates=records, atomic=atomic, db_path=db_path)
+
+
+def delete_many(table, row_ids, atomic=True, db_path=DEFAULT_DB_PATH):
+    return apply_batch(table, deletes=row_ids, atomic=atomic, db_path=db_path)
+
+
+# Paged reads: one keyset page at a time, point lookups by ID, full-text search
+_not_null = {}
+
+
+def get_page(table, sort=None, descending=False, filters=None, after=None, page_size=DEFAULT_PAGE_SIZE,
+             db_path=DEFAULT_DB_PATH, cache=None):
+    """Return (page DataFrame, cursor for the next page or None)"""
+    if (db_path, table) not in _not_null:
+        with get_pool(db_path).connection() as conn:
+            _not_null[db_path, table] = not_null_columns(conn, table)
+    query, params = build_page_query(table, sort, descending, filters, after, page_size,
+                                     _not_null[db_path, table])
+    return split_page(table, read_sql(query, params, db_path, cache), sort, page_size)
+
+
+def get_by_id(table, row_id, db_path=DEFAULT_DB_PATH, cache=None):
+    rows = read_sql(lookup_query(table), (int(row_id),), db_path, cache)
+    return rows.iloc[0] if len(rows) else None
+
+
+def search_page(table, text, filters=None, after=None, page_size=DEFAULT_PAGE_SIZE, db_path=DEFAULT_DB_PATH,
+                cache=None):
+    """Return (page of the rows matching text, best first, cursor for the next page or None)"""
+    built = search_query(table, text, filters, after, page_size)
+    if built is None:
+        raise ValueError("Search text has no words")
+    return split_page(table, read_sql(*built, db_path, cache), "Rank", page_size)
+
+
+def suggest(text, limit, db_path=DEFAULT_DB_PATH, cache=None):
+    """Best matches across the searchable tables: (Entity, Row_ID, Label, Rank) rows"""
+    built = suggest_query(text, limit)
+    if built is None:
+        raise ValueError("Search text has no words")
+    return read_sql(*built, db_path, cache)
+
+
+# Spatial reads over the gazetteer point indexes
+def nearby(table, lat, lon, radius_km=None, limit=DEFAULT_PAGE_SIZE, db_path=DEFAULT_DB_PATH, cache=None):
+    """Rows of table nearest to (lat, lon), within radius_km if given, with Lat, Lon and Distance_Km"""
+    def load():
+        with get_pool(db_path).read_connection() as conn:
+            return gazetteer.nearby(conn, table, lat, lon, radius_km, limit)
+    params = (float(lat), float(lon), None if radius_km is None else float(radius_km), int(limit))
+    return (cache if cache is not None else get_cache(db_path)).get_or_load(gazetteer.point_query(table), params, load)
+
+
+def within(table, min_lat, max_lat, min_lon, max_lon, limit=DEFAULT_PAGE_SIZE, db_path=DEFAULT_DB_PATH, cache=None):
+    """Rows of table whose point is inside the box, with their Lat and Lon"""
+    return read_sql(*gazetteer.within_query(table, min_lat, max_lat, min_lon, max_lon, limit), db_path, cache)
+
+
+# Named operations used by the management pages
+def create_provider(name, type_, address, city, contact):
+    insert("providers", dict(zip(COLUMNS["providers"], (name, type_, address, city, contact))))
+
+
+def update_provider(provider_id, name, type_, address, city, contact):
+    update("providers", provider_id, dict(zip(COLUMNS["providers"], (name, type_, address, city, contact))))
+
+
+def delete_provider(provider_id):
+    delete("providers", provider_id)
+
+
+def create_receiver(name, type_, city, contact):
+    insert("receivers", dict(zip(COLUMNS["receivers"], (name, type_, city, contact))))
+
+
+def update_receiver(receiver_id, name, type_, city, contact):
+    update("receivers", receiver_id, dict(zip(COLUMNS["receivers"], (name, type_, city, contact))))
+
+
+def delete_receiver(receiver_id):
+    delete("receivers", receiver_id)
+
+
+def create_food_listing(food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type):
+    insert("food_listings", dict(zip(COLUMNS["food_listings"], (
+        food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type))))
+
+
+def update_food_listing(food_id, food_name, quantity, expiry_date, provider_id, provider_type, location, food_type,
+                        meal_type):
+    update("food_listings", food_id, dict(zip(COLUMNS["food_listings"], (
+        food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type))))
+
+
+def delete_food_listing(food_id):
+    delete("food_listings", food_id)
+
+
+def create_claim(food_id, receiver_id, status, timestamp, quantity=1):
+    # Reserves the units, so two receivers cannot claim the same ones
+    return reserve_claim(food_id, receiver_id, quantity, status, timestamp)
+
+
+def update_claim(claim_id, food_id, receiver_id, status, timestamp):
+    """Raises NotAvailable if re-activating or moving a reserved claim needs units its listing no longer has"""
+    try:
+        update("claims", claim_id, dict(zip(COLUMNS["claims"], (food_id, receiver_id, status, timestamp))))
+    except sqlite3.IntegrityError as e:
+        # The RAISE(ABORT) of the trg_stock_claim_update trigger
+        if OVERDRAWN_MESSAGE not in str(e):
+            raise
+        raise NotAvailable(f"Claim {claim_id}: {OVERDRAWN_MESSAGE}") from e
+
+
+def delete_claim(claim_id):
+    delete("claims", claim_id)
+
+
+def set_claim_status(claim_ids, status, atomic=True):
+    """Move many claims to status in one transaction (e.g. end-of-day Pending -> Claimed)"""
+    return update_many("claims", [{"Claim_ID": claim_id, "Status": status} for claim_id in claim_ids], atomic)
@@ -0,0 +1,336 @@
+"""Data access for the Streamlit pages, aware of Streamlit reruns.
+
+Streamlit re-executes app.py on every widget interaction, so each page asks
+this module for its data on every rerun. Reads go through one of two caches:
+
+- the shared cache (query_cache.get_cache): read-mostly aggregates and
+  lists that look the same to every user (KPIs, chart data,
+  recommendations). One session's load serves every other session.
+- a session cache kept in st.session_state: per-user views such as the
+  current page of a table or the record open in an edit form. These never
+  crowd the shared aggregates out of the shared cache. The shared cache
+  forwards its invalidations, so a write from any session drops stale
+  entries here too.
+
+Writes from other processes (the API, another app worker) reach the caches
+through the change log: each rerun drops the results that read a table
+changed since the last one (changefeed.TableWatcher), and leaves the rest.
+
+Nothing is read at import time, and a page only calls the functions it
+shows. Every call is recorded as a span (name, cache scope, seconds,
+whether it had to load). begin_rerun/end_rerun bracket one script run, and
+the sidebar shows the spans of the last rerun and the median per page.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+import crud
+from changefeed import TableWatcher
+from db_pool import get_pool
+from expiry import expiring_within_query, expired_query
+from kpi_engine import compute_kpis, KPI_QUERY
+from matching import propose_claims, SOURCE_SQL
+import profiler
+from profiler import read_frame
+from query_cache import QueryCache, get_cache
+
+SHARED = "shared"
+SESSION = "session"
+
+# Per-session cache: small, since it only holds what one user is looking at
+SESSION_TTL = 60.0
+SESSION_MAX_ENTRIES = 32
+SESSION_MAX_BYTES = 8 * 1024 * 1024
+
+# Completed reruns kept for the per-page timing summary
+RERUN_HISTORY = 200
+
+_watcher = TableWatcher()
+
+
+# Spans
+_local = threading.local()
+_reruns = deque(maxlen=RERUN_HISTORY)
+_reruns_lock = threading.Lock()
+
+
+def begin_rerun(page):
+    """Start collecting spans for one script run of page, and attribute cache stats to it.
+
+    Cached results of tables changed since the last rerun are dropped first.
+    """
+    _local.page = page
+    _local.spans = []
+    _local.start = time.perf_counter()
+    changed = _watcher.poll()
+    if changed:
+        get_cache().invalidate(*changed)
+    get_cache().set_namespace(page)
+    session_cache().set_namespace(page)
+    profiler.set_label(page)
+
+
+def end_rerun():
+    """Finish the current rerun; return (page, seconds, spans) or None if none was started"""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return None
+    rerun = (_local.page, time.perf_counter() - _local.start, spans)
+    _local.spans = None
+    with _reruns_lock:
+        _reruns.append(rerun)
+    return rerun
+
+
+def rerun_summary(page):
+    """(reruns recorded, median seconds, median data-layer seconds) for page across all sessions"""
+    with _reruns_lock:
+        reruns = [(seconds, spans) for name, seconds, spans in _reruns if name == page]
+    if not reruns:
+        return 0, 0.0, 0.0
+    return (len(reruns), statistics.median(seconds for seconds, _ in reruns),
+            statistics.median(sum(span[2] for span in spans) for _, spans in reruns))
+
+
+@contextmanager
+def span(name, scope):
+    """Time one data-layer call; the body sets state["loaded"] when it missed the cache"""
+    state = {"loaded": False}
+    start = time.perf_counter()
+    try:
+        yield state
+    finally:
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append((name, scope, time.perf_counter() - start, state["loaded"]))
+
+
+# Caches
+def session_cache():
+    """This session's cache, created on first use and fed the shared cache's invalidations"""
+    cache = st.session_state.get("_data_layer_cache")
+    if cache is None:
+        cache = QueryCache(ttl=SESSION_TTL, max_entries=SESSION_MAX_ENTRIES, max_bytes=SESSION_MAX_BYTES)
+        get_cache().add_follower(cache)
+        st.session_state["_data_layer_cache"] = cache
+    return cache
+
+
+def _read(query, params=None):
+    with get_pool().read_connection() as conn:
+        return read_frame(conn, query, params)
+
+
+def _shared(name, query, params=None, loader=None):
+    """Read through the shared cache; loader() defaults to running query"""
+    with span(name, SHARED) as state:
+        def load():
+            state["loaded"] = True
+            return loader() if loader else _read(query, params)
+        return get_cache().get_or_load(query, params, load)
+
+
+@contextmanager
+def _session(name):
+    cache = session_cache()
+    misses = cache.stats(getattr(_local, "page", None))["misses"]
+    with span(name, SESSION) as state:
+        yield cache
+        state["loaded"] = cache.stats(getattr(_local, "page", None))["misses"] > misses
+
+
+# Per-user views (session cache)
+def get_page(table, sort=None, descending=False, filters=None, after=None, page_size=crud.DEFAULT_PAGE_SIZE):
+    with _session(f"{table} page") as cache:
+        return crud.get_page(table, sort, descending, filters, after, page_size, cache=cache)
+
+
+def get_by_id(table, row_id):
+    with _session(f"{table} record") as cache:
+        return crud.get_by_id(table, row_id, cache=cache)
+
+
+def get_claim_ids(status, before=None):
+    """IDs of the claims in status, optionally only those made before the date before"""
+    query = "SELECT Claim_ID FROM claims WHERE Status = ?"
+    params = [status]
+    if before is not None:
+        query += " AND Timestamp < ?"
+        params.append(before.isoformat())
+    with _session("claim ids") as cache:
+        return crud.read_sql(query + " ORDER BY Claim_ID", params, cache=cache)["Claim_ID"].tolist()
+
+
+def get_search_page(table, text, filters=None, after=None, page_size=crud.DEFAULT_PAGE_SIZE):
+    with _session(f"{table} search") as cache:
+        return crud.search_page(table, text, filters, after, page_size, cache=cache)
+
+
+def get_nearby(table, lat, lon, radius_km=None, limit=crud.DEFAULT_PAGE_SIZE):
+    with _session(f"nearby {table}") as cache:
+        return crud.nearby(table, lat, lon, radius_km, limit, cache=cache)
+
+
+def get_available(food_id):
+    """Units of a listing not yet reserved (reservations.food_stock), or None if there is no such listing"""
+    with _session("available") as cache:
+        rows = crud.read_sql("SELECT Available FROM food_stock WHERE Food_ID = ?", (int(food_id),), cache=cache)
+    return int(rows["Available"].iloc[0]) if len(rows) else None
+
+
+# Shared aggregates (shared cache)
+def get_kpi_data():
+    def load():
+        with get_pool().read_connection() as conn:
+            return compute_kpis(conn)
+    return _shared("kpis", KPI_QUERY, loader=load)
+
+
+def get_food_type_distribution():
+    return _shared("food type distribution",
+                   "SELECT NULLIF(Food_Type, '') as Food_Type, Count FROM agg_food_type ORDER BY Food_Type")
+
+
+def get_meal_type_distribution():
+    return _shared("meal type distribution",
+                   "SELECT NULLIF(Meal_Type, '') as Meal_Type, Count FROM agg_meal_type ORDER BY Meal_Type")
+
+
+def get_provider_type_distribution():
+    return _shared("provider type distribution",
+                   "SELECT NULLIF(Provider_Type, '') as Provider_Type, Count FROM agg_provider_type "
+                   "ORDER BY Provider_Type")
+
+
+def get_claim_status_distribution():
+    return _shared("claim status distribution",
+                   "SELECT NULLIF(Status, '') as Status, Count FROM agg_claim_status ORDER BY Status")
+
+
+def get_expiry_trend():
+    # Three range counts on the expiry index; everything else (including NULL) is Fresh
+    return _shared("expiry trend", """
+        WITH buckets(Expiry_Status, Count) AS (
+            SELECT 'Expired', (SELECT COUNT(*) FROM food_listings WHERE Expiry_Date < date('now'))
+            UNION ALL
+            SELECT 'Expiring Soon', (SELECT COUNT(*) FROM food_listings
+                                     WHERE Expiry_Date BETWEEN date('now') AND date('now', '+3 days'))
+            UNION ALL
+            SELECT 'Expiring This Week', (SELECT COUNT(*) FROM food_listings
+                                          WHERE Expiry_Date BETWEEN date('now', '+4 days') AND date('now', '+7 days'))
+        ),
+        total(n) AS (SELECT COUNT(*) FROM food_listings)
+        SELECT Expiry_Status, Count FROM buckets WHERE Count > 0
+        UNION ALL
+        SELECT 'Fresh', n - (SELECT SUM(Count) FROM buckets) FROM total
+        WHERE n > (SELECT SUM(Count) FROM buckets)
+    """)
+
+
+# Soonest-expiring listings (expiry_queue / expiry index range, no full sort)
+def get_expiring_within(days, city=None, limit=100):
+    query, params = expiring_within_query(days, city, limit)
+    return _shared("expiring soon", query, params)
+
+
+def get_recently_expired(limit=100):
+    query, params = expired_query(limit)
+    return _shared("recently expired", query, params)
+
+
+def get_city_distribution():
+    return _shared("city distribution", """
+        SELECT NULLIF(City, '') as City, Food_Count
+        FROM agg_city_food
+        ORDER BY Food_Count DESC
+    """)
+
+
+def get_city_map():
+    """Food_Count per city with the city's gazetteer point and how it was placed"""
+    return _shared("city map", """
+        SELECT NULLIF(a.City, '') as City, a.Food_Count, g.Lat, g.Lon, g.Source
+        FROM agg_city_food a
+        LEFT JOIN gazetteer g ON g.Name = a.City
+        ORDER BY a.Food_Count DESC
+    """)
+
+
+def get_top_receivers(limit):
+    return _shared("top receivers", """
+        SELECT r.Name, r.City, a.Claim_Count
+        FROM agg_receiver_claims a
+        JOIN receivers r ON r.Receiver_ID = a.Receiver_ID
+        ORDER BY a.Claim_Count DESC
+        LIMIT ?
+    """, (limit,))
+
+
+def get_claims_by_receiver_city():
+    return _shared("claims by receiver city", """
+        SELECT NULLIF(City, '') as City, Claim_Count
+        FROM agg_receiver_city_claims
+        ORDER BY Claim_Count DESC
+    """)
+
+
+# Proposed claims for unclaimed food expiring within days days (see matching.py)
+def get_proposed_matches(days=3):
+    def load():
+        with get_pool().read_connection() as conn:
+            return propose_claims(conn, days)
+    return _shared("proposed matches", SOURCE_SQL, (days,), load)
+
+
+def get_high_demand_food_types(limit=5):
+    return _shared("high demand food types", """
+        SELECT f.Food_Type, COUNT(c.Claim_ID) as Claim_Count
+        FROM food_listings f
+        JOIN claims c ON f.Food_ID = c.Food_ID
+        GROUP BY f.Food_Type
+        ORDER BY Claim_Count DESC
+        LIMIT ?
+    """, (limit,))
+
+
+def get_high_cancellation_providers():
+    return _shared("high cancellation providers", """
+        SELECT p.Name, p.City,
+               COUNT(c.Claim_ID) as Total_Claims,
+               SUM(CASE WHEN c.Status = 'Cancelled' THEN 1 ELSE 0 END) as Cancelled_Claims,
+               (SUM(CASE WHEN c.Status = 'Cancelled' THEN 1 ELSE 0 END) * 100.0 / COUNT(c.Claim_ID)) as Cancellation_Rate
+        FROM providers p
+        JOIN food_listings f ON p.Provider_ID = f.Provider_ID
+        JOIN claims c ON f.Food_ID = c.Food_ID
+        GROUP BY p.Provider_ID
+        HAVING Cancellation_Rate > 20
+        ORDER BY Cancellation_Rate DESC
+    """)
+
+
+def get_most_claimed_food(limit=10):
+    return _shared("most claimed food", """
+        SELECT f.Food_Name, COUNT(c.Claim_ID) as Claim_Count
+        FROM food_listings f
+        JOIN claims c ON f.Food_ID = c.Food_ID
+        WHERE c.Status = 'Claimed'
+        GROUP BY f.Food_ID
+        ORDER BY Claim_Count DESC
+        LIMIT ?
+    """, (limit,))
+
+
+def get_unclaimed_food():
+    return _shared("unclaimed food", """
+        SELECT f.Food_Name, f.Quantity, f.Expiry_Date, p.Name as Provider_Name
+        FROM food_listings f
+        LEFT JOIN claims c ON f.Food_ID = c.Food_ID
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        WHERE c.Claim_ID IS NULL AND f.Expiry_Date >= date('now')
+        ORDER BY f.Expiry_Date
+    """)
@@ -0,0 +1,242 @@
+"""Seeded synthetic data for the four tables, from 10k to 50M listings.
+
+generate() fills a new database, with the schema from setup_database.py,
+with providers, receivers, food listings and claims. Columns are drawn with
+numpy one CHUNK_ROWS block at a time, so memory stays flat at any scale, and
+the same seed (and today) always gives the same rows.
+
+Categorical mixes follow the shipped CSVs; the rest is skewed the way
+production data is:
+
+- cities: a few big cities and a long tail, for providers and receivers alike
+- providers: a few list far more than the rest; a listing's Location and
+  Provider_Type are its provider's City and Type, as in the CSVs
+- expiry: centred a few days after today, a share already expired and a few
+  missing
+- claims: popular listings and active receivers account for most claims;
+  timestamps fall in the CLAIM_DAYS before today, mostly in daytime, and
+  recent claims are more often still Pending
+
+A skew s draws index n * u**s for uniform u: 1 is uniform, and with 3 the
+busiest 1% of providers (or cities, listings) get about a fifth of the rows.
+
+    python datagen.py out.db 1000000 [--seed 7] [--today 2025-03-20] [--no-migrate]
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from migrations import migrate
+from setup_database import create_tables
+
+SEED = 7
+CHUNK_ROWS = 500_000
+
+# Rows per food listing
+ENTITIES_PER_LISTING = 0.1      # providers, and receivers
+CLAIMS_PER_LISTING = 1.0
+ENTITIES_PER_CITY = 25
+
+CITY_SKEW = 3
+PROVIDER_SKEW = 3
+CLAIM_SKEW = 2
+RECEIVER_SKEW = 2
+
+EXPIRY_MEAN_DAYS = 4
+EXPIRY_SD_DAYS = 7
+EXPIRY_MAX_DAYS = 30
+MISSING_EXPIRY = 0.005
+
+CLAIM_DAYS = 60
+RECENT_DAYS = 2
+RECENT_PENDING = 0.8            # share of the last RECENT_DAYS' claims still Pending
+# Relative claim volume per hour of the day
+HOUR_PROFILE = [1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 10, 11, 12, 11, 10, 9, 9, 10, 10, 8, 6, 4, 2, 1]
+
+# (value, share) mixes measured on the shipped CSVs
+PROVIDER_TYPES = [("Supermarket", 0.262), ("Grocery Store", 0.256), ("Restaurant", 0.246),
+                  ("Catering Service", 0.236)]
+RECEIVER_TYPES = [("NGO", 0.274), ("Charity", 0.263), ("Shelter", 0.246), ("Individual", 0.217)]
+FOOD_NAMES = [("Rice", 0.114), ("Soup", 0.111), ("Salad", 0.105), ("Dairy", 0.103), ("Chicken", 0.103),
+              ("Pasta", 0.102), ("Bread", 0.098), ("Fish", 0.092), ("Vegetables", 0.091), ("Fruits", 0.081)]
+FOOD_TYPES = [("Vegetarian", 0.336), ("Vegan", 0.334), ("Non-Vegetarian", 0.330)]
+MEAL_TYPES = [("Breakfast", 0.254), ("Snacks", 0.253), ("Lunch", 0.248), ("Dinner", 0.245)]
+STATUSES = [("Completed", 0.339), ("Cancelled", 0.336), ("Pending", 0.325)]
+
+PROVIDER_NOUNS = {"Supermarket": "Supermarket", "Grocery Store": "Grocers", "Restaurant": "Kitchen",
+                  "Catering Service": "Catering"}
+CITY_PREFIXES = ["", "North ", "South ", "East ", "West ", "New ", "Port ", "Lake "]
+CITY_SUFFIXES = ["", "ville", "ton", "burgh", "field", "haven", "mouth"]
+STREET_KINDS = ["St", "Ave", "Rd", "Blvd", "Lane", "Way"]
+SYLLABLES = ["an", "bel", "car", "da", "el", "fer", "gar", "hol", "in", "jo", "ken", "la", "mar", "nel",
+             "or", "per", "quin", "ros", "san", "tor", "ul", "ver", "wil", "ya", "zel"]
+WORDS = 3000
+
+
+def _mix(choices):
+    values, shares = zip(*choices)
+    shares = np.array(shares)
+    return np.array(values, dtype=object), shares / shares.sum()
+
+
+def _draw(rng, choices, size):
+    """Return (values, codes): size draws from a (value, share) mix, and the index of each draw"""
+    values, shares = _mix(choices)
+    codes = rng.choice(len(values), size, p=shares)
+    return values[codes], codes
+
+
+def _skewed(rng, n, size, skew):
+    """size indexes in [0, n) with a power-law skew, scattered over the range"""
+    index = (n * rng.random(size) ** skew).astype(np.int64)
+    # A fixed multiplier coprime with n permutes the range, so the busy indexes are not all at the start
+    step = max(int(n * 0.618), 1)
+    while math.gcd(step, n) != 1:
+        step += 1
+    return index * step % n
+
+
+def _words(rng, count):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES, rng.integers(2, 4))).capitalize())
+    return np.array(sorted(words), dtype=object)
+
+
+def _city_names(words, count):
+    """count distinct city names: prefix + word + suffix, numbered once those run out"""
+    names = [f"{prefix}{word}{suffix}" for suffix in CITY_SUFFIXES for prefix in CITY_PREFIXES for word in words]
+    return np.array([names[i % len(names)] + (f" {i // len(names) + 1}" if i >= len(names) else "")
+                     for i in range(count)], dtype=object)
+
+
+def _digits(rng, size, width):
+    return np.char.zfill(rng.integers(0, 10 ** width, size).astype(str), width).astype(object)
+
+
+def _dates(day_offsets, today):
+    return np.datetime_as_string(np.datetime64(today, "D") + day_offsets.astype("timedelta64[D]")).astype(object)
+
+
+def sizes(listings):
+    """Rows per table for a scale of listings food listings"""
+    entities = max(int(listings * ENTITIES_PER_LISTING), 10)
+    return {
+        "providers": entities,
+        "receivers": entities,
+        "food_listings": listings,
+        "claims": int(listings * CLAIMS_PER_LISTING),
+        "cities": max(entities // ENTITIES_PER_CITY, 10),
+    }
+
+
+class _Generator:
+    def __init__(self, listings, seed, today):
+        self.seed = seed
+        self.today = today
+        self.n = sizes(listings)
+        rng = np.random.default_rng([seed, 0])
+        self.words = _words(rng, WORDS)
+        self.cities = _city_names(self.words, self.n["cities"])
+        # A listing copies its provider's Type and City
+        self.provider_type = np.empty(self.n["providers"], dtype=np.int8)
+        self.provider_city = np.empty(self.n["providers"], dtype=np.int32)
+
+    def chunks(self, table_no, rows):
+        for chunk_no, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            rng = np.random.default_rng([self.seed, table_no, chunk_no])
+            yield rng, np.arange(start, min(start + CHUNK_ROWS, rows))
+
+    def contact(self, rng, size):
+        return "+1-" + _digits(rng, size, 3) + "-555-" + _digits(rng, size, 4)
+
+    def providers(self, rng, index):
+        size = len(index)
+        kind, codes = _draw(rng, PROVIDER_TYPES, size)
+        city = _skewed(rng, self.n["cities"], size, CITY_SKEW)
+        self.provider_type[index], self.provider_city[index] = codes, city
+        name = self.words[rng.integers(0, len(self.words), size)] + " " + np.vectorize(PROVIDER_NOUNS.get)(kind)
+        address = (rng.integers(1, 10_000, size).astype(str).astype(object) + " "
+                   + self.words[rng.integers(0, len(self.words), size)] + " "
+                   + np.array(STREET_KINDS, dtype=object)[rng.integers(0, len(STREET_KINDS), size)])
+        return [index + 1, name, kind, address, self.cities[city], self.contact(rng, size)]
+
+    def receivers(self, rng, index):
+        size = len(index)
+        words = self.words[rng.integers(0, len(self.words), (2, size))]
+        return [index + 1, words[0] + " " + words[1], _draw(rng, RECEIVER_TYPES, size)[0],
+                self.cities[_skewed(rng, self.n["cities"], size, CITY_SKEW)], self.contact(rng, size)]
+
+    def food_listings(self, rng, index):
+        size = len(index)
+        provider = _skewed(rng, self.n["providers"], size, PROVIDER_SKEW)
+        offsets = np.clip(np.rint(rng.normal(EXPIRY_MEAN_DAYS, EXPIRY_SD_DAYS, size)),
+                          -EXPIRY_MAX_DAYS, EXPIRY_MAX_DAYS)
+        expiry = _dates(offsets, self.today)
+        expiry[rng.random(size) < MISSING_EXPIRY] = None
+        return [index + 1, _draw(rng, FOOD_NAMES, size)[0], rng.integers(1, 51, size), expiry, provider + 1,
+                _mix(PROVIDER_TYPES)[0][self.provider_type[provider]], self.cities[self.provider_city[provider]],
+                _draw(rng, FOOD_TYPES, size)[0], _draw(rng, MEAL_TYPES, size)[0]]
+
+    def claims(self, rng, index):
+        size = len(index)
+        days = rng.integers(1, CLAIM_DAYS + 1, size)
+        hours = np.array(HOUR_PROFILE, dtype=float)
+        seconds = rng.choice(24, size, p=hours / hours.sum()) * 3600 + rng.integers(0, 3600, size) - days * 86400
+        stamps = np.datetime64(self.today, "D").astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+        status = _draw(rng, STATUSES, size)[0]
+        status[(days <= RECENT_DAYS) & (rng.random(size) < RECENT_PENDING)] = "Pending"
+        return [index + 1, _skewed(rng, self.n["food_listings"], size, CLAIM_SKEW) + 1,
+                _skewed(rng, self.n["receivers"], size, RECEIVER_SKEW) + 1, status,
+                np.char.replace(np.datetime_as_string(stamps), "T", " ").astype(object)]
+
+
+def generate(path, listings, seed=SEED, today=None, report=print):
+    """Fill the four tables of a new database at path; return {table: rows}.
+
+    today (a date, default today) anchors expiry dates and claim times.
+    """
+    generator = _Generator(int(listings), seed, today or date.today())
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        create_tables(conn.cursor())
+        counts = {}
+        for table_no, table in enumerate(["providers", "receivers", "food_listings", "claims"], start=1):
+            start = time.perf_counter()
+            rows = generator.n[table]
+            for rng, index in generator.chunks(table_no, rows):
+                columns = [column.tolist() for column in getattr(generator, table)(rng, index)]
+                conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})", zip(*columns))
+                conn.commit()
+            counts[table] = rows
+            seconds = time.perf_counter() - start
+            report(f"{table}: {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    finally:
+        conn.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic food_waste database")
+    parser.add_argument("database")
+    parser.add_argument("listings", type=int)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--today", type=date.fromisoformat, help="anchor date for expiry and claims (YYYY-MM-DD)")
+    parser.add_argument("--no-migrate", action="store_true", help="skip the indexes and derived tables")
+    args = parser.parse_args()
+    if os.path.exists(args.database):
+        sys.exit(f"{args.database} already exists")
+    generate(args.database, args.listings, args.seed, args.today)
+    if not args.no_migrate:
+        start = time.perf_counter()
+        conn = sqlite3.connect(args.database)
+        migrate(conn)
+        conn.close()
+        print(f"Migrated in {time.perf_counter() - start:.1f}s")
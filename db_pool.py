@@ -0,0 +1,183 @@
+import sqlite3
+import threading
+import time
+import queue
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = 'food_waste.db'
+
+# PRAGMAs applied to every pooled connection. journal_mode=WAL is persistent
+# in the database file and is only set when the file is not in WAL mode yet:
+# setting it needs an exclusive lock, and fails instead of waiting when
+# another process is using the file. The rest are per-connection settings.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-32000",       # ~32 MB page cache per connection
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all threads of a process.
+
+    A connection is owned by one thread between checkout and release. Nested
+    checkouts from the same thread get the same connection back, so helpers
+    can call each other without holding two connections.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_size=8, timeout=10.0, busy_timeout=5.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout = busy_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._size = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        # Optional replica.Replica that read_connection() serves reads from
+        self.replica = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               check_same_thread=False, cached_statements=256)
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+            conn.execute("PRAGMA journal_mode=WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._size < self.max_size:
+                self._size += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        # Pool exhausted: wait for another thread to release a connection
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        finally:
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread.
+
+        The outermost checkout commits on success and rolls back on error
+        before returning the connection to the pool.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(conn)
+
+    @contextmanager
+    def read_connection(self):
+        """Check out a connection that is only read from.
+
+        With a replica attached it is a read-only connection to the in-memory
+        copy; otherwise, or when this thread already holds a pooled connection
+        (and may have uncommitted writes), the same as connection().
+        """
+        replica = self.replica
+        if replica is None or getattr(self._local, 'conn', None) is not None:
+            with self.connection() as conn:
+                yield conn
+            return
+        with replica.connection() as conn:
+            yield conn
+
+    def metrics(self):
+        """Snapshot of pool size and checkout-wait statistics"""
+        with self._lock:
+            return {
+                "pool_size": self._size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": self._size - self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+                "wait_seconds_avg": self._wait_total / self._waits if self._waits else 0.0,
+            }
+
+    def close(self):
+        """Close all idle connections; checked-out connections still return to the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._size -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DEFAULT_DB_PATH, **kwargs):
+    """Return the process-wide pool for db_path, creating it on first use"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[db_path] = pool
+        return pool
@@ -1,37 +1,71 @@
-import sqlite3
+import functools
 import pandas as pd
+from db_pool import get_pool
+from query_cache import get_cache
+from expiry import DEFAULT_LIMIT, expiring_within_query
+from profiler import read_frame
+
+def snapshot_report(report):
+    """Answer the decorated query from self.snapshot when one is set, else run its SQL"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.snapshot is not None:
+                result = self._from_snapshot(report)
+                if result is not None:
+                    return result
+            return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
 
 class DatabaseManager:
-    def __init__(self, db_path='food_waste.db'):
+    def __init__(self, db_path='food_waste.db', cache=None, snapshot=None, olap=None):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = cache if cache is not None else get_cache(db_path)
+        # Optional snapshot.Snapshot that answers the reporting queries
+        self.snapshot = snapshot
+        # Optional backends.DuckDBBackend (any read_frame backend) for the analytical queries
+        self.olap = olap
     
     def get_connection(self):
+        """Check out a pooled connection; use as a context manager"""
+        return self.pool.connection()
+    
+    def _read(self, query, params, schema=None, analytical=False):
+        if analytical and self.olap is not None:
+            return self.olap.read_frame(query, params, schema)
+        with self.pool.read_connection() as conn:
+            return read_frame(conn, query, params or None, schema)
+    
+    def expiring_within(self, days, city=None, limit=DEFAULT_LIMIT):
+        """Soonest-expiring listings in the next days days, optionally in one city"""
+        query, params = expiring_within_query(days, city, limit)
+        return self.execute_query(query, params)
+    
+    def _from_snapshot(self, report):
+        """Answer a report from the columnar snapshot, or None to fall back to SQL"""
         try:
-            return sqlite3.connect(self.db_path)
+            with self.get_connection() as conn:
+                self.snapshot.refresh(conn)
+            return getattr(self.snapshot, report)()
         except Exception as e:
-            print(f"Error connecting to database: {e}")
+            print(f"Error reading snapshot report {report}: {e}")
             return None
     
-    def execute_query(self, query, params=None):
-        conn = self.get_connection()
-        if conn is None:
-            print("Database connection failed")
-            return pd.DataFrame()
-        
+    def execute_query(self, query, params=None, schema=None, analytical=False):
+        """Run a read query through the cache; schema adds to or overrides decoder.COLUMNS for its columns.
+
+        analytical queries (backends.ANALYTICAL) run on self.olap when one is set.
+        """
         try:
-            if params:
-                df = pd.read_sql_query(query, conn, params=params)
-            else:
-                df = pd.read_sql_query(query, conn)
-            return df
+            return self.cache.get_or_load(query, params, lambda: self._read(query, params, schema, analytical))
         except Exception as e:
             print(f"Error executing query: {e}")
             print(f"Query: {query}")
             if params:
                 print(f"Params: {params}")
             return pd.DataFrame()
-        finally:
-            conn.close()
     
     # Query 1: Get all food listings
     def get_all_food_listings(self):
@@ -88,10 +122,10 @@ class DatabaseManager:
         SELECT fl.*, p.Name as Provider_Name, p.Contact as Provider_Contact
         FROM food_listings fl
         JOIN providers p ON fl.Provider_ID = p.Provider_ID
-        WHERE date(fl.Expiry_Date) <= date('now', '+{} days')
+        WHERE fl.Expiry_Date < date('now', '+' || ? || ' days')
         ORDER BY fl.Expiry_Date
-        '''.format(days)
-        return self.execute_query(query)
+        '''
+        return self.execute_query(query, (days + 1,))
     
     # Query 7: Get claims by status
     def get_claims_by_status(self, status):
@@ -132,7 +166,7 @@ class DatabaseManager:
         GROUP BY Food_Type
         ORDER BY Total_Quantity DESC
         '''
-        return self.execute_query(query)
+        return self.execute_query(query, analytical=True)
     
     # Query 11: Get food waste statistics by provider type
     def get_waste_stats_by_provider_type(self):
@@ -146,7 +180,7 @@ class DatabaseManager:
         GROUP BY Provider_Type
         ORDER BY Total_Quantity DESC
         '''
-        return self.execute_query(query)
+        return self.execute_query(query, analytical=True)
     
     # Query 12: Get food waste statistics by city
     def get_waste_stats_by_city(self):
@@ -161,7 +195,7 @@ class DatabaseManager:
         GROUP BY p.City
         ORDER BY Total_Quantity DESC
         '''
-        return self.execute_query(query)
+        return self.execute_query(query, analytical=True)
     
     # Query 13: Get claims statistics
     def get_claims_statistics(self):
@@ -174,7 +208,7 @@ class DatabaseManager:
         FROM claims
         GROUP BY Status
         '''
-        return self.execute_query(query)
+        return self.execute_query(query, analytical=True)
     
     # Query 14: Get top providers by quantity
     def get_top_providers(self, limit=10):
@@ -182,15 +216,18 @@ class DatabaseManager:
         SELECT 
             p.Name,
             p.City,
-            COUNT(fl.Food_ID) as Total_Listings,
-            SUM(fl.Quantity) as Total_Quantity
-        FROM providers p
-        JOIN food_listings fl ON p.Provider_ID = fl.Provider_ID
-        GROUP BY p.Provider_ID
-        ORDER BY Total_Quantity DESC
+            fl.Total_Listings,
+            fl.Total_Quantity
+        FROM (
+            SELECT Provider_ID, COUNT(Food_ID) as Total_Listings, SUM(Quantity) as Total_Quantity
+            FROM food_listings
+            GROUP BY Provider_ID
+        ) fl
+        JOIN providers p ON p.Provider_ID = fl.Provider_ID
+        ORDER BY fl.Total_Quantity DESC
         LIMIT ?
         '''
-        return self.execute_query(query, (limit,))
+        return self.execute_query(query, (limit,), analytical=True)
     
     # Query 15: Get expiring food by city
     def get_expiring_food_by_city(self, city, days=3):
@@ -201,232 +238,231 @@ class DatabaseManager:
             fl.Expiry_Date,
             p.Name as Provider_Name,
             p.Contact as Provider_Contact
-        FROM food_listings fl
+        FROM expiry_queue q
+        JOIN food_listings fl ON fl.Food_ID = q.Food_ID
         JOIN providers p ON fl.Provider_ID = p.Provider_ID
-        WHERE p.City = ? AND date(fl.Expiry_Date) <= date('now', '+{} days')
-        ORDER BY fl.Expiry_Date
-        '''.format(days)
-        return self.execute_query(query, (city,))
-# Add these methods to your db_queries.py file
-
-def get_available_food(self):
-    """Get all available (non-expired) food listings"""
-    query = """
-    SELECT *
-    FROM food_listings
-    WHERE Expiry_Date >= date('now')
-    """
-    return self.execute_query(query)
-
-def get_expired_food(self):
-    """Get all expired food items"""
-    query = """
-    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name
-    FROM food_listings f
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    WHERE f.Expiry_Date < date('now')
-    """
-    return self.execute_query(query)
-
-def get_donations_by_city(self):
-    """Count total donations per city"""
-    query = """
-    SELECT p.City, COUNT(*) AS Total_Donations
-    FROM food_listings f
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    GROUP BY p.City
-    ORDER BY Total_Donations DESC
-    """
-    return self.execute_query(query)
-
-def get_donations_by_food_type(self):
-    """Count donations by food type"""
-    query = """
-    SELECT f.Food_Type, COUNT(*) AS Total_Donations
-    FROM food_listings f
-    GROUP BY f.Food_Type
-    ORDER BY Total_Donations DESC
-    """
-    return self.execute_query(query)
-
-def get_donations_by_meal_type(self):
-    """Donations per meal type"""
-    query = """
-    SELECT f.Meal_Type, COUNT(*) AS Total_Donations
-    FROM food_listings f
-    GROUP BY f.Meal_Type
-    ORDER BY Total_Donations DESC
-    """
-    return self.execute_query(query)
-
-def get_most_active_providers(self):
-    """Most active providers (by number of donations)"""
-    query = """
-    SELECT p.Name AS Provider_Name, COUNT(*) AS Total_Donations
-    FROM food_listings f
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    GROUP BY p.Name
-    ORDER BY Total_Donations DESC
-    """
-    return self.execute_query(query)
-
-def get_total_quantity_by_city(self):
-    """Total quantity donated per city"""
-    query = """
-    SELECT p.City, SUM(f.Quantity) AS Total_Quantity
-    FROM food_listings f
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    GROUP BY p.City
-    ORDER BY Total_Quantity DESC
-    """
-    return self.execute_query(query)
-
-def get_claims_by_receiver(self):
-    """Claims count by receiver"""
-    query = """
-    SELECT r.Name AS Receiver_Name, COUNT(*) AS Total_Claims
-    FROM claims c
-    JOIN receivers r ON c.Receiver_ID = r.Receiver_ID
-    GROUP BY r.Name
-    ORDER BY Total_Claims DESC
-    """
-    return self.execute_query(query)
-
-def get_claims_by_receiver_city(self):
-    """Claims by city (based on receiver city)"""
-    query = """
-    SELECT r.City, COUNT(*) AS Total_Claims
-    FROM claims c
-    JOIN receivers r ON c.Receiver_ID = r.Receiver_ID
-    GROUP BY r.City
-    ORDER BY Total_Claims DESC
-    """
-    return self.execute_query(query)
-
-def get_unclaimed_food(self):
-    """Unclaimed food donations"""
-    query = """
-    SELECT f.Food_ID, f.Food_Name, f.Quantity, p.Name AS Provider_Name
-    FROM food_listings f
-    LEFT JOIN claims c ON f.Food_ID = c.Food_ID
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    WHERE c.Claim_ID IS NULL
-    """
-    return self.execute_query(query)
-
-def get_claims_by_food_type(self):
-    """Number of claims per food type"""
-    query = """
-    SELECT f.Food_Type, COUNT(c.Claim_ID) AS Total_Claims
-    FROM claims c
-    JOIN food_listings f ON c.Food_ID = f.Food_ID
-    GROUP BY f.Food_Type
-    ORDER BY Total_Claims DESC
-    """
-    return self.execute_query(query)
-
-def get_avg_quantity_by_food_type(self):
-    """Average quantity donated per food type"""
-    query = """
-    SELECT f.Food_Type, AVG(f.Quantity) AS Avg_Quantity
-    FROM food_listings f
-    GROUP BY f.Food_Type
-    ORDER BY Avg_Quantity DESC
-    """
-    return self.execute_query(query)
-
-def get_most_claimed_food(self):
-    """Top most claimed food items"""
-    query = """
-    SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claim_Count
-    FROM claims c
-    JOIN food_listings f ON c.Food_ID = f.Food_ID
-    GROUP BY f.Food_Name
-    ORDER BY Claim_Count DESC
-    """
-    return self.execute_query(query)
-
-def get_claim_status_breakdown(self):
-    """Claims status breakdown"""
-    query = """
-    SELECT Status, COUNT(*) AS Status_Count
-    FROM claims
-    GROUP BY Status
-    """
-    return self.execute_query(query)
-
-def get_donation_vs_claimed(self):
-    """Total donations vs. claimed donations"""
-    query = """
-    SELECT 
-        (SELECT COUNT(*) FROM food_listings) AS Total_Donations,
-        (SELECT COUNT(DISTINCT Food_ID) FROM claims) AS Claimed_Donations
-    """
-    return self.execute_query(query)
-
-def get_claims_daily_trend(self):
-    """Daily trend of claims"""
-    query = """
-    SELECT date(Timestamp) AS Claim_Date, COUNT(*) AS Total_Claims
-    FROM claims
-    GROUP BY Claim_Date
-    ORDER BY Claim_Date
-    """
-    return self.execute_query(query)
-
-def get_food_nearing_expiry(self):
-    """Food items nearing expiry in the next 2 days"""
-    query = """
-    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name, p.City
-    FROM food_listings f
-    JOIN providers p ON f.Provider_ID = p.Provider_ID
-    WHERE f.Expiry_Date BETWEEN date('now') AND date('now', '+2 days')
-    ORDER BY f.Expiry_Date ASC
-    """
-    return self.execute_query(query)
-
-def get_expiry_date_range(self):
-    """See the earliest and latest expiry dates"""
-    query = """
-    SELECT MIN(Expiry_Date) AS Earliest, MAX(Expiry_Date) AS Latest
-    FROM food_listings
-    """
-    return self.execute_query(query)
-
-def get_null_expiry_count(self):
-    """See how many have NULL expiry dates"""
-    query = """
-    SELECT COUNT(*) AS Null_Expiry
-    FROM food_listings
-    WHERE Expiry_Date IS NULL
-    """
-    return self.execute_query(query)
-
-def get_food_with_provider_details(self):
-    """Get food listings with provider details"""
-    query = """
-    SELECT
-        f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date,
-        f.Provider_ID, f.Provider_Type, f.Location,
-        f.Food_Type, f.Meal_Type,
-        p.Name AS Provider_Name,
-        p.City AS Provider_City
-    FROM food_listings f
-    JOIN providers p ON p.Provider_ID = f.Provider_ID
-    """
-    return self.execute_query(query)
-
-def get_claims_full_details(self):
-    """Get claims with full details"""
-    query = """
-    SELECT
-        c.Claim_ID, c.Status, c.Timestamp,
-        f.Food_ID, f.Food_Name, f.Food_Type, f.Meal_Type, f.Quantity, f.Expiry_Date,
-        p.Provider_ID, p.Name AS Provider_Name, p.City AS Provider_City,
-        r.Receiver_ID, r.Name AS Receiver_Name, r.City AS Receiver_City
-    FROM claims c
-    JOIN food_listings f ON f.Food_ID = c.Food_ID
-    JOIN providers p ON p.Provider_ID = f.Provider_ID
-    JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-    """
-    return self.execute_query(query)    
\ No newline at end of file
+        WHERE q.City = ? AND q.Expiry_Date < date('now', '+' || ? || ' days')
+        ORDER BY q.Expiry_Date
+        '''
+        return self.execute_query(query, (city, days + 1))
+    
+    def get_available_food(self):
+        """Get all available (non-expired) food listings"""
+        query = """
+        SELECT *
+        FROM food_listings
+        WHERE Expiry_Date >= date('now')
+        """
+        return self.execute_query(query)
+    
+    def get_expired_food(self):
+        """Get all expired food items"""
+        query = """
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name
+        FROM food_listings f
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        WHERE f.Expiry_Date < date('now')
+        """
+        return self.execute_query(query)
+    
+    @snapshot_report("donations_by_city")
+    def get_donations_by_city(self):
+        """Count total donations per city"""
+        query = """
+        SELECT p.City, COUNT(*) AS Total_Donations
+        FROM food_listings f
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        GROUP BY p.City
+        ORDER BY Total_Donations DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    @snapshot_report("donations_by_food_type")
+    def get_donations_by_food_type(self):
+        """Count donations by food type"""
+        query = """
+        SELECT f.Food_Type, COUNT(*) AS Total_Donations
+        FROM food_listings f
+        GROUP BY f.Food_Type
+        ORDER BY Total_Donations DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    @snapshot_report("donations_by_meal_type")
+    def get_donations_by_meal_type(self):
+        """Donations per meal type"""
+        query = """
+        SELECT f.Meal_Type, COUNT(*) AS Total_Donations
+        FROM food_listings f
+        GROUP BY f.Meal_Type
+        ORDER BY Total_Donations DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_most_active_providers(self):
+        """Most active providers (by number of donations)"""
+        query = """
+        SELECT p.Name AS Provider_Name, COUNT(*) AS Total_Donations
+        FROM food_listings f
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        GROUP BY p.Name
+        ORDER BY Total_Donations DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_total_quantity_by_city(self):
+        """Total quantity donated per city"""
+        query = """
+        SELECT p.City, SUM(f.Quantity) AS Total_Quantity
+        FROM food_listings f
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        GROUP BY p.City
+        ORDER BY Total_Quantity DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_claims_by_receiver(self):
+        """Claims count by receiver"""
+        query = """
+        SELECT r.Name AS Receiver_Name, COUNT(*) AS Total_Claims
+        FROM claims c
+        JOIN receivers r ON c.Receiver_ID = r.Receiver_ID
+        GROUP BY r.Name
+        ORDER BY Total_Claims DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_claims_by_receiver_city(self):
+        """Claims by city (based on receiver city)"""
+        query = """
+        SELECT Receiver_City_Code AS City, COUNT(*) AS Total_Claims
+        FROM claims_fact
+        WHERE Receiver_ID IS NOT NULL
+        GROUP BY Receiver_City_Code
+        ORDER BY Total_Claims DESC
+        """
+        return self.execute_query(query, schema={"City": "dim_city"})
+    
+    def get_unclaimed_food(self):
+        """Unclaimed food donations"""
+        query = """
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, p.Name AS Provider_Name
+        FROM food_listings f
+        LEFT JOIN claims c ON f.Food_ID = c.Food_ID
+        JOIN providers p ON f.Provider_ID = p.Provider_ID
+        WHERE c.Claim_ID IS NULL
+        """
+        return self.execute_query(query)
+    
+    def get_claims_by_food_type(self):
+        """Number of claims per food type"""
+        query = """
+        SELECT Food_Type_Code AS Food_Type, COUNT(*) AS Total_Claims
+        FROM claims_fact
+        WHERE Food_ID IS NOT NULL
+        GROUP BY Food_Type_Code
+        ORDER BY Total_Claims DESC
+        """
+        return self.execute_query(query, schema={"Food_Type": "dim_food_type"})
+    
+    def get_avg_quantity_by_food_type(self):
+        """Average quantity donated per food type"""
+        query = """
+        SELECT f.Food_Type, AVG(f.Quantity) AS Avg_Quantity
+        FROM food_listings f
+        GROUP BY f.Food_Type
+        ORDER BY Avg_Quantity DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_most_claimed_food(self):
+        """Top most claimed food items"""
+        query = """
+        SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claim_Count
+        FROM claims c
+        JOIN food_listings f ON c.Food_ID = f.Food_ID
+        GROUP BY f.Food_Name
+        ORDER BY Claim_Count DESC
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_claim_status_breakdown(self):
+        """Claims status breakdown"""
+        query = """
+        SELECT Status, COUNT(*) AS Status_Count
+        FROM claims
+        GROUP BY Status
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_donation_vs_claimed(self):
+        """Total donations vs. claimed donations"""
+        query = """
+        SELECT 
+            (SELECT COUNT(*) FROM food_listings) AS Total_Donations,
+            (SELECT COUNT(DISTINCT Food_ID) FROM claims) AS Claimed_Donations
+        """
+        return self.execute_query(query, analytical=True)
+    
+    @snapshot_report("claims_daily_trend")
+    def get_claims_daily_trend(self):
+        """Daily trend of claims"""
+        query = """
+        SELECT date(Timestamp) AS Claim_Date, COUNT(*) AS Total_Claims
+        FROM claims
+        GROUP BY Claim_Date
+        ORDER BY Claim_Date
+        """
+        return self.execute_query(query, analytical=True)
+    
+    def get_food_nearing_expiry(self):
+        """Food items nearing expiry in the next 2 days"""
+        return self.expiring_within(2, limit=None)
+    
+    def get_expiry_date_range(self):
+        """See the earliest and latest expiry dates"""
+        query = """
+        SELECT MIN(Expiry_Date) AS Earliest, MAX(Expiry_Date) AS Latest
+        FROM food_listings
+        """
+        return self.execute_query(query)
+    
+    def get_null_expiry_count(self):
+        """See how many have NULL expiry dates"""
+        query = """
+        SELECT COUNT(*) AS Null_Expiry
+        FROM food_listings
+        WHERE Expiry_Date IS NULL
+        """
+        return self.execute_query(query)
+    
+    @snapshot_report("food_with_provider_details")
+    def get_food_with_provider_details(self):
+        """Get food listings with provider details"""
+        query = """
+        SELECT
+            f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date,
+            f.Provider_ID, f.Provider_Type, f.Location,
+            f.Food_Type, f.Meal_Type,
+            p.Name AS Provider_Name,
+            p.City AS Provider_City
+        FROM food_listings f
+        JOIN providers p ON p.Provider_ID = f.Provider_ID
+        """
+        return self.execute_query(query)
+    
+    @snapshot_report("claims_full_details")
+    def get_claims_full_details(self):
+        """Get claims with full details"""
+        query = """
+        SELECT
+            Claim_ID, Status_Code AS Status, Timestamp,
+            Food_ID, Food_Name, Food_Type_Code AS Food_Type, Meal_Type_Code AS Meal_Type, Quantity, Expiry_Date,
+            Provider_ID, Provider_Name, Provider_City_Code AS Provider_City,
+            Receiver_ID, Receiver_Name, Receiver_City_Code AS Receiver_City
+        FROM claims_fact
+        WHERE Food_ID IS NOT NULL AND Provider_ID IS NOT NULL AND Receiver_ID IS NOT NULL
+        """
+        return self.execute_query(query, schema={
+            "Status": "dim_status", "Food_Type": "dim_food_type", "Meal_Type": "dim_meal_type",
+            "Provider_City": "dim_city", "Receiver_City": "dim_city"})
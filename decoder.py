@@ -0,0 +1,290 @@
+"""Typed decoding of query results into DataFrames.
+
+pd.read_sql_query keeps every TEXT value as a Python str, dates included,
+and guesses each column's dtype from the values it got. read_typed fetches
+with cursor.fetchmany, BATCH_ROWS at a time, and decodes each batch column
+by column straight into NumPy arrays of the column's declared kind:
+
+- "int32" / "int64": IDs and quantities, counts and sums (pandas Int32 /
+  Int64 when the column holds NULLs)
+- "float": float64, NULL as NaN
+- "date" / "datetime": datetime64[s] parsed from the stored ISO text, NULL
+  as NaT
+- "category": pandas Categorical. Codes are assigned while fetching, so
+  each distinct string is kept once
+- "dim_*": claims_fact integer codes, resolved against that dimension table
+- "text": str
+
+A query's schema is COLUMNS (every column name the repo's queries return)
+overlaid with the schema passed for that query; a column in neither is
+inferred as pandas would. check_schemas() runs every DatabaseManager query
+and reports result columns with no declared kind.
+
+Dates go back to SQLite as text: sql_value() for a bound parameter (the
+keyset cursor), to_text() for a frame (the API's JSON keeps its format).
+"""
+import sys
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from db_pool import DEFAULT_DB_PATH
+
+BATCH_ROWS = 4096
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATETIME_UNIT = "datetime64[s]"
+
+# column name -> kind, for every column the repo's queries return
+COLUMNS = {
+    # keys and quantities
+    "Claim_ID": "int32", "Food_ID": "int32", "Provider_ID": "int32", "Receiver_ID": "int32",
+    "Quantity": "int32", "Available": "int32", "Row_ID": "int32",
+    # dates
+    "Expiry_Date": "date", "Claim_Date": "date", "Earliest": "date", "Latest": "date",
+    "Timestamp": "datetime",
+    # enumerations
+    "Status": "category", "Type": "category", "Food_Type": "category", "Meal_Type": "category",
+    "Provider_Type": "category", "City": "category", "Provider_City": "category", "Receiver_City": "category",
+    "Expiry_Status": "category", "Entity": "category",
+    # free text
+    "Name": "text", "Address": "text", "Contact": "text", "Food_Name": "text", "Location": "text",
+    "Provider_Name": "text", "Provider_Contact": "text", "Receiver_Name": "text", "Receiver_Contact": "text",
+    "Label": "text",
+    # counts and sums
+    "Count": "int64", "Food_Count": "int64", "Claim_Count": "int64", "Status_Count": "int64",
+    "Total_Claims": "int64", "Total_Donations": "int64", "Total_Listings": "int64", "Total_Quantity": "int64",
+    "Unique_Food_Items": "int64", "Unique_Receivers": "int64", "Cancelled_Claims": "int64",
+    "Claimed_Donations": "int64", "Null_Expiry": "int64",
+    # averages and rates
+    "Avg_Quantity": "float", "Cancellation_Rate": "float", "Rank": "float",
+}
+
+
+def kind_of(column, schema=None):
+    """Declared kind of a result column, or None to infer it"""
+    if schema and column in schema:
+        return schema[column]
+    return COLUMNS.get(column)
+
+
+# Column decoders: add() takes one batch of a column (an object array), finish() returns the array
+class _Integers:
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.chunks = []
+        self.masks = []
+
+    def add(self, values):
+        mask = None
+        if None in values:
+            mask = np.fromiter((value is None for value in values), bool, len(values))
+            values = [0 if value is None else value for value in values]
+        self.chunks.append(np.fromiter(values, self.dtype, len(values)))
+        self.masks.append(mask)
+
+    def finish(self, conn):
+        values = _concatenate(self.chunks, self.dtype)
+        if all(mask is None for mask in self.masks):
+            return values
+        mask = np.concatenate([np.zeros(len(chunk), bool) if mask is None else mask
+                               for chunk, mask in zip(self.chunks, self.masks)])
+        return pd.arrays.IntegerArray(values, mask)
+
+
+class _Floats:
+    def __init__(self):
+        self.chunks = []
+
+    def add(self, values):
+        if None in values:
+            values = [np.nan if value is None else value for value in values]
+        self.chunks.append(np.fromiter(values, np.float64, len(values)))
+
+    def finish(self, conn):
+        return _concatenate(self.chunks, np.float64)
+
+
+class _Dates:
+    def __init__(self):
+        self.chunks = []
+
+    def add(self, values):
+        self.chunks.append(parse_dates(values))
+
+    def finish(self, conn):
+        return _concatenate(self.chunks, DATETIME_UNIT)
+
+
+class _Categories:
+    def __init__(self):
+        # value -> code, in order of first sight; NULL is code -1
+        self.index = {None: -1}
+        self.chunks = []
+
+    def add(self, values):
+        index = self.index
+        for value in set(values).difference(index):
+            index[value] = len(index) - 1
+        self.chunks.append(np.fromiter(map(index.__getitem__, values), np.int32, len(values)))
+
+    def finish(self, conn):
+        codes = _concatenate(self.chunks, np.int32)
+        categories = list(self.index)[1:]
+        # Categories in value order, so sorting by the column sorts by value
+        order = sorted(range(len(categories)), key=lambda i: str(categories[i]))
+        if categories:
+            position = np.empty(len(categories), np.int32)
+            position[order] = np.arange(len(categories), dtype=np.int32)
+            codes = np.where(codes >= 0, position[codes], -1)
+        return pd.Categorical.from_codes(codes, categories=[categories[i] for i in order])
+
+
+class _Dimension:
+    def __init__(self, dim):
+        self.dim = dim
+        self.chunks = []
+
+    def add(self, values):
+        if None in values:
+            values = [0 if value is None else value for value in values]
+        self.chunks.append(np.fromiter(values, np.int64, len(values)))
+
+    def finish(self, conn):
+        from claims_fact import dimension
+        positions, categories = dimension(conn, self.dim)
+        return pd.Categorical.from_codes(positions[_concatenate(self.chunks, np.int64)], categories=categories)
+
+
+class _Objects:
+    def __init__(self):
+        self.chunks = []
+
+    def add(self, values):
+        self.chunks.append(values)
+
+    def finish(self, conn):
+        return pd.Series(_concatenate(self.chunks, object)).infer_objects().array
+
+
+def _concatenate(chunks, dtype):
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype)
+
+
+def _decoder(kind):
+    if kind in ("int32", "int64"):
+        return _Integers(np.dtype(kind))
+    if kind == "float":
+        return _Floats()
+    if kind in ("date", "datetime"):
+        return _Dates()
+    if kind == "category":
+        return _Categories()
+    if kind and kind.startswith("dim_"):
+        return _Dimension(kind)
+    return _Objects()
+
+
+def parse_dates(values):
+    """datetime64[s] array from ISO date / datetime strings; None and unparseable text -> NaT"""
+    try:
+        return np.array(values, dtype=DATETIME_UNIT)
+    except (ValueError, TypeError):
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", format="mixed")
+        return parsed.to_numpy(dtype=DATETIME_UNIT)
+
+
+def read_typed(conn, query, params=None, schema=None):
+    """Run query on conn and decode the result into a DataFrame of declared dtypes"""
+    cursor = conn.execute(query, params or ())
+    try:
+        names = [column[0] for column in cursor.description or ()]
+        decoders = [_decoder(kind_of(name, schema)) for name in names]
+        while True:
+            rows = cursor.fetchmany(BATCH_ROWS)
+            if not rows:
+                break
+            batch = np.array(rows, dtype=object)
+            for i, decoder in enumerate(decoders):
+                decoder.add(batch[:, i])
+    finally:
+        cursor.close()
+    frame = pd.DataFrame({i: decoder.finish(conn) for i, decoder in enumerate(decoders)}, copy=False)
+    frame.columns = names
+    return frame
+
+
+def coerce(frame, schema=None):
+    """Convert the declared columns of a frame built elsewhere (e.g. a snapshot report) to their kinds"""
+    for i, name in enumerate(frame.columns):
+        kind = kind_of(name, schema)
+        column = frame.iloc[:, i]
+        if kind in ("int32", "int64"):
+            values = column.astype(kind if column.notna().all() else kind.capitalize())
+        elif kind == "float":
+            values = column.astype(np.float64)
+        elif kind in ("date", "datetime"):
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Parse each distinct value once; code -1 (NULL) picks the trailing NaT
+                parsed = np.append(parse_dates(list(column.cat.categories)), np.datetime64("NaT"))
+                values = parsed[column.cat.codes.to_numpy()]
+            else:
+                values = parse_dates(column.to_numpy(dtype=object, na_value=None))
+        elif kind == "category":
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                values = column.cat.reorder_categories(sorted(column.cat.categories, key=str))
+            else:
+                values = column.astype("category")
+        else:
+            continue
+        frame.isetitem(i, values)
+    return frame
+
+
+def sql_value(column, value, schema=None):
+    """A decoded scalar as SQLite stores it, for binding back as a parameter"""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime(DATE_FORMAT if kind_of(column, schema) == "date" else DATETIME_FORMAT)
+    # numpy scalars -> Python values
+    return getattr(value, "item", lambda: value)()
+
+
+def to_text(data, schema=None):
+    """Copy of a DataFrame or row Series with its dates formatted as SQLite stores them"""
+    if isinstance(data, pd.Series):
+        return pd.Series({name: sql_value(name, value, schema) if isinstance(value, pd.Timestamp) else value
+                          for name, value in data.items()}, dtype=object)
+    data = data.copy(deep=False)
+    for i, name in enumerate(data.columns):
+        column = data.iloc[:, i]
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            data.isetitem(i, column.dt.strftime(DATE_FORMAT if kind_of(name, schema) == "date" else DATETIME_FORMAT))
+    return data
+
+
+def check_schemas(db_path=DEFAULT_DB_PATH):
+    """Run every DatabaseManager query; return {method: [result columns with no declared kind]}"""
+    from check_query_plans import collect_queries
+
+    undeclared = {}
+    with sqlite3.connect(db_path) as conn:
+        for name, statements in sorted(collect_queries().items()):
+            columns = []
+            for query, params, schema in statements:
+                frame = read_typed(conn, query, params, schema)
+                columns += [column for column in frame.columns if kind_of(column, schema) is None]
+            if columns:
+                undeclared[name] = columns
+            print(f"{'FAIL' if columns else 'ok':>4}  {name}" + (f"  ({', '.join(columns)})" if columns else ""))
+    return undeclared
+
+
+if __name__ == "__main__":
+    undeclared = check_schemas(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH)
+    if undeclared:
+        print(f"\n{len(undeclared)} query method(s) return columns with no declared kind")
+        sys.exit(1)
+    print("\nEvery query column has a declared kind")
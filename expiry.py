@@ -0,0 +1,150 @@
+"""Expiry-ordered queue of food listings for the "expiring soon" views.
+
+expiry_queue holds one (City, Expiry_Date, Food_ID) row per listing with a
+known provider and expiry date. The provider's city is copied in, and the
+table is kept current by triggers on food_listings and providers. Its primary
+key is the priority order, so the soonest-expiring k listings, overall or in
+one city, come from a single index range: O(log n + k) with no sort.
+
+The SQL is fixed text with bound parameters, so repeated calls reuse the
+connection's prepared-statement cache.
+"""
+import sys
+import sqlite3
+
+from query_cache import register_derived
+
+DEFAULT_LIMIT = 50
+
+QUEUE_DDL = [
+    """CREATE TABLE IF NOT EXISTS expiry_queue (
+        City TEXT NOT NULL,
+        Expiry_Date TEXT NOT NULL,
+        Food_ID INTEGER NOT NULL,
+        PRIMARY KEY (City, Expiry_Date, Food_ID)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_expiry_queue_food ON expiry_queue (Food_ID)",
+]
+
+RECOMPUTE = """
+    SELECT IFNULL(p.City, ''), f.Expiry_Date, f.Food_ID
+    FROM food_listings f JOIN providers p ON p.Provider_ID = f.Provider_ID
+    WHERE f.Expiry_Date IS NOT NULL"""
+
+# Queue rows for one listing ({row} = NEW) or for every listing of one provider
+_ENQUEUE_LISTING = """INSERT OR REPLACE INTO expiry_queue (City, Expiry_Date, Food_ID)
+    SELECT IFNULL(City, ''), NEW.Expiry_Date, NEW.Food_ID FROM providers
+    WHERE Provider_ID = NEW.Provider_ID AND NEW.Expiry_Date IS NOT NULL;"""
+_ENQUEUE_PROVIDER = """INSERT OR REPLACE INTO expiry_queue (City, Expiry_Date, Food_ID)
+    SELECT IFNULL(NEW.City, ''), Expiry_Date, Food_ID FROM food_listings
+    WHERE Provider_ID = NEW.Provider_ID AND Expiry_Date IS NOT NULL;"""
+_DEQUEUE_PROVIDER = """DELETE FROM expiry_queue
+    WHERE Food_ID IN (SELECT Food_ID FROM food_listings WHERE Provider_ID = OLD.Provider_ID);"""
+
+TRIGGERS = {
+    "trg_expiry_listing_insert": f"AFTER INSERT ON food_listings BEGIN {_ENQUEUE_LISTING} END",
+    "trg_expiry_listing_delete": "AFTER DELETE ON food_listings BEGIN "
+                                 "DELETE FROM expiry_queue WHERE Food_ID = OLD.Food_ID; END",
+    "trg_expiry_listing_update": "AFTER UPDATE OF Food_ID, Expiry_Date, Provider_ID ON food_listings "
+                                 "WHEN OLD.Food_ID IS NOT NEW.Food_ID OR OLD.Expiry_Date IS NOT NEW.Expiry_Date "
+                                 "OR OLD.Provider_ID IS NOT NEW.Provider_ID BEGIN "
+                                 f"DELETE FROM expiry_queue WHERE Food_ID = OLD.Food_ID; {_ENQUEUE_LISTING} END",
+    "trg_expiry_provider_insert": f"AFTER INSERT ON providers BEGIN {_ENQUEUE_PROVIDER} END",
+    "trg_expiry_provider_delete": f"AFTER DELETE ON providers BEGIN {_DEQUEUE_PROVIDER} END",
+    "trg_expiry_provider_update": "AFTER UPDATE OF Provider_ID, City ON providers "
+                                  "WHEN OLD.Provider_ID IS NOT NEW.Provider_ID OR OLD.City IS NOT NEW.City BEGIN "
+                                  f"{_DEQUEUE_PROVIDER} {_ENQUEUE_PROVIDER} END",
+}
+
+register_derived("expiry_queue", ("food_listings", "providers"))
+
+# Listings expiring from today through today + days, soonest first
+EXPIRING_QUERY = """
+    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name, p.City
+    FROM food_listings f
+    JOIN providers p ON p.Provider_ID = f.Provider_ID
+    WHERE f.Expiry_Date >= date('now') AND f.Expiry_Date < date('now', '+' || ? || ' days')
+    ORDER BY f.Expiry_Date, f.Food_ID
+    LIMIT ?"""
+
+EXPIRING_IN_CITY_QUERY = """
+    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name, p.City
+    FROM expiry_queue q
+    JOIN food_listings f ON f.Food_ID = q.Food_ID
+    JOIN providers p ON p.Provider_ID = f.Provider_ID
+    WHERE q.City = ? AND q.Expiry_Date >= date('now') AND q.Expiry_Date < date('now', '+' || ? || ' days')
+    ORDER BY q.Expiry_Date, q.Food_ID
+    LIMIT ?"""
+
+# Already expired, most recent first
+EXPIRED_QUERY = """
+    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, p.Name AS Provider_Name, p.City
+    FROM food_listings f
+    JOIN providers p ON p.Provider_ID = f.Provider_ID
+    WHERE f.Expiry_Date < date('now')
+    ORDER BY f.Expiry_Date DESC, f.Food_ID DESC
+    LIMIT ?"""
+
+
+def expiring_within_query(days, city=None, limit=DEFAULT_LIMIT):
+    """Return (sql, params) for the soonest-expiring listings in the next days days.
+
+    limit=None returns every listing in the window.
+    """
+    limit = -1 if limit is None else int(limit)
+    window = int(days) + 1
+    if city is None:
+        return EXPIRING_QUERY, (window, limit)
+    return EXPIRING_IN_CITY_QUERY, (city, window, limit)
+
+
+def expired_query(limit=DEFAULT_LIMIT):
+    return EXPIRED_QUERY, (-1 if limit is None else int(limit),)
+
+
+def create_tables(cursor):
+    for ddl in QUEUE_DDL:
+        cursor.execute(ddl)
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_queue(cursor):
+    cursor.execute("DELETE FROM expiry_queue")
+    cursor.execute(f"INSERT OR REPLACE INTO expiry_queue (City, Expiry_Date, Food_ID) {RECOMPUTE}")
+
+
+def install(cursor):
+    """Migration step: create the queue and its triggers, then backfill"""
+    create_tables(cursor)
+    create_triggers(cursor)
+    rebuild_queue(cursor)
+
+
+def check_queue(conn):
+    """Compare expiry_queue with a full recompute; return (missing, unexpected) rows"""
+    stored = set(conn.execute("SELECT City, Expiry_Date, Food_ID FROM expiry_queue"))
+    expected = set(conn.execute(RECOMPUTE))
+    return sorted(expected - stored), sorted(stored - expected)
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else 'food_waste.db')
+    missing, unexpected = check_queue(conn)
+    conn.close()
+    if missing or unexpected:
+        print(f"expiry_queue: {len(missing)} row(s) missing, {len(unexpected)} stale")
+        for row in missing[:5]:
+            print(f"  expected {row}")
+        for row in unexpected[:5]:
+            print(f"  stored   {row}")
+        sys.exit(1)
+    print("expiry_queue matches a full recompute")
@@ -0,0 +1,355 @@
+"""Offline place coordinates and R*Tree point indexes for providers and receivers.
+
+gazetteer holds one row per place name used as a provider or receiver City
+or a food listing Location, with its latitude, longitude and how it was
+placed (Source):
+
+- known: a place in KNOWN_PLACES, or loaded from a gazetteer file with
+  load() (Name, Lat, Lon CSV, e.g. a GeoNames extract); Source is "file"
+- state: a point within STATE_SPREAD_DEGREES of the centre of the US state
+  in its providers' addresses ("..., OK 91839")
+- approximate: a point in the contiguous US
+
+The last two are derived from a hash of the name, so a name always lands on
+the same point. Names are resolved in batches, never one request at a time:
+triggers add new names with no coordinates, and resolve() places them all
+(crud does after its writes, bootstrap and the API at startup).
+
+provider_geo and receiver_geo are R*Tree indexes of each row's point (its
+City's coordinates), kept current by triggers on the base tables and on
+gazetteer. A bounding-box lookup reads only the tree nodes that overlap the
+box; nearby() grows a box around a point until it holds the nearest rows.
+
+    python gazetteer.py [database] [--load places.csv]   # compare the point indexes with their tables
+"""
+import argparse
+import csv
+import hashlib
+import math
+import re
+import sqlite3
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from db_pool import DEFAULT_DB_PATH
+from pagination import ENTITIES, MAX_PAGE_SIZE
+from profiler import read_frame
+from query_cache import register_derived
+
+# Sources of place names: table -> column
+PLACE_COLUMNS = {"providers": "City", "receivers": "City", "food_listings": "Location"}
+# Point-indexed tables -> their R*Tree
+GEO_TABLES = {"providers": "provider_geo", "receivers": "receiver_geo"}
+
+KNOWN_PLACES = {
+    "New York": (40.7128, -74.0060),
+    "Los Angeles": (34.0522, -118.2437),
+    "Chicago": (41.8781, -87.6298),
+    "Houston": (29.7604, -95.3698),
+    "Phoenix": (33.4484, -112.0740),
+    "Philadelphia": (39.9526, -75.1652),
+    "San Antonio": (29.4241, -98.4936),
+    "San Diego": (32.7157, -117.1611),
+    "Dallas": (32.7767, -96.7970),
+    "San Jose": (37.3382, -121.8863),
+}
+
+# Approximate geographic centre of each state
+STATE_CENTROIDS = {
+    "AL": (32.8, -86.8), "AK": (64.7, -152.5), "AZ": (34.3, -111.7), "AR": (34.9, -92.4),
+    "CA": (37.2, -119.4), "CO": (39.0, -105.5), "CT": (41.6, -72.7), "DE": (39.0, -75.5),
+    "DC": (38.9, -77.0), "FL": (28.6, -82.4), "GA": (32.7, -83.4), "HI": (20.8, -156.3),
+    "ID": (44.4, -114.6), "IL": (40.0, -89.2), "IN": (39.9, -86.3), "IA": (42.1, -93.5),
+    "KS": (38.5, -98.4), "KY": (37.5, -85.3), "LA": (31.1, -92.0), "ME": (45.4, -69.2),
+    "MD": (39.0, -76.8), "MA": (42.3, -71.8), "MI": (44.3, -85.4), "MN": (46.3, -94.3),
+    "MS": (32.7, -89.7), "MO": (38.4, -92.5), "MT": (47.0, -109.6), "NE": (41.5, -99.8),
+    "NV": (39.3, -116.6), "NH": (43.7, -71.6), "NJ": (40.2, -74.7), "NM": (34.4, -106.1),
+    "NY": (42.9, -75.5), "NC": (35.6, -79.4), "ND": (47.5, -100.5), "OH": (40.3, -82.8),
+    "OK": (35.6, -97.5), "OR": (43.9, -120.6), "PA": (40.9, -77.8), "PR": (18.2, -66.5),
+    "RI": (41.7, -71.5), "SC": (33.9, -80.9), "SD": (44.4, -100.2), "TN": (35.9, -86.4),
+    "TX": (31.5, -99.3), "UT": (39.3, -111.7), "VT": (44.1, -72.7), "VA": (37.5, -78.9),
+    "WA": (47.4, -120.5), "WV": (38.6, -80.6), "WI": (44.6, -89.9), "WY": (43.0, -107.6),
+}
+STATE_SPREAD_DEGREES = 1.0
+# Contiguous US: (min lat, max lat, min lon, max lon)
+US_BOUNDS = (25.0, 49.0, -124.0, -67.0)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+# nearby() without a radius starts from this box and quadruples it until it holds enough rows
+START_KM = 25.0
+MAX_KM = math.pi * EARTH_RADIUS_KM
+
+_ADDRESS_STATE = re.compile(r",?\s([A-Z]{2})\s+\d{5}(?:-\d{4})?\s*$")
+
+GAZETTEER_DDL = """CREATE TABLE IF NOT EXISTS gazetteer (
+    Name TEXT PRIMARY KEY,
+    Lat REAL,
+    Lon REAL,
+    Source TEXT
+)"""
+
+
+def _geo_ddl(table):
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {GEO_TABLES[table]} "
+            f"USING rtree({ENTITIES[table][0]}, Min_Lat, Max_Lat, Min_Lon, Max_Lon)")
+
+
+# Trigger statements never rely on OR IGNORE / OR REPLACE: inside the DO UPDATE
+# branch of an upsert (sync.py) the outer statement's conflict handling wins,
+# and a conflict would abort the sync instead of being resolved.
+
+def _point(table, row):
+    """Statements (re)indexing row's point from its City's gazetteer entry"""
+    geo, pk, column = GEO_TABLES[table], ENTITIES[table][0], PLACE_COLUMNS[table]
+    return (f"DELETE FROM {geo} WHERE {pk} = {row}.{pk}; "
+            f"INSERT INTO {geo} SELECT {row}.{pk}, Lat, Lat, Lon, Lon FROM gazetteer "
+            f"WHERE Name = {row}.{column} AND Lat IS NOT NULL;")
+
+
+def _triggers():
+    triggers = {}
+    for table, column in PLACE_COLUMNS.items():
+        pk = ENTITIES[table][0]
+        add_name = (f"INSERT INTO gazetteer (Name) SELECT NEW.{column} WHERE NEW.{column} IS NOT NULL "
+                    f"AND NOT EXISTS (SELECT 1 FROM gazetteer WHERE Name = NEW.{column});")
+        insert, update = add_name, add_name
+        if table in GEO_TABLES:
+            unindex = f"DELETE FROM {GEO_TABLES[table]} WHERE {pk} = OLD.{pk};"
+            insert += " " + _point(table, "NEW")
+            update += f" {unindex} {_point(table, 'NEW')}"
+            triggers[f"trg_geo_{table}_delete"] = f"AFTER DELETE ON {table} BEGIN {unindex} END"
+        triggers[f"trg_geo_{table}_insert"] = f"AFTER INSERT ON {table} BEGIN {insert} END"
+        triggers[f"trg_geo_{table}_update"] = (f"AFTER UPDATE OF {pk}, {column} ON {table} "
+                                               f"WHEN OLD.{pk} IS NOT NEW.{pk} OR OLD.{column} IS NOT NEW.{column} "
+                                               f"BEGIN {update} END")
+    # A name placed (or moved) re-indexes every row in that place
+    place = " ".join(
+        f"DELETE FROM {geo} WHERE {ENTITIES[table][0]} IN "
+        f"(SELECT {ENTITIES[table][0]} FROM {table} WHERE {PLACE_COLUMNS[table]} = NEW.Name); "
+        f"INSERT INTO {geo} SELECT {ENTITIES[table][0]}, NEW.Lat, NEW.Lat, NEW.Lon, NEW.Lon "
+        f"FROM {table} WHERE {PLACE_COLUMNS[table]} = NEW.Name;" for table, geo in GEO_TABLES.items())
+    triggers["trg_geo_gazetteer_insert"] = f"AFTER INSERT ON gazetteer WHEN NEW.Lat IS NOT NULL BEGIN {place} END"
+    triggers["trg_geo_gazetteer_update"] = (f"AFTER UPDATE OF Lat, Lon ON gazetteer WHEN NEW.Lat IS NOT NULL "
+                                            f"BEGIN {place} END")
+    return triggers
+
+
+TRIGGERS = _triggers()
+
+register_derived("gazetteer", PLACE_COLUMNS)
+for _table, _geo in GEO_TABLES.items():
+    register_derived(_geo, (_table, "gazetteer"))
+
+
+def create_tables(cursor):
+    cursor.execute(GAZETTEER_DDL)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_gazetteer_pending ON gazetteer (Name) WHERE Lat IS NULL")
+    for table in GEO_TABLES:
+        cursor.execute(_geo_ddl(table))
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild(cursor):
+    """Add every place name, place the new ones, and re-index every point"""
+    names = " UNION ".join(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL"
+                           for table, column in PLACE_COLUMNS.items())
+    cursor.execute(f"INSERT OR IGNORE INTO gazetteer (Name) {names}")
+    resolve(cursor)
+    for table, geo in GEO_TABLES.items():
+        cursor.execute(f"DELETE FROM {geo}")
+        cursor.execute(f"INSERT INTO {geo} SELECT t.{ENTITIES[table][0]}, g.Lat, g.Lat, g.Lon, g.Lon "
+                       f"FROM {table} t JOIN gazetteer g ON g.Name = t.{PLACE_COLUMNS[table]} "
+                       f"WHERE g.Lat IS NOT NULL")
+
+
+def install(cursor):
+    """Migration step: create the gazetteer and point indexes, fill them, then add the triggers"""
+    create_tables(cursor)
+    # Filled before the triggers exist, so rebuild does not also re-index place by place
+    drop_triggers(cursor)
+    rebuild(cursor)
+    create_triggers(cursor)
+
+
+# Placing names
+
+def _unit_pair(name):
+    """Two numbers in [0, 1) that depend only on name"""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32, int.from_bytes(digest[4:], "big") / 2 ** 32
+
+
+def place(name, state=None):
+    """(Lat, Lon, Source) for a place name, optionally in a two-letter US state"""
+    if name in KNOWN_PLACES:
+        return (*KNOWN_PLACES[name], "known")
+    u, v = _unit_pair(name)
+    if state in STATE_CENTROIDS:
+        lat, lon = STATE_CENTROIDS[state]
+        spread_lon = STATE_SPREAD_DEGREES / math.cos(math.radians(lat))
+        return (round(lat + (2 * u - 1) * STATE_SPREAD_DEGREES, 5), round(lon + (2 * v - 1) * spread_lon, 5),
+                "state")
+    min_lat, max_lat, min_lon, max_lon = US_BOUNDS
+    return round(min_lat + u * (max_lat - min_lat), 5), round(min_lon + v * (max_lon - min_lon), 5), "approximate"
+
+
+def _states(cursor, names):
+    """name -> the state most of its providers' addresses are in, for names with such providers"""
+    counts = {}
+    for start in range(0, len(names), 500):
+        batch = names[start:start + 500]
+        for city, address in cursor.execute(
+                f"SELECT City, Address FROM providers WHERE City IN ({', '.join('?' * len(batch))})", batch).fetchall():
+            match = _ADDRESS_STATE.search(address or "")
+            if match:
+                counts.setdefault(city, Counter())[match.group(1)] += 1
+    return {city: counter.most_common(1)[0][0] for city, counter in counts.items()}
+
+
+def resolve(cursor):
+    """Place every gazetteer name that has no coordinates yet; return how many"""
+    pending = [name for (name,) in cursor.execute("SELECT Name FROM gazetteer WHERE Lat IS NULL").fetchall()]
+    if not pending:
+        return 0
+    states = _states(cursor, pending)
+    cursor.executemany("UPDATE gazetteer SET Lat = ?, Lon = ?, Source = ? WHERE Name = ?",
+                       [(*place(name, states.get(name)), name) for name in pending])
+    return len(pending)
+
+
+def load(conn, path):
+    """Take coordinates from a Name,Lat,Lon CSV file over any placed so far; return the rows read"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [(row["Name"], float(row["Lat"]), float(row["Lon"])) for row in csv.DictReader(f)]
+    conn.executemany("INSERT INTO gazetteer (Name, Lat, Lon, Source) VALUES (?, ?, ?, 'file') "
+                     "ON CONFLICT (Name) DO UPDATE SET Lat = excluded.Lat, Lon = excluded.Lon, Source = 'file'", rows)
+    conn.commit()
+    return len(rows)
+
+
+# Spatial queries
+
+def _check_table(table):
+    if table not in GEO_TABLES:
+        raise ValueError(f"{table!r} has no point index; use one of {', '.join(GEO_TABLES)}")
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min lat, max lat, min lon, max lon) of the box around a circle of radius_km"""
+    lat_reach = radius_km / KM_PER_DEGREE
+    lon_reach = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return (max(lat - lat_reach, -90.0), min(lat + lat_reach, 90.0),
+            max(lon - lon_reach, -180.0), min(lon + lon_reach, 180.0))
+
+
+def point_query(table):
+    """SQL for the IDs and points of table's rows inside a box (min lat, max lat, min lon, max lon)"""
+    _check_table(table)
+    return (f"SELECT {ENTITIES[table][0]} AS Row_ID, Min_Lat AS Lat, Min_Lon AS Lon FROM {GEO_TABLES[table]} "
+            f"WHERE Max_Lat >= ? AND Min_Lat <= ? AND Max_Lon >= ? AND Min_Lon <= ?")
+
+
+def within_query(table, min_lat, max_lat, min_lon, max_lon, limit=MAX_PAGE_SIZE):
+    """Return (sql, params) for up to limit rows of table inside the box, with their Lat and Lon"""
+    _check_table(table)
+    pk = ENTITIES[table][0]
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    return (f"SELECT t.*, g.Min_Lat AS Lat, g.Min_Lon AS Lon FROM {GEO_TABLES[table]} g "
+            f"JOIN {table} t ON t.{pk} = g.{pk} "
+            f"WHERE g.Max_Lat >= ? AND g.Min_Lat <= ? AND g.Max_Lon >= ? AND g.Min_Lon <= ? "
+            f"ORDER BY g.{pk} LIMIT {limit}"), [float(min_lat), float(max_lat), float(min_lon), float(max_lon)]
+
+
+def distance_km(lat, lon, lats, lons):
+    """Great-circle (haversine) distances from one point to arrays of points"""
+    lat, lon, lats, lons = map(np.radians, (lat, lon, np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearby(conn, table, lat, lon, radius_km=None, limit=10):
+    """DataFrame of table's limit rows nearest to (lat, lon), within radius_km if given, nearest first.
+
+    Rows carry Lat, Lon and Distance_Km; ties go to the lower ID.
+    """
+    _check_table(table)
+    lat, lon, limit = float(lat), float(lon), max(1, min(int(limit), MAX_PAGE_SIZE))
+    reach = float(radius_km) if radius_km is not None else START_KM
+    while True:
+        points = conn.execute(point_query(table), bounding_box(lat, lon, reach)).fetchall()
+        ids, lats, lons = (np.array(column) for column in zip(*points)) if points else ([], [], [])
+        distances = distance_km(lat, lon, lats, lons)
+        inside = distances <= reach
+        # Anything outside this circle is farther than everything inside it
+        if radius_km is not None or inside.sum() >= limit or reach >= MAX_KM:
+            break
+        reach *= 4
+    ids = np.asarray(ids, dtype=np.int64)[inside]
+    order = np.lexsort((ids, distances[inside]))[:limit]
+    ids = ids[order]
+
+    pk = ENTITIES[table][0]
+    marks = ", ".join("?" * len(ids)) or "NULL"
+    rows = read_frame(conn, f"SELECT * FROM {table} WHERE {pk} IN ({marks})", ids.tolist())
+    # Into distance order; one positional take instead of a merge and a sort
+    rows = rows.iloc[pd.Index(rows[pk]).get_indexer(ids)].reset_index(drop=True)
+    rows["Lat"] = np.asarray(lats, dtype=float)[inside][order]
+    rows["Lon"] = np.asarray(lons, dtype=float)[inside][order]
+    rows["Distance_Km"] = np.round(distances[inside][order], 3)
+    return rows
+
+
+def check(conn):
+    """Compare each point index with its table; return {table: (missing, unexpected)} where they differ"""
+    differences = {}
+    for table, geo in GEO_TABLES.items():
+        pk, column = ENTITIES[table][0], PLACE_COLUMNS[table]
+        stored = {row_id: (lat, lon) for row_id, lat, lon in conn.execute(f"SELECT {pk}, Min_Lat, Min_Lon FROM {geo}")}
+        expected = {row_id: (lat, lon) for row_id, lat, lon in conn.execute(
+            f"SELECT t.{pk}, g.Lat, g.Lon FROM {table} t JOIN gazetteer g ON g.Name = t.{column} "
+            f"WHERE g.Lat IS NOT NULL")}
+        missing = len(expected.keys() - stored.keys())
+        # R*Tree coordinates are 32-bit floats
+        unexpected = sum(1 for row_id, point in stored.items() if row_id not in expected
+                         or max(abs(a - b) for a, b in zip(point, expected[row_id])) > 1e-4)
+        if missing or unexpected:
+            differences[table] = (missing, unexpected)
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the point indexes, or load place coordinates")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--load", metavar="CSV", help="coordinates file with Name, Lat and Lon columns")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.database)
+    if args.load:
+        print(f"Loaded {load(conn, args.load):,} places")
+    for source, count in conn.execute("SELECT IFNULL(Source, 'pending'), COUNT(*) FROM gazetteer GROUP BY 1"):
+        print(f"{source:>12} {count:>8,} places")
+    differences = check(conn)
+    conn.close()
+    for table, (missing, unexpected) in differences.items():
+        print(f"{GEO_TABLES[table]}: {missing} missing, {unexpected} unexpected points")
+    if differences:
+        return 1
+    print("Every point index matches its table")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
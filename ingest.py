@@ -0,0 +1,154 @@
+"""Streaming CSV ingestion into the food_waste tables.
+
+Each CSV is streamed row by row from the csv module straight into
+executemany, committing every COMMIT_ROWS rows, so memory stays flat whatever
+the file size. Secondary indexes and derived-table triggers are dropped for
+the load and rebuilt once at the end by re-running the schema migrations.
+
+    python ingest.py [database] [--csv-dir DIR] [--commit-rows N] [--table NAME ...]
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from itertools import islice
+
+import aggregates
+import changelog
+import claims_fact
+import expiry
+import gazetteer
+import reservations
+import search
+from migrations import drop_indexes, migrate
+
+# (table, csv file) in foreign-key order
+SOURCES = [
+    ("providers", "providers.csv"),
+    ("receivers", "receivers.csv"),
+    ("food_listings", "food_listings.csv"),
+    ("claims", "claims.csv"),
+]
+
+COMMIT_ROWS = 500_000
+
+# Durability is not needed while a load can simply be re-run. They are reset
+# before the indexes are rebuilt: a larger cache or in-memory temp store made
+# CREATE INDEX slower on 1M-row tables.
+LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+}
+
+
+def _table_columns(conn, table):
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if not columns:
+        raise ValueError(f"Table {table} does not exist; create the schema first (setup_database.py)")
+    return columns
+
+
+def load_csv(conn, table, path, commit_rows=COMMIT_ROWS):
+    """Append the rows of one CSV to table and return the row count.
+
+    Columns are matched by header name; empty fields are stored as NULL.
+    """
+    table_columns = _table_columns(conn, table)
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        unknown = [name for name in header if name not in table_columns]
+        if unknown:
+            raise ValueError(f"{path}: columns {unknown} are not in table {table}")
+
+        insert = (f"INSERT INTO {table} ({', '.join(header)}) "
+                  f"VALUES ({', '.join('?' * len(header))})")
+        rows = ([value if value != '' else None for value in row] for row in reader if row)
+        loaded = 0
+        while True:
+            try:
+                inserted = conn.executemany(insert, islice(rows, commit_rows)).rowcount
+            except sqlite3.ProgrammingError as e:
+                raise ValueError(f"{path}: malformed row after data row {loaded}: {e}") from e
+            conn.commit()
+            if inserted <= 0:
+                return loaded
+            loaded += inserted
+
+
+def ingest(conn, sources=SOURCES, csv_dir='.', commit_rows=COMMIT_ROWS, report=print):
+    """Load each (table, csv file) of sources and return {table: (rows, seconds)}.
+
+    Indexes and summary triggers are dropped first, and every migration is
+    re-applied afterwards to rebuild them and backfill the summary tables.
+    """
+    conn.commit()
+    saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in LOAD_PRAGMAS}
+    for name, value in LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+    results = {}
+    try:
+        cursor = conn.cursor()
+        drop_indexes(cursor)
+        aggregates.drop_triggers(cursor)
+        expiry.drop_triggers(cursor)
+        changelog.drop_triggers(cursor)
+        claims_fact.drop_triggers(cursor)
+        reservations.drop_triggers(cursor)
+        search.drop_triggers(cursor)
+        gazetteer.drop_triggers(cursor)
+        cursor.execute("PRAGMA user_version = 0")
+        conn.commit()
+
+        for table, filename in sources:
+            path = os.path.join(csv_dir, filename)
+            if not os.path.exists(path):
+                report(f"Warning: {path} not found!")
+                continue
+            start = time.perf_counter()
+            rows = load_csv(conn, table, path, commit_rows)
+            elapsed = time.perf_counter() - start
+            results[table] = (rows, elapsed)
+            report(f"Inserted {rows:,} {table} in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)")
+    finally:
+        conn.rollback()
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+    start = time.perf_counter()
+    migrate(conn)
+    report(f"Rebuilt indexes and summary tables in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the food_waste CSV files into SQLite")
+    parser.add_argument("database", nargs="?", default="food_waste.db")
+    parser.add_argument("--csv-dir", default=".")
+    parser.add_argument("--commit-rows", type=int, default=COMMIT_ROWS)
+    parser.add_argument("--table", action="append", choices=[table for table, _ in SOURCES],
+                        help="load only this table (repeatable)")
+    args = parser.parse_args(argv)
+
+    sources = [source for source in SOURCES if not args.table or source[0] in args.table]
+    conn = sqlite3.connect(args.database)
+    try:
+        start = time.perf_counter()
+        results = ingest(conn, sources, args.csv_dir, args.commit_rows)
+        elapsed = time.perf_counter() - start
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error ingesting CSV files: {e}")
+        return 1
+    finally:
+        conn.close()
+    total = sum(rows for rows, _ in results.values())
+    print(f"Loaded {total:,} rows in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/sec overall)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Single-pass KPI aggregation for the Dashboard and Analytics pages.
+
+All eight counters are produced by one statement: one scan over
+food_listings, one over claims, and the b-tree row counts of providers and
+receivers. The row is read straight off the cursor, no DataFrame involved.
+"""
+
+KPI_QUERY = """
+SELECT
+    f.total_food,
+    (SELECT COUNT(*) FROM providers),
+    (SELECT COUNT(*) FROM receivers),
+    c.total_claims,
+    c.claimed_items,
+    c.pending_claims,
+    c.cancelled_claims,
+    f.expired_food
+FROM
+    (SELECT COUNT(*) AS total_food,
+            COUNT(*) FILTER (WHERE Expiry_Date < date('now')) AS expired_food
+     FROM food_listings) f,
+    (SELECT COUNT(*) AS total_claims,
+            COUNT(DISTINCT Food_ID) FILTER (WHERE Status = 'Claimed') AS claimed_items,
+            COUNT(*) FILTER (WHERE Status = 'Pending') AS pending_claims,
+            COUNT(*) FILTER (WHERE Status = 'Cancelled') AS cancelled_claims
+     FROM claims) c
+"""
+
+
+class KPIResult:
+    """Dashboard counters returned by compute_kpis()"""
+
+    __slots__ = (
+        "total_food",
+        "total_providers",
+        "total_receivers",
+        "total_claims",
+        "claimed_items",
+        "pending_claims",
+        "cancelled_claims",
+        "expired_food",
+    )
+
+    total_food: int
+    total_providers: int
+    total_receivers: int
+    total_claims: int
+    claimed_items: int
+    pending_claims: int
+    cancelled_claims: int
+    expired_food: int
+
+    def __init__(self, total_food=0, total_providers=0, total_receivers=0, total_claims=0,
+                 claimed_items=0, pending_claims=0, cancelled_claims=0, expired_food=0):
+        self.total_food = total_food
+        self.total_providers = total_providers
+        self.total_receivers = total_receivers
+        self.total_claims = total_claims
+        self.claimed_items = claimed_items
+        self.pending_claims = pending_claims
+        self.cancelled_claims = cancelled_claims
+        self.expired_food = expired_food
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+        return f"KPIResult({fields})"
+
+    def __eq__(self, other):
+        if not isinstance(other, KPIResult):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @staticmethod
+    def _percent(part, whole):
+        return (part / whole) * 100 if whole > 0 else 0
+
+    @property
+    def claim_rate(self):
+        return self._percent(self.claimed_items, self.total_food)
+
+    @property
+    def pending_rate(self):
+        return self._percent(self.pending_claims, self.total_claims)
+
+    @property
+    def cancellation_rate(self):
+        return self._percent(self.cancelled_claims, self.total_claims)
+
+    @property
+    def expiry_rate(self):
+        return self._percent(self.expired_food, self.total_food)
+
+
+def compute_kpis(conn):
+    """Compute all dashboard counters over an open connection"""
+    row = conn.execute(KPI_QUERY).fetchone()
+    return KPIResult(*row)
@@ -0,0 +1,189 @@
+"""Match near-expiry food listings to receivers and propose claims.
+
+Listings and receivers are partitioned by city, because a listing can only go
+to a receiver in its provider's city. Inside a city, every listing/receiver
+pair is scored at once with NumPy:
+
+    score = w_food * share of the receiver's past claims with this Food_Type
+          + w_meal * share of the receiver's past claims with this Meal_Type
+          + w_qty  * closeness of Quantity to the receiver's usual claim size
+
+Receivers without claim history get a uniform preference. Assignment is
+greedy in expiry order, soonest first. Each round, every unassigned listing
+picks its best receiver that still has capacity. A receiver keeps the most
+urgent of the listings that picked it, up to its remaining capacity. Those
+rounds are vectorized, so the only Python loops are over cities, blocks and
+rounds, never over pairs.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+WEIGHTS = {"food_type": 0.4, "meal_type": 0.3, "quantity": 0.3}
+MAX_PER_RECEIVER = 3
+# Upper bound on listing x receiver cells scored at once (about 32 MB of float64)
+MAX_BLOCK_CELLS = 4_000_000
+
+# Listings without a Quantity (NULL or 0) have no units to claim and are never proposed
+LISTINGS_QUERY = """
+    SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Food_Type, f.Meal_Type, p.City
+    FROM food_listings f
+    JOIN providers p ON p.Provider_ID = f.Provider_ID
+    WHERE f.Expiry_Date >= date('now') AND f.Expiry_Date < date('now', '+' || ? || ' days')
+      AND f.Quantity > 0
+      AND NOT EXISTS (SELECT 1 FROM claims c
+                      WHERE c.Food_ID = f.Food_ID AND c.Status IN ('Pending', 'Claimed', 'Completed'))
+    ORDER BY f.Expiry_Date, f.Food_ID"""
+
+RECEIVERS_QUERY = "SELECT Receiver_ID, Name, City FROM receivers WHERE City IS NOT NULL"
+
+# One row per non-cancelled claim; grouping in SQL needs a temp B-tree and is
+# several times slower than counting codes with NumPy
+HISTORY_QUERY = """
+    SELECT c.Receiver_ID, f.Food_Type, f.Meal_Type, f.Quantity
+    FROM claims c
+    JOIN food_listings f ON f.Food_ID = c.Food_ID
+    WHERE c.Status != 'Cancelled'"""
+
+# For result caches keyed on SQL text: names every table propose_claims reads
+SOURCE_SQL = ";".join([LISTINGS_QUERY, RECEIVERS_QUERY, HISTORY_QUERY])
+
+
+def _preferences(rows, codes, n_receivers, n_codes):
+    """(receivers x n_codes) share of each receiver's claims per code; uniform without history"""
+    counts = np.bincount(rows * n_codes + codes, minlength=n_receivers * n_codes)
+    counts = counts.reshape(n_receivers, n_codes).astype(float)
+    totals = counts.sum(axis=1, keepdims=True)
+    return np.divide(counts, totals, out=np.full_like(counts, 1.0 / n_codes), where=totals > 0)
+
+
+def _assign_block(scores, capacity):
+    """Greedy capacity-bounded assignment of one block; rows are in priority order.
+
+    Returns (row, column) arrays and decrements capacity in place.
+    """
+    rows_out, cols_out = [], []
+    pending = np.arange(scores.shape[0])
+    while len(pending) and capacity.any():
+        candidate = np.where(capacity > 0, scores[pending], -np.inf)
+        choice = candidate.argmax(axis=1)
+        # Stable sort keeps priority order within each receiver's group
+        order = np.argsort(choice, kind="stable")
+        grouped = choice[order]
+        starts = np.searchsorted(grouped, grouped, side="left")
+        accepted = order[(np.arange(len(order)) - starts) < capacity[grouped]]
+        rows_out.append(pending[accepted])
+        cols_out.append(choice[accepted])
+        np.subtract.at(capacity, choice[accepted], 1)
+        rejected = np.ones(len(pending), dtype=bool)
+        rejected[accepted] = False
+        pending = pending[rejected]
+    if not rows_out:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(rows_out), np.concatenate(cols_out)
+
+
+def match(listing_city, listing_food, listing_meal, listing_qty,
+          receiver_city, food_pref, meal_pref, receiver_qty,
+          max_per_receiver=MAX_PER_RECEIVER, weights=WEIGHTS, max_block_cells=MAX_BLOCK_CELLS):
+    """Assign listings to receivers; all inputs are NumPy arrays.
+
+    Listings must be in priority (expiry) order. City, food and meal values
+    are integer codes; food_pref/meal_pref are (receivers x codes) shares.
+    Returns (listing index, receiver index, score) arrays.
+    """
+    listing_order = np.argsort(listing_city, kind="stable")
+    receiver_order = np.argsort(receiver_city, kind="stable")
+    sorted_listing_city = listing_city[listing_order]
+    sorted_receiver_city = receiver_city[receiver_order]
+    capacity = np.full(len(receiver_city), max_per_receiver, dtype=np.int64)
+
+    out_listings, out_receivers, out_scores = [], [], []
+    for city in np.intersect1d(sorted_listing_city, sorted_receiver_city):
+        l_lo, l_hi = np.searchsorted(sorted_listing_city, [city, city + 1])
+        r_lo, r_hi = np.searchsorted(sorted_receiver_city, [city, city + 1])
+        receivers = receiver_order[r_lo:r_hi]
+        city_food_pref = food_pref[receivers]
+        city_meal_pref = meal_pref[receivers]
+        city_qty = receiver_qty[receivers][np.newaxis, :]
+        city_capacity = capacity[receivers]
+
+        block = max(1, max_block_cells // len(receivers))
+        for start in range(l_lo, l_hi, block):
+            listings = listing_order[start:min(start + block, l_hi)]
+            qty = listing_qty[listings][:, np.newaxis]
+            scores = (weights["food_type"] * city_food_pref[:, listing_food[listings]].T
+                      + weights["meal_type"] * city_meal_pref[:, listing_meal[listings]].T
+                      + weights["quantity"] * (1 - np.abs(qty - city_qty) / np.maximum(np.maximum(qty, city_qty), 1)))
+            rows, cols = _assign_block(scores, city_capacity)
+            out_listings.append(listings[rows])
+            out_receivers.append(receivers[cols])
+            out_scores.append(scores[rows, cols])
+            if not city_capacity.any():
+                break
+        capacity[receivers] = city_capacity
+
+    if not out_listings:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    return np.concatenate(out_listings), np.concatenate(out_receivers), np.concatenate(out_scores)
+
+
+def propose_claims(conn, days=3, max_per_receiver=MAX_PER_RECEIVER, weights=WEIGHTS):
+    """DataFrame of proposed (listing, receiver) claims for unclaimed food expiring within days days"""
+    listings = pd.read_sql(LISTINGS_QUERY, conn, params=(int(days) + 1,))
+    receivers = pd.read_sql(RECEIVERS_QUERY, conn).sort_values("Receiver_ID", ignore_index=True)
+    history = pd.read_sql(HISTORY_QUERY, conn)
+    columns = ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "City",
+               "Receiver_ID", "Receiver_Name", "Score"]
+    if listings.empty or receivers.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Shared integer codes; NaN factorizes to -1 and goes to a spare last code
+    n_listings = len(listings)
+    city_codes, _ = pd.factorize(pd.concat([listings["City"], receivers["City"]]))
+    food_codes, food_types = pd.factorize(pd.concat([listings["Food_Type"], history["Food_Type"]]))
+    meal_codes, meal_types = pd.factorize(pd.concat([listings["Meal_Type"], history["Meal_Type"]]))
+    food_codes = np.where(food_codes < 0, len(food_types), food_codes)
+    meal_codes = np.where(meal_codes < 0, len(meal_types), meal_codes)
+
+    # Claim history by receiver row; claims by unknown receivers are dropped
+    receiver_ids = receivers["Receiver_ID"].to_numpy()
+    history_ids = history["Receiver_ID"].to_numpy()
+    rows = np.searchsorted(receiver_ids, history_ids)
+    known = rows < len(receiver_ids)
+    known[known] = receiver_ids[rows[known]] == history_ids[known]
+    rows = rows[known]
+    food_pref = _preferences(rows, food_codes[n_listings:][known], len(receivers), len(food_types) + 1)
+    meal_pref = _preferences(rows, meal_codes[n_listings:][known], len(receivers), len(meal_types) + 1)
+
+    # Usual claim size: mean claimed quantity, or the median listing without history
+    listing_qty = listings["Quantity"].fillna(0).to_numpy(dtype=float)
+    quantity = history["Quantity"].to_numpy(dtype=float)[known]
+    has_quantity = ~np.isnan(quantity)
+    claimed = np.bincount(rows[has_quantity], minlength=len(receivers))
+    total = np.bincount(rows[has_quantity], weights=quantity[has_quantity], minlength=len(receivers))
+    receiver_qty = np.divide(total, claimed, out=np.full(len(receivers), np.median(listing_qty)),
+                             where=claimed > 0)
+
+    listing_idx, receiver_idx, scores = match(
+        city_codes[:n_listings], food_codes[:n_listings], meal_codes[:n_listings],
+        listing_qty,
+        city_codes[n_listings:], food_pref, meal_pref, receiver_qty,
+        max_per_receiver, weights)
+
+    proposals = listings.iloc[listing_idx][["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "City"]]
+    proposals = proposals.assign(Receiver_ID=receiver_ids[receiver_idx],
+                                 Receiver_Name=receivers["Name"].to_numpy()[receiver_idx],
+                                 Score=scores.round(3))
+    return proposals.sort_values(["Expiry_Date", "Food_ID"], ignore_index=True)[columns]
+
+
+def proposal_claim_rows(proposals, timestamp=None):
+    """Pending claim records for crud.insert_many, each reserving its whole listing"""
+    timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [{"Food_ID": int(food_id), "Receiver_ID": int(receiver_id), "Quantity": int(quantity),
+             "Status": 'Pending', "Timestamp": timestamp}
+            for food_id, receiver_id, quantity in zip(proposals["Food_ID"], proposals["Receiver_ID"],
+                                                      proposals["Quantity"])]
@@ -0,0 +1,96 @@
+import sqlite3
+
+import aggregates
+import changelog
+import claims_fact
+import expiry
+import gazetteer
+import reservations
+import search
+
+# Secondary indexes for the filter/join/group-by columns used by
+# db_queries.DatabaseManager and the app.py page helpers.
+INDEXES = [
+    ("idx_providers_city", "providers (City, Provider_ID)"),
+    ("idx_providers_name", "providers (Name)"),
+    ("idx_receivers_city", "receivers (City, Receiver_ID)"),
+    ("idx_receivers_name", "receivers (Name)"),
+    ("idx_food_listings_provider", "food_listings (Provider_ID, Expiry_Date, Quantity)"),
+    ("idx_food_listings_food_type", "food_listings (Food_Type, Quantity)"),
+    ("idx_food_listings_meal_type", "food_listings (Meal_Type, Quantity)"),
+    ("idx_food_listings_provider_type", "food_listings (Provider_Type, Quantity)"),
+    ("idx_food_listings_expiry", "food_listings (Expiry_Date)"),
+    ("idx_food_listings_food_name", "food_listings (Food_Name)"),
+    ("idx_claims_food", "claims (Food_ID, Status)"),
+    ("idx_claims_receiver", "claims (Receiver_ID, Status)"),
+    ("idx_claims_status", "claims (Status, Food_ID, Receiver_ID)"),
+    ("idx_claims_timestamp", "claims (Timestamp)"),
+]
+
+
+def create_indexes(cursor):
+    for name, target in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def drop_indexes(cursor):
+    for name, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+# (version, description, function). Functions receive a cursor inside the
+# migration transaction and must be safe to re-run on a partially built schema.
+MIGRATIONS = [
+    (1, "secondary indexes for filter and join columns", create_indexes),
+    (2, "trigger-maintained summary tables for the Analytics charts", aggregates.install),
+    (3, "expiry-ordered queue for the expiring-soon views", expiry.install),
+    (4, "row change log for incremental snapshot refresh", changelog.install),
+    (5, "denormalized claims fact table with coded dimensions", claims_fact.install),
+    (6, "listing stock and claim reservations for optimistic claiming", reservations.install),
+    (7, "full-text search indexes over names, cities and locations", search.install),
+    (8, "gazetteer coordinates and R*Tree point indexes for the map and nearby search", gazetteer.install),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations to conn and return the list of versions applied.
+
+    The version check runs under a write lock, so concurrent workers starting
+    against the same database file apply each migration exactly once.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    conn.commit()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    applied = []
+    try:
+        current = get_schema_version(conn)
+        for version, description, apply in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying migration {version}: {description}")
+            apply(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            applied.append(version)
+        if applied:
+            cursor.execute("ANALYZE")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect('food_waste.db')
+    applied = migrate(conn)
+    print(f"Schema version {get_schema_version(conn)} ({len(applied)} migration(s) applied)")
+    conn.close()
@@ -0,0 +1,115 @@
+"""Keyset pagination for the entity list pages.
+
+A page is fetched with ORDER BY sort_column, primary key LIMIT n, starting
+strictly after the (sort value, primary key) of the previous page's last row.
+Each page is an index range read, however deep the user scrolls; no OFFSET.
+Table, sort and filter column names are whitelisted here, values are always
+bound as parameters.
+"""
+from decoder import sql_value
+
+# table -> (primary key, sortable columns, equality-filter columns).
+# Every sortable column has an index (see migrations.INDEXES) whose implicit
+# rowid suffix gives the (column, primary key) order the keyset needs.
+ENTITIES = {
+    "providers": ("Provider_ID", ["Provider_ID", "Name", "City"], ["Type", "City"]),
+    "receivers": ("Receiver_ID", ["Receiver_ID", "Name", "City"], ["Type", "City"]),
+    "food_listings": ("Food_ID", ["Food_ID", "Food_Name", "Expiry_Date"],
+                      ["Provider_ID", "Provider_Type", "Food_Type", "Meal_Type"]),
+    "claims": ("Claim_ID", ["Claim_ID", "Timestamp"], ["Food_ID", "Receiver_ID", "Status"]),
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _check_column(column, allowed, kind, table):
+    if column not in allowed:
+        raise ValueError(f"{column!r} is not a {kind} column of {table}")
+
+
+def not_null_columns(conn, table):
+    """Columns of table declared NOT NULL (their keyset needs no NULL branch)"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[3]}
+
+
+def _after_branches(sort, pk, after, descending, nullable):
+    """WHERE fragments (with params) that together select the rows after the cursor.
+
+    SQLite sorts NULL before every value, so a nullable sort column continues
+    into a second, disjoint range when the scan crosses the NULL group. Each
+    fragment is a single index range on its own.
+    """
+    value, last_id = after
+    if sort == pk:
+        return [(f"{pk} {'<' if descending else '>'} ?", [last_id])]
+    if descending:
+        if value is None:
+            return [(f"{sort} IS NULL AND {pk} < ?", [last_id])]
+        branches = [(f"({sort}, {pk}) < (?, ?)", [value, last_id])]
+        return branches + [(f"{sort} IS NULL", [])] if nullable else branches
+    if value is None:
+        return [(f"{sort} IS NULL AND {pk} > ?", [last_id]), (f"{sort} IS NOT NULL", [])]
+    return [(f"({sort}, {pk}) > (?, ?)", [value, last_id])]
+
+
+def build_page_query(table, sort=None, descending=False, filters=None, after=None,
+                     page_size=DEFAULT_PAGE_SIZE, not_null=()):
+    """Return (sql, params) for one page of table.
+
+    filters maps filter columns to values (None/'' entries are ignored); after
+    is the cursor returned with the previous page; not_null names columns known
+    to hold no NULLs (see not_null_columns). One extra row is fetched to
+    tell whether another page follows.
+    """
+    if table not in ENTITIES:
+        raise ValueError(f"Unknown table {table!r}")
+    pk, sortable, filterable = ENTITIES[table]
+    sort = sort or pk
+    _check_column(sort, sortable, "sortable", table)
+
+    where, params = [], []
+    for column, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        _check_column(column, filterable, "filter", table)
+        where.append(f"{column} = ?")
+        params.append(value)
+
+    limit = max(1, min(int(page_size), MAX_PAGE_SIZE)) + 1
+    direction = "DESC" if descending else "ASC"
+    order = f"{pk} {direction}" if sort == pk else f"{sort} {direction}, {pk} {direction}"
+    branches = _after_branches(sort, pk, after, descending, sort not in not_null) if after is not None else [(None, [])]
+
+    selects, all_params = [], []
+    for clause, values in branches:
+        conditions = where + ([clause] if clause else [])
+        sql = f"SELECT * FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        selects.append(f"{sql} ORDER BY {order} LIMIT {limit}")
+        all_params.extend(params + values)
+    if len(selects) == 1:
+        return selects[0], all_params
+    union = " UNION ALL ".join(f"SELECT * FROM ({select})" for select in selects)
+    return f"{union} ORDER BY {order} LIMIT {limit}", all_params
+
+
+def split_page(table, rows, sort=None, page_size=DEFAULT_PAGE_SIZE):
+    """Trim the look-ahead row from a fetched DataFrame; return (page, next cursor or None)"""
+    pk = ENTITIES[table][0]
+    sort = sort or pk
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows.iloc[:page_size]
+    last = page.iloc[-1]
+    # Back to the value SQLite stores (dates as text) so it binds as a parameter
+    return page, (sql_value(sort, last[sort]), int(last[pk]))
+
+
+def lookup_query(table):
+    """Return the primary-key point lookup SQL for table"""
+    if table not in ENTITIES:
+        raise ValueError(f"Unknown table {table!r}")
+    return f"SELECT * FROM {table} WHERE {ENTITIES[table][0]} = ?"
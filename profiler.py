@@ -0,0 +1,219 @@
+"""Per-statement profiling of the DataFrame read paths.
+
+DatabaseManager, crud and data_layer read through read_frame. While no
+profiler is enabled that is decoder.read_typed behind one global check.
+enable() installs a Profiler, which records for every statement:
+
+- wall time, rows returned and bytes materialized (deep DataFrame size),
+  aggregated per (label, statement). The label is the page or API route
+  set on the calling thread.
+- for statements slower than slow_ms, a JSON line in a rotating
+  slow-query log with the parameters and the EXPLAIN QUERY PLAN, run on
+  the same connection right after the statement.
+
+metrics_text() renders the totals in the Prometheus text format (served
+by api_server.py at /metrics). With metrics_path they are also written to
+that file, at most every metrics_interval seconds.
+"""
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from decoder import read_typed
+
+DEFAULT_SLOW_MS = 100
+DEFAULT_SLOW_LOG = "slow_queries.log"
+SLOW_LOG_BYTES = 10 * 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+METRICS_INTERVAL = 15.0
+
+# Upper bounds (seconds) of the wall-time histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_profiler = None
+_local = threading.local()
+
+
+def read_frame(conn, query, params=None, schema=None):
+    """decoder.read_typed, recorded by the enabled profiler if there is one"""
+    if _profiler is None:
+        return read_typed(conn, query, params, schema)
+    return _profiler.read(conn, query, params, schema)
+
+
+def set_label(label):
+    """Attribute this thread's subsequent statements to label (e.g. a page name)"""
+    _local.label = label
+
+
+@contextmanager
+def labelled(label):
+    previous = getattr(_local, "label", None)
+    _local.label = label
+    try:
+        yield
+    finally:
+        _local.label = previous
+
+
+def enable(slow_ms=DEFAULT_SLOW_MS, slow_log=DEFAULT_SLOW_LOG, metrics_path=None):
+    """Start profiling in this process; return the Profiler"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(slow_ms, slow_log, metrics_path)
+    return _profiler
+
+
+def disable():
+    """Stop profiling; the last totals are written to the metrics file if there is one"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.close()
+
+
+def current():
+    return _profiler
+
+
+def statement_id(query):
+    return hashlib.sha1(" ".join(query.split()).encode()).hexdigest()[:12]
+
+
+class _Stats:
+    __slots__ = ("count", "seconds", "max_seconds", "rows", "bytes", "slow", "buckets")
+
+    def __init__(self):
+        self.count = self.rows = self.bytes = self.slow = 0
+        self.seconds = self.max_seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+
+class Profiler:
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, slow_log=DEFAULT_SLOW_LOG, metrics_path=None,
+                 metrics_interval=METRICS_INTERVAL):
+        self.slow_seconds = slow_ms / 1000
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._stats = {}
+        self._sql = {}
+        self._lock = threading.Lock()
+        self._written = time.monotonic()
+        self._log = None
+        if slow_log:
+            self._log = logging.getLogger(f"food_waste.slow_queries.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            self._log.addHandler(logging.handlers.RotatingFileHandler(
+                slow_log, maxBytes=SLOW_LOG_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"))
+
+    def read(self, conn, query, params=None, schema=None):
+        start = time.perf_counter()
+        frame = read_typed(conn, query, params, schema)
+        seconds = time.perf_counter() - start
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        self.record(query, seconds, len(frame), size)
+        if seconds >= self.slow_seconds:
+            self._log_slow(conn, query, params, seconds, len(frame), size)
+        return frame
+
+    def record(self, query, seconds, rows, size):
+        label = getattr(_local, "label", None) or "default"
+        key = (label, statement_id(query))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _Stats()
+                self._sql.setdefault(key[1], " ".join(query.split()))
+            stats.count += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.bytes += size
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+            if seconds >= self.slow_seconds:
+                stats.slow += 1
+            due = self.metrics_path and time.monotonic() - self._written >= self.metrics_interval
+            if due:
+                self._written = time.monotonic()
+        if due:
+            self.write_metrics()
+
+    def _log_slow(self, conn, query, params, seconds, rows, size):
+        if self._log is None:
+            return
+        try:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params or ())]
+        except Exception as e:
+            plan = [f"unavailable: {e}"]
+        self._log.info(json.dumps({
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "label": getattr(_local, "label", None) or "default",
+            "statement": statement_id(query), "ms": round(seconds * 1000, 2), "rows": rows, "bytes": size,
+            "sql": " ".join(query.split()), "params": list(params) if params else [], "plan": plan,
+        }, default=str))
+
+    def top(self, n=10):
+        """The n statements with the most total time, as a DataFrame"""
+        with self._lock:
+            rows = [(label, statement, stats.count, stats.seconds * 1000, stats.max_seconds * 1000,
+                     stats.rows, stats.bytes, stats.slow, self._sql[statement])
+                    for (label, statement), stats in self._stats.items()]
+        frame = pd.DataFrame(rows, columns=["Label", "Statement", "Calls", "Total_ms", "Max_ms", "Rows", "Bytes",
+                                            "Slow", "SQL"])
+        return frame.sort_values("Total_ms", ascending=False).head(n).reset_index(drop=True)
+
+    def metrics_text(self):
+        """Totals in the Prometheus text exposition format"""
+        with self._lock:
+            items = [(label, statement, stats.count, stats.seconds, list(stats.buckets), stats.rows, stats.bytes,
+                      stats.slow) for (label, statement), stats in sorted(self._stats.items())]
+            sql = dict(self._sql)
+        lines = ["# HELP food_waste_query_seconds Wall time of DataFrame read statements.",
+                 "# TYPE food_waste_query_seconds histogram"]
+        for label, statement, count, seconds, buckets, _, _, _ in items:
+            labels = f'label="{_escape(label)}",statement="{statement}"'
+            lines += [f'food_waste_query_seconds_bucket{{{labels},le="{bound}"}} {n}'
+                      for bound, n in zip(BUCKETS, buckets)]
+            lines.append(f'food_waste_query_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"food_waste_query_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"food_waste_query_seconds_count{{{labels}}} {count}")
+        for name, position, text in (("rows", 5, "Rows returned"), ("bytes", 6, "Bytes materialized"),
+                                     ("slow", 7, "Statements over the slow-query threshold")):
+            lines += [f"# HELP food_waste_query_{name}_total {text}.", f"# TYPE food_waste_query_{name}_total counter"]
+            lines += [f'food_waste_query_{name}_total{{label="{_escape(item[0])}",statement="{item[1]}"}} '
+                      f"{item[position]}" for item in items]
+        lines += ["# HELP food_waste_query_info SQL text of each statement ID.", "# TYPE food_waste_query_info gauge"]
+        lines += [f'food_waste_query_info{{statement="{statement}",sql="{_escape(text[:300])}"}} 1'
+                  for statement, text in sorted(sql.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path=None):
+        """Write metrics_text() to path (default metrics_path), replacing it atomically"""
+        path = path or self.metrics_path
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.metrics_text())
+        os.replace(temp, path)
+
+    def close(self):
+        if self.metrics_path:
+            self.write_metrics()
+        if self._log is not None:
+            for handler in list(self._log.handlers):
+                handler.close()
+                self._log.removeHandler(handler)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from aggregates import AGGREGATE_SOURCES
+
+# Derived table -> base tables whose writes change it. Cached reads of a
+# derived table are invalidated by writes to any of its sources.
+DERIVED_TABLES = {table: set(sources) for table, sources in AGGREGATE_SOURCES.items()}
+
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)", re.IGNORECASE)
+_WRITE_TABLE = re.compile(r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM|REPLACE\s+INTO)\s+([A-Za-z_]\w*)",
+                          re.IGNORECASE)
+
+
+def register_derived(table, sources):
+    """Declare that table is computed from sources (e.g. trigger-maintained)"""
+    DERIVED_TABLES.setdefault(table, set()).update(sources)
+
+
+def tables_read(sql):
+    """Base and derived tables a SELECT depends on"""
+    tables = {name.lower() for name in _READ_TABLES.findall(sql)}
+    for table in list(tables):
+        tables.update(DERIVED_TABLES.get(table, ()))
+    return frozenset(tables)
+
+
+def table_written(sql):
+    match = _WRITE_TABLE.match(sql)
+    return match.group(1).lower() if match else None
+
+
+def _result_size(result):
+    try:
+        return int(result.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires", "tables")
+
+    def __init__(self, value, size, expires, tables):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.tables = tables
+
+
+class QueryCache:
+    """LRU cache of query results keyed by SQL text and parameters.
+
+    Entries expire after ttl seconds, the cache is bounded by entry count and
+    approximate result bytes, and writes invalidate only the entries that read
+    the written table. Cached DataFrames are shared; callers must not mutate them.
+    """
+
+    COUNTERS = ("hits", "misses", "evictions", "expirations", "invalidations")
+
+    def __init__(self, ttl=60.0, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._by_table = {}
+        # Invalidations so far, per table and of the whole cache; a load that
+        # overlaps one does not store its (possibly stale) result
+        self._generations = {}
+        self._clears = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {}
+        self._followers = weakref.WeakSet()
+
+    # -- per-page statistics -------------------------------------------------
+
+    def set_namespace(self, namespace):
+        """Attribute this thread's subsequent lookups to namespace (e.g. a page name)"""
+        self._local.namespace = namespace
+
+    def _count(self, counter, n=1):
+        namespace = getattr(self._local, "namespace", None) or "default"
+        counters = self._counters.setdefault(namespace, dict.fromkeys(self.COUNTERS, 0))
+        counters[counter] += n
+
+    def stats(self, namespace=None):
+        """Counters for one namespace, or totals across all of them"""
+        with self._lock:
+            if namespace is not None:
+                counters = dict(self._counters.get(namespace, dict.fromkeys(self.COUNTERS, 0)))
+            else:
+                counters = dict.fromkeys(self.COUNTERS, 0)
+                for values in self._counters.values():
+                    for name, value in values.items():
+                        counters[name] += value
+            counters["entries"] = len(self._entries)
+            counters["bytes"] = self._bytes
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+            return counters
+
+    def namespaces(self):
+        with self._lock:
+            return sorted(self._counters)
+
+    # -- lookups -------------------------------------------------------------
+
+    @staticmethod
+    def make_key(sql, params=None):
+        return (" ".join(sql.split()), tuple(params) if params else ())
+
+    def _generation(self, tables):
+        return self._clears, tuple(self._generations.get(table, 0) for table in tables)
+
+    def get_or_load(self, sql, params, loader):
+        """Return the cached result for (sql, params), calling loader() on a miss"""
+        key = self.make_key(sql, params)
+        tables = tables_read(sql)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self._entries.move_to_end(key)
+                    self._count("hits")
+                    return entry.value
+                self._remove(key)
+                self._count("expirations")
+            self._count("misses")
+            generation = self._generation(tables)
+
+        value = loader()
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if self._generation(tables) != generation:
+                # A write invalidated these tables while loading; the result may predate it
+                return value
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, size, now + self.ttl, tables)
+            self._entries[key] = entry
+            self._bytes += size
+            for table in entry.tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._count("evictions")
+        return value
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    # -- invalidation --------------------------------------------------------
+
+    def add_follower(self, cache):
+        """Repeat this cache's invalidations on cache (held weakly, e.g. a per-session cache)"""
+        with self._lock:
+            self._followers.add(cache)
+
+    def invalidate(self, *tables):
+        """Drop every cached result that reads any of tables"""
+        with self._lock:
+            keys = set()
+            for table in tables:
+                table = table.lower()
+                self._generations[table] = self._generations.get(table, 0) + 1
+                keys.update(self._by_table.get(table, ()))
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._count("invalidations", len(keys))
+            followers = list(self._followers)
+        for follower in followers:
+            follower.invalidate(*tables)
+        return len(keys)
+
+    def invalidate_for(self, sql):
+        """Invalidate the table an INSERT/UPDATE/DELETE statement writes to"""
+        table = table_written(sql)
+        return self.invalidate(table) if table else 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._clears += 1
+            self._bytes = 0
+            followers = list(self._followers)
+        for follower in followers:
+            follower.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_path='food_waste.db', **kwargs):
+    """Return the process-wide result cache for db_path"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = QueryCache(**kwargs)
+            _caches[db_path] = cache
+        return cache
@@ -0,0 +1,255 @@
+"""In-memory read replica of the database, one per process.
+
+A Replica keeps a copy of the whole database file in memory, taken with the
+SQLite backup API, and hands out read-only connections to it. Reads are
+served from memory; writes keep going to the file through the connection
+pool. The copy is replaced when the file has changed:
+
+- PRAGMA data_version, on a connection of the replica's own, changes
+  whenever any other connection commits. It is polled at most once per
+  max_staleness seconds, so a read sees every commit made more than
+  max_staleness seconds before it (plus the time of a refresh another
+  thread is already running).
+- Writes made in this process invalidate the query cache (query_cache.py).
+  The replica follows the cache, so the first read after one waits for a
+  fresh copy: a process always reads its own writes.
+
+A refresh backs the file up into a new shared-cache in-memory database, one
+copy for every thread, and swaps it in; reads already running finish on the
+old copy. It copies the whole file each time, so the mode suits read-heavy
+processes on a database that fits in memory; metrics() has what refreshing
+costs.
+
+attach(db_path) sends ConnectionPool.read_connection() for db_path, which
+the read paths use, to a replica.
+
+    python replica.py [database] [--max-staleness S]   # load a copy and report what it cost
+"""
+import argparse
+import itertools
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from db_pool import DEFAULT_DB_PATH, get_pool
+from query_cache import get_cache
+
+DEFAULT_MAX_STALENESS = 1.0
+
+_names = itertools.count(1)
+
+
+class _Copy:
+    """One in-memory copy of the file, alive until retired and its last connection closes"""
+
+    def __init__(self, source):
+        self.uri = f"file:replica-{os.getpid()}-{next(_names)}?mode=memory&cache=shared"
+        self._keeper = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        source.backup(self._keeper)
+        page_count = self._keeper.execute("PRAGMA page_count").fetchone()[0]
+        self.bytes = page_count * self._keeper.execute("PRAGMA page_size").fetchone()[0]
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._retired = False
+
+    def acquire(self):
+        """A read-only connection to this copy, or None once it has been retired"""
+        with self._lock:
+            if self._retired:
+                return None
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False, cached_statements=256)
+                conn.execute("PRAGMA query_only=ON")
+                return conn
+
+    def release(self, conn):
+        with self._lock:
+            if not self._retired:
+                self._idle.put(conn)
+                return
+        conn.close()
+
+    def retire(self):
+        """Close the idle connections; connections still checked out close on release"""
+        with self._lock:
+            self._retired = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._keeper.close()
+
+
+class Replica:
+    """In-memory copy of db_path, refreshed when the file changes"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_staleness=DEFAULT_MAX_STALENESS):
+        self.db_path = db_path
+        self.max_staleness = max_staleness
+        # Only ever backs the file up and runs PRAGMA data_version, so it sees every commit
+        self._source = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._copy = None
+        self._version = None
+        self._checked = 0.0
+        self._dirty = True
+        self._reads = 0
+        self._checks = 0
+        self._refreshes = 0
+        self._refresh_last = 0.0
+        self._refresh_total = 0.0
+        self._refresh_max = 0.0
+        self._bytes_total = 0
+
+    # -- refreshing ----------------------------------------------------------
+
+    def _check(self, force=False):
+        """Replace the copy if the file changed since it was taken; caller holds self._lock"""
+        # Cleared first: a write invalidating the cache from here on is seen by the next read
+        self._dirty = False
+        version = self._source.execute("PRAGMA data_version").fetchone()[0]
+        refreshed = force or self._copy is None or version != self._version
+        if refreshed:
+            start = time.perf_counter()
+            copy = _Copy(self._source)
+            old, self._copy, self._version = self._copy, copy, version
+            if old is not None:
+                old.retire()
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self._refreshes += 1
+                self._refresh_last = elapsed
+                self._refresh_total += elapsed
+                self._refresh_max = max(self._refresh_max, elapsed)
+                self._bytes_total += copy.bytes
+        self._checked = time.monotonic()
+        with self._stats_lock:
+            self._checks += 1
+        return refreshed
+
+    def refresh(self, force=False):
+        """Bring the copy up to date now; return whether it was replaced"""
+        with self._lock:
+            return self._check(force)
+
+    def _current(self):
+        """The copy to read from, refreshed first if it may be older than allowed"""
+        if self._dirty or self._copy is None:
+            # This process wrote: wait for a copy that has the write
+            with self._lock:
+                if self._dirty or self._copy is None:
+                    self._check()
+        elif time.monotonic() - self._checked >= self.max_staleness:
+            # Another thread already refreshing will swap in a newer copy; keep reading this one meanwhile
+            if self._lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._checked >= self.max_staleness:
+                        self._check()
+                finally:
+                    self._lock.release()
+        return self._copy
+
+    # -- reading -------------------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """Check out a read-only connection to a copy no staler than max_staleness"""
+        while True:
+            copy = self._current()
+            conn = copy.acquire()
+            if conn is not None:
+                break
+        with self._stats_lock:
+            self._reads += 1
+        try:
+            yield conn
+        finally:
+            copy.release(conn)
+
+    # QueryCache follower: this process's writes invalidate the cache
+
+    def invalidate(self, *tables):
+        self._dirty = True
+
+    def clear(self):
+        self._dirty = True
+
+    def metrics(self):
+        """Reads served, data_version checks, and refresh count, time and bytes copied"""
+        with self._stats_lock:
+            return {
+                "max_staleness": self.max_staleness,
+                "age_seconds": time.monotonic() - self._checked if self._copy is not None else None,
+                "bytes": self._copy.bytes if self._copy is not None else 0,
+                "reads": self._reads,
+                "checks": self._checks,
+                "refreshes": self._refreshes,
+                "refresh_seconds_last": self._refresh_last,
+                "refresh_seconds_total": self._refresh_total,
+                "refresh_seconds_max": self._refresh_max,
+                "refresh_seconds_avg": self._refresh_total / self._refreshes if self._refreshes else 0.0,
+                "bytes_copied_total": self._bytes_total,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._copy is not None:
+                self._copy.retire()
+                self._copy = None
+            self._source.close()
+
+
+def attach(db_path=DEFAULT_DB_PATH, max_staleness=DEFAULT_MAX_STALENESS):
+    """Serve this process's reads of db_path from an in-memory replica; return it"""
+    pool = get_pool(db_path)
+    if pool.replica is None:
+        replica = Replica(db_path, max_staleness)
+        get_cache(db_path).add_follower(replica)
+        pool.replica = replica
+    pool.replica.max_staleness = max_staleness
+    return pool.replica
+
+
+def detach(db_path=DEFAULT_DB_PATH):
+    """Go back to reading db_path from the file"""
+    pool = get_pool(db_path)
+    replica, pool.replica = pool.replica, None
+    if replica is not None:
+        replica.close()
+
+
+def current(db_path=DEFAULT_DB_PATH):
+    """The replica serving db_path's reads in this process, or None"""
+    return get_pool(db_path).replica
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load an in-memory copy of the database and report its cost")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--max-staleness", type=float, default=DEFAULT_MAX_STALENESS)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.database):
+        print(f"{args.database} does not exist")
+        return 1
+
+    replica = Replica(args.database, args.max_staleness)
+    replica.refresh()
+    with replica.connection() as conn:
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+    metrics = replica.metrics()
+    print(f"Copied {metrics['bytes'] / 2 ** 20:,.1f} MB ({tables} tables) into memory "
+          f"in {metrics['refresh_seconds_last'] * 1000:.0f} ms")
+    replica.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Concurrency-safe claim reservation with optimistic locking.
+
+food_stock holds one (Food_ID, Available, Version) row per listing:
+Available is the listing's Quantity minus the units held by its reserved,
+not-cancelled claims, and Version goes up on every change. claim_reservations
+records the units each reserved claim holds. Claims made without a
+reservation (the CSV data, claims from before this table) hold no units.
+
+reserve_claim reads the listing's (Available, Version) without taking a lock,
+checks the quantity, and then, under a short BEGIN IMMEDIATE, decrements it
+with an UPDATE conditional on that Version and inserts the claim. If another
+connection (or process) changed the listing in between, the UPDATE matches no
+row and the reservation is retried after a jittered backoff. The write lock
+is held only for the UPDATE and the two INSERTs, so readers and other
+listings' claimers are never serialized behind a claimer who is still
+deciding.
+
+reserve(conn, ...) does the same inside a transaction that already holds the
+write lock (no version check is needed then); crud routes every claim insert,
+single or batched, through it, so no claim is created without its units.
+
+Triggers keep food_stock current when listings change, and when a reserved
+claim is cancelled, moved to another listing or deleted. Re-activating a
+cancelled claim fails if its units have been reserved by someone else since.
+
+    python reservations.py [database]       # compare food_stock with a full recompute
+"""
+import random
+import sys
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from db_pool import DEFAULT_DB_PATH, get_pool
+from query_cache import get_cache, register_derived
+
+MAX_ATTEMPTS = 50
+BACKOFF_SECONDS = 0.001      # first retry delay; doubles per conflict up to MAX_BACKOFF_SECONDS
+MAX_BACKOFF_SECONDS = 0.05
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+STOCK_DDL = [
+    """CREATE TABLE IF NOT EXISTS food_stock (
+        Food_ID INTEGER PRIMARY KEY,
+        Available INTEGER NOT NULL,
+        Version INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS claim_reservations (
+        Claim_ID INTEGER PRIMARY KEY,
+        Quantity INTEGER NOT NULL CHECK (Quantity > 0)
+    )""",
+]
+
+# Units held by the reserved, not-cancelled claims of listing f
+_HELD = """IFNULL((SELECT SUM(r.Quantity) FROM claims c JOIN claim_reservations r ON r.Claim_ID = c.Claim_ID
+                   WHERE c.Food_ID = f.Food_ID AND c.Status IS NOT 'Cancelled'), 0)"""
+
+RECOMPUTE = f"SELECT f.Food_ID, IFNULL(f.Quantity, 0) - {_HELD} FROM food_listings f"
+
+
+def _refresh(where):
+    """Recompute Available for the listings matching where, bumping their Version"""
+    return (f"INSERT INTO food_stock (Food_ID, Available) {RECOMPUTE} WHERE {where} "
+            f"ON CONFLICT (Food_ID) DO UPDATE SET Available = excluded.Available, Version = Version + 1;")
+
+
+# Only a claim that takes units again (re-activated or moved) can overdraw its listing
+OVERDRAWN_MESSAGE = "Not enough quantity left on the food listing for this claim"
+_OVERDRAWN = (f"SELECT RAISE(ABORT, '{OVERDRAWN_MESSAGE}') "
+              "FROM food_stock WHERE Food_ID = NEW.Food_ID AND Available < 0 AND NEW.Status IS NOT 'Cancelled' "
+              "AND (OLD.Status IS 'Cancelled' OR OLD.Food_ID IS NOT NEW.Food_ID);")
+_RESERVED = "EXISTS (SELECT 1 FROM claim_reservations WHERE Claim_ID = {row}.Claim_ID)"
+
+TRIGGERS = {
+    "trg_stock_listing_insert": f"AFTER INSERT ON food_listings BEGIN {_refresh('f.Food_ID = NEW.Food_ID')} END",
+    "trg_stock_listing_delete": "AFTER DELETE ON food_listings BEGIN "
+                                "DELETE FROM food_stock WHERE Food_ID = OLD.Food_ID; END",
+    "trg_stock_listing_update": "AFTER UPDATE OF Food_ID, Quantity ON food_listings "
+                                "WHEN OLD.Food_ID IS NOT NEW.Food_ID OR OLD.Quantity IS NOT NEW.Quantity BEGIN "
+                                "DELETE FROM food_stock WHERE Food_ID = OLD.Food_ID AND OLD.Food_ID IS NOT NEW.Food_ID; "
+                                f"{_refresh('f.Food_ID = NEW.Food_ID')} END",
+    "trg_stock_claim_delete": f"AFTER DELETE ON claims WHEN {_RESERVED.format(row='OLD')} BEGIN "
+                              "DELETE FROM claim_reservations WHERE Claim_ID = OLD.Claim_ID; "
+                              f"{_refresh('f.Food_ID = OLD.Food_ID')} END",
+    "trg_stock_claim_update": "AFTER UPDATE OF Food_ID, Status ON claims "
+                              "WHEN (OLD.Food_ID IS NOT NEW.Food_ID OR OLD.Status IS NOT NEW.Status) "
+                              f"AND {_RESERVED.format(row='NEW')} BEGIN "
+                              f"{_refresh('f.Food_ID IN (OLD.Food_ID, NEW.Food_ID)')} {_OVERDRAWN} END",
+}
+
+register_derived("food_stock", ("food_listings", "claims", "claim_reservations"))
+
+_READ = "SELECT Available, Version FROM food_stock WHERE Food_ID = ?"
+_TAKE = ("UPDATE food_stock SET Available = Available - ?, Version = Version + 1 "
+         "WHERE Food_ID = ? AND Version = ? AND Available >= ?")
+_INSERT_CLAIM = "INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) VALUES (?, ?, ?, ?)"
+_INSERT_RESERVATION = "INSERT INTO claim_reservations (Claim_ID, Quantity) VALUES (?, ?)"
+# Under the write lock: no other writer can change the listing between the read and the UPDATE
+_TAKE_LOCKED = ("UPDATE food_stock SET Available = Available - ?, Version = Version + 1 "
+                "WHERE Food_ID = ? AND Available >= ?")
+_GIVE_BACK = "UPDATE food_stock SET Available = Available + ?, Version = Version + 1 WHERE Food_ID = ?"
+# The statements a reservation writes, for cache invalidation
+STATEMENTS = (_TAKE, _INSERT_CLAIM, _INSERT_RESERVATION)
+
+
+class NotAvailable(Exception):
+    """Raised when a listing has fewer units left than a reservation asks for"""
+
+
+class ReservationConflict(Exception):
+    """Raised when a reservation still conflicts after MAX_ATTEMPTS tries"""
+
+
+# Process-wide counters, reported by metrics()
+_lock = threading.Lock()
+_counts = {"reserved": 0, "conflicts": 0, "not_available": 0, "gave_up": 0}
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+def metrics():
+    with _lock:
+        return dict(_counts)
+
+
+def create_tables(cursor):
+    for ddl in STOCK_DDL:
+        cursor.execute(ddl)
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_stock(cursor):
+    """Forget reservations of claims that no longer exist, then recompute every listing's stock"""
+    cursor.execute("DELETE FROM claim_reservations WHERE Claim_ID NOT IN (SELECT Claim_ID FROM claims)")
+    cursor.execute("DELETE FROM food_stock")
+    cursor.execute(f"INSERT INTO food_stock (Food_ID, Available) {RECOMPUTE}")
+
+
+def install(cursor):
+    """Migration step: create the stock and reservation tables and their triggers, then backfill"""
+    create_tables(cursor)
+    create_triggers(cursor)
+    rebuild_stock(cursor)
+
+
+def _arguments(food_id, receiver_id, quantity, status, timestamp):
+    food_id, receiver_id, quantity = int(food_id), int(receiver_id), int(quantity)
+    if quantity < 1:
+        raise ValueError("A reservation must be for at least one unit")
+    if status == "Cancelled":
+        raise ValueError("A reservation cannot start out cancelled")
+    return food_id, receiver_id, quantity, status, timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def reserve(conn, food_id, receiver_id, quantity=1, status="Pending", timestamp=None):
+    """Reserve units and record the claim inside conn's transaction, which holds the write lock; return its Claim_ID.
+
+    Raises NotAvailable if the listing has fewer units left. The caller
+    commits and invalidates the cache for STATEMENTS.
+    """
+    food_id, receiver_id, quantity, status, timestamp = _arguments(food_id, receiver_id, quantity, status, timestamp)
+    if not conn.execute(_TAKE_LOCKED, (quantity, food_id, quantity)).rowcount:
+        row = conn.execute(_READ, (food_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No food_listings row {food_id}")
+        _count("not_available")
+        raise NotAvailable(f"Food listing {food_id} has {row[0]} unit(s) left, {quantity} requested")
+    try:
+        claim_id = conn.execute(_INSERT_CLAIM, (food_id, receiver_id, status, timestamp)).lastrowid
+        conn.execute(_INSERT_RESERVATION, (claim_id, quantity))
+    except sqlite3.Error:
+        # A rejected claim row gives its units back, without undoing the rest of the caller's transaction
+        conn.execute(_GIVE_BACK, (quantity, food_id))
+        raise
+    _count("reserved")
+    return claim_id
+
+
+def reserve_claim(food_id, receiver_id, quantity=1, status="Pending", timestamp=None, db_path=DEFAULT_DB_PATH,
+                  max_attempts=MAX_ATTEMPTS):
+    """Reserve quantity units of a listing for a receiver and record the claim; return its Claim_ID.
+
+    Runs its own transactions, so it cannot be called inside another one.
+    Raises NotAvailable if the listing has fewer units left, and
+    ReservationConflict if every attempt lost the race for the listing.
+    """
+    food_id, receiver_id, quantity, status, timestamp = _arguments(food_id, receiver_id, quantity, status, timestamp)
+    delay = BACKOFF_SECONDS
+    for _ in range(max_attempts):
+        with get_pool(db_path).connection() as conn:
+            # Read outside any transaction: no lock is held while the request is checked
+            row = conn.execute(_READ, (food_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"No food_listings row {food_id}")
+            left, version = row
+            if left < quantity:
+                _count("not_available")
+                raise NotAvailable(f"Food listing {food_id} has {left} unit(s) left, {quantity} requested")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if conn.execute(_TAKE, (quantity, food_id, version, quantity)).rowcount:
+                    claim_id = conn.execute(_INSERT_CLAIM, (food_id, receiver_id, status, timestamp)).lastrowid
+                    conn.execute(_INSERT_RESERVATION, (claim_id, quantity))
+                    break
+            except sqlite3.OperationalError as e:
+                # Another writer held the lock past busy_timeout: retry like a version conflict
+                if "locked" not in str(e):
+                    raise
+            conn.rollback()
+        _count("conflicts")
+        time.sleep(random.uniform(0, delay))
+        delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+    else:
+        _count("gave_up")
+        raise ReservationConflict(f"Food listing {food_id} kept changing; gave up after {max_attempts} attempts")
+    _count("reserved")
+    cache = get_cache(db_path)
+    for sql in STATEMENTS:
+        cache.invalidate_for(sql)
+    return claim_id
+
+
+def check_stock(conn):
+    """Compare food_stock with a full recompute; return (missing, unexpected) rows"""
+    stored = set(conn.execute("SELECT Food_ID, Available FROM food_stock"))
+    expected = set(conn.execute(RECOMPUTE))
+    return sorted(expected - stored), sorted(stored - expected)
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH)
+    missing, unexpected = check_stock(conn)
+    overdrawn = conn.execute("SELECT COUNT(*) FROM food_stock WHERE Available < 0").fetchone()[0]
+    conn.close()
+    if missing or unexpected or overdrawn:
+        print(f"food_stock: {len(missing)} row(s) missing or wrong, {len(unexpected)} stale, "
+              f"{overdrawn} listing(s) reserved beyond their quantity")
+        for row in missing[:5]:
+            print(f"  expected {row}")
+        for row in unexpected[:5]:
+            print(f"  stored   {row}")
+        sys.exit(1)
+    print("food_stock matches a full recompute; no listing is reserved beyond its quantity")
@@ -0,0 +1,231 @@
+"""Full-text and prefix search over provider, receiver and food listing names.
+
+Each searchable table has an FTS5 index, <table>_fts, over its text columns:
+
+- providers: Name, City, Address
+- receivers: Name, City
+- food_listings: Food_Name, Location
+
+The indexes are external-content tables (the text is read from the base
+table, not stored twice) with prefix indexes for 2- and 3-character
+prefixes, and are kept current by triggers on the base tables. Matches are
+ranked by bm25 with the name column weighted highest.
+
+Search text is split into words and each word is quoted, so user input never
+reaches FTS5 as query syntax; every word must match, and the last one also
+matches as a prefix while it is still being typed. A page of results is
+ordered by (rank, rowid) and continues after the previous page's last
+(rank, rowid), like the keyset pages in pagination.py. suggest() is the
+typeahead: the best few matches across all three tables.
+
+Ranking is the expensive part: scoring every match of a word that appears
+in a tenth of a million listings takes hundreds of milliseconds, while
+walking the matches in rowid order takes a few. So only the RANKED_MATCHES
+newest matches (after filters) are ranked and paged through; a search that
+matches more than that shows the best of the most recent rows, and more
+words or a filter narrow it down.
+
+    python search.py [database] [text]      # compare the indexes with their tables, or search
+"""
+import re
+import sys
+import sqlite3
+
+from db_pool import DEFAULT_DB_PATH
+from pagination import ENTITIES, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from query_cache import register_derived
+
+# table -> indexed columns, name first
+SEARCH_COLUMNS = {
+    "providers": ("Name", "City", "Address"),
+    "receivers": ("Name", "City"),
+    "food_listings": ("Food_Name", "Location"),
+}
+# bm25 weight of the first, second and third indexed column
+WEIGHTS = (10.0, 2.0, 1.0)
+# The last word of the text matches as a prefix once it has this many characters
+MIN_PREFIX = 2
+SUGGESTIONS = 10
+# Only the newest this many matches of a search are ranked (bm25 costs ~2 us a match)
+RANKED_MATCHES = 2000
+
+_WORD = re.compile(r"\w+")
+
+
+def fts_table(table):
+    return f"{table}_fts"
+
+
+def _ddl(table):
+    columns = ", ".join(SEARCH_COLUMNS[table])
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table(table)} USING fts5({columns}, "
+            f"content='{table}', content_rowid='{ENTITIES[table][0]}', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+
+
+def _values(table, row):
+    return ", ".join(f"{row}.{column}" for column in SEARCH_COLUMNS[table])
+
+
+def _index_row(table):
+    fts = fts_table(table)
+    return (f"INSERT INTO {fts} (rowid, {', '.join(SEARCH_COLUMNS[table])}) "
+            f"VALUES (NEW.{ENTITIES[table][0]}, {_values(table, 'NEW')});")
+
+
+def _unindex_row(table):
+    # An external-content row is removed by repeating the values it was indexed with
+    fts = fts_table(table)
+    return (f"INSERT INTO {fts} ({fts}, rowid, {', '.join(SEARCH_COLUMNS[table])}) "
+            f"VALUES ('delete', OLD.{ENTITIES[table][0]}, {_values(table, 'OLD')});")
+
+
+def _triggers(table):
+    watched = (ENTITIES[table][0], *SEARCH_COLUMNS[table])
+    changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in watched)
+    return {
+        f"trg_search_{table}_insert": f"AFTER INSERT ON {table} BEGIN {_index_row(table)} END",
+        f"trg_search_{table}_delete": f"AFTER DELETE ON {table} BEGIN {_unindex_row(table)} END",
+        f"trg_search_{table}_update": f"AFTER UPDATE OF {', '.join(watched)} ON {table} WHEN {changed} BEGIN "
+                                      f"{_unindex_row(table)} {_index_row(table)} END",
+    }
+
+
+TRIGGERS = {name: body for table in SEARCH_COLUMNS for name, body in _triggers(table).items()}
+
+for _table in SEARCH_COLUMNS:
+    register_derived(fts_table(_table), (_table,))
+
+
+def create_tables(cursor):
+    for table in SEARCH_COLUMNS:
+        cursor.execute(_ddl(table))
+        weights = ", ".join(str(weight) for weight in WEIGHTS[:len(SEARCH_COLUMNS[table])])
+        cursor.execute(f"INSERT INTO {fts_table(table)} ({fts_table(table)}, rank) VALUES ('rank', 'bm25({weights})')")
+
+
+def create_triggers(cursor):
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_triggers(cursor):
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_indexes(cursor):
+    for table in SEARCH_COLUMNS:
+        cursor.execute(f"INSERT INTO {fts_table(table)} ({fts_table(table)}) VALUES ('rebuild')")
+
+
+def install(cursor):
+    """Migration step: create the search indexes and their triggers, then index every row"""
+    create_tables(cursor)
+    create_triggers(cursor)
+    rebuild_indexes(cursor)
+
+
+def match_expression(text):
+    """FTS5 query for the words of text (all must match, the last also as a prefix), or None if it has no words"""
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX and not text[-1].isspace():
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _check_table(table):
+    if table not in SEARCH_COLUMNS:
+        raise ValueError(f"{table!r} is not searchable; use one of {', '.join(SEARCH_COLUMNS)}")
+
+
+def search_query(table, text, filters=None, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return (sql, params) for one page of table's rows matching text, best first, or None for no words.
+
+    The rows carry their Rank (lower is better). filters are the list pages'
+    equality filters (None/'' entries are ignored); after is the (Rank,
+    primary key) cursor of the previous page. One extra row is fetched to
+    tell whether another page follows (pagination.split_page with sort="Rank").
+    """
+    _check_table(table)
+    expression = match_expression(text)
+    if expression is None:
+        return None
+    pk, _, filterable = ENTITIES[table]
+    fts = fts_table(table)
+    limit = max(1, min(int(page_size), MAX_PAGE_SIZE)) + 1
+    where, params = [f"{fts} MATCH ?"], [expression]
+    for column, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if column not in filterable:
+            raise ValueError(f"{column!r} is not a filter column of {table}")
+        where.append(f"t.{column} = ?")
+        params.append(value)
+    lowest = _lowest_ranked(fts, f"{fts} s JOIN {table} t ON t.{pk} = s.rowid" if len(where) > 1 else f"{fts} s",
+                            where)
+    params += params
+    where.append(f"s.rowid >= {lowest}")
+    if after is not None:
+        where.append("(s.rank, s.rowid) > (?, ?)")
+        params += [float(after[0]), int(after[1])]
+    return (f"SELECT t.*, s.rank AS Rank FROM {fts} s JOIN {table} t ON t.{pk} = s.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY s.rank, s.rowid LIMIT {limit}"), params
+
+
+def _lowest_ranked(fts, source, where):
+    """SQL for the smallest rowid among the RANKED_MATCHES newest matches (0 when there are fewer)"""
+    return (f"IFNULL((SELECT s.rowid FROM {source} WHERE {' AND '.join(where)} "
+            f"ORDER BY s.rowid DESC LIMIT 1 OFFSET {RANKED_MATCHES - 1}), 0)")
+
+
+def suggest_query(text, limit=SUGGESTIONS):
+    """Return (sql, params) for the best limit matches across all searchable tables, or None for no words.
+
+    Rows are (Entity, Row_ID, Label, Rank); Label is the matched row's name.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    selects = []
+    for table, columns in SEARCH_COLUMNS.items():
+        fts, pk = fts_table(table), ENTITIES[table][0]
+        where = [f"{fts} MATCH ?"]
+        # Rank the rowids first and read only the winners' names from the table
+        selects.append(f"SELECT '{table}' AS Entity, s.rowid AS Row_ID, t.{columns[0]} AS Label, s.Rank FROM "
+                       f"(SELECT rowid, rank AS Rank FROM {fts} s WHERE {where[0]} "
+                       f"AND s.rowid >= {_lowest_ranked(fts, f'{fts} s', where)} ORDER BY rank LIMIT {limit}) s "
+                       f"JOIN {table} t ON t.{pk} = s.rowid")
+    return f"{' UNION ALL '.join(selects)} ORDER BY Rank LIMIT {limit}", [expression] * 2 * len(selects)
+
+
+def check_indexes(conn):
+    """Run FTS5's integrity check on every index against its table; return {table: error}"""
+    errors = {}
+    for table in SEARCH_COLUMNS:
+        fts = fts_table(table)
+        try:
+            conn.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('integrity-check', 1)")
+        except sqlite3.DatabaseError as e:
+            errors[table] = str(e)
+    return errors
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH)
+    if len(sys.argv) > 2:
+        query, params = suggest_query(sys.argv[2]) or ("SELECT 1 WHERE 0", [])
+        for entity, row_id, label, rank in conn.execute(query, params):
+            print(f"{rank:10.4f}  {entity:<14} {row_id:>8}  {label}")
+        sys.exit(0)
+    errors = check_indexes(conn)
+    conn.close()
+    for table, error in errors.items():
+        print(f"{fts_table(table)}: {error}")
+    if errors:
+        sys.exit(1)
+    print("Every search index matches its table")
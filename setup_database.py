@@ -1,6 +1,69 @@
 import sqlite3
-import pandas as pd
 import os
+import sys
+from ingest import ingest
+from sync import sync_all, drop_sync_state
+
+# The four tables, in the shape of the CSV files
+TABLES = [
+    '''
+    CREATE TABLE providers (
+        Provider_ID INTEGER PRIMARY KEY,
+        Name TEXT NOT NULL,
+        Type TEXT,
+        Address TEXT,
+        City TEXT,
+        Contact TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE food_listings (
+        Food_ID INTEGER PRIMARY KEY,
+        Food_Name TEXT NOT NULL,
+        Quantity INTEGER,
+        Expiry_Date TEXT,
+        Provider_ID INTEGER,
+        Provider_Type TEXT,
+        Location TEXT,
+        Food_Type TEXT,
+        Meal_Type TEXT,
+        FOREIGN KEY (Provider_ID) REFERENCES providers(Provider_ID)
+    )
+    ''',
+    '''
+    CREATE TABLE receivers (
+        Receiver_ID INTEGER PRIMARY KEY,
+        Name TEXT NOT NULL,
+        Type TEXT,
+        City TEXT,
+        Contact TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE claims (
+        Claim_ID INTEGER PRIMARY KEY,
+        Food_ID INTEGER,
+        Receiver_ID INTEGER,
+        Status TEXT,
+        Timestamp TEXT,
+        FOREIGN KEY (Food_ID) REFERENCES food_listings(Food_ID),
+        FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID)
+    )
+    ''',
+]
+
+def create_tables(cursor):
+    for ddl in TABLES:
+        cursor.execute(ddl)
+
+def sync_database():
+    """Apply only the rows that changed in the CSV files since the last run"""
+    conn = sqlite3.connect('food_waste.db')
+    try:
+        results = sync_all(conn)
+    finally:
+        conn.close()
+    print(f"\nSync complete: {sum(result.changed for result in results):,} row(s) changed")
 
 def create_database():
     try:
@@ -14,56 +77,13 @@ def create_database():
         cursor.execute('DROP TABLE IF EXISTS providers')
         cursor.execute('DROP TABLE IF EXISTS receivers')
         
-        # Create tables based on your CSV structure
-        cursor.execute('''
-        CREATE TABLE providers (
-            Provider_ID INTEGER PRIMARY KEY,
-            Name TEXT NOT NULL,
-            Type TEXT,
-            Address TEXT,
-            City TEXT,
-            Contact TEXT
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE food_listings (
-            Food_ID INTEGER PRIMARY KEY,
-            Food_Name TEXT NOT NULL,
-            Quantity INTEGER,
-            Expiry_Date TEXT,
-            Provider_ID INTEGER,
-            Provider_Type TEXT,
-            Location TEXT,
-            Food_Type TEXT,
-            Meal_Type TEXT,
-            FOREIGN KEY (Provider_ID) REFERENCES providers(Provider_ID)
-        )
-        ''')
+        # Dropping the tables also dropped their indexes; re-run every migration
+        cursor.execute('PRAGMA user_version = 0')
+        drop_sync_state(cursor)
         
-        cursor.execute('''
-        CREATE TABLE receivers (
-            Receiver_ID INTEGER PRIMARY KEY,
-            Name TEXT NOT NULL,
-            Type TEXT,
-            City TEXT,
-            Contact TEXT
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE claims (
-            Claim_ID INTEGER PRIMARY KEY,
-            Food_ID INTEGER,
-            Receiver_ID INTEGER,
-            Status TEXT,
-            Timestamp TEXT,
-            FOREIGN KEY (Food_ID) REFERENCES food_listings(Food_ID),
-            FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID)
-        )
-        ''')
+        # Create tables based on your CSV structure
+        create_tables(cursor)
         
-        # Load CSV data into DataFrames
         print("Loading CSV files...")
         
         # Check if files exist
@@ -74,55 +94,12 @@ def create_database():
             else:
                 print(f"Warning: {file} not found!")
         
-        # Load data with error handling
-        try:
-            providers_df = pd.read_csv('providers.csv')
-            print(f"Providers CSV shape: {providers_df.shape}")
-            print(f"Providers columns: {list(providers_df.columns)}")
-        except Exception as e:
-            print(f"Error loading providers.csv: {e}")
-            providers_df = pd.DataFrame()
-        
-        try:
-            food_listings_df = pd.read_csv('food_listings.csv')
-            print(f"Food Listings CSV shape: {food_listings_df.shape}")
-            print(f"Food Listings columns: {list(food_listings_df.columns)}")
-        except Exception as e:
-            print(f"Error loading food_listings.csv: {e}")
-            food_listings_df = pd.DataFrame()
-        
-        try:
-            receivers_df = pd.read_csv('receivers.csv')
-            print(f"Receivers CSV shape: {receivers_df.shape}")
-            print(f"Receivers columns: {list(receivers_df.columns)}")
-        except Exception as e:
-            print(f"Error loading receivers.csv: {e}")
-            receivers_df = pd.DataFrame()
-        
-        try:
-            claims_df = pd.read_csv('claims.csv')
-            print(f"Claims CSV shape: {claims_df.shape}")
-            print(f"Claims columns: {list(claims_df.columns)}")
-        except Exception as e:
-            print(f"Error loading claims.csv: {e}")
-            claims_df = pd.DataFrame()
-        
-        # Insert data into tables if DataFrames are not empty
-        if not providers_df.empty:
-            providers_df.to_sql('providers', conn, if_exists='append', index=False)
-            print(f"Inserted {len(providers_df)} providers")
-        
-        if not food_listings_df.empty:
-            food_listings_df.to_sql('food_listings', conn, if_exists='append', index=False)
-            print(f"Inserted {len(food_listings_df)} food listings")
-        
-        if not receivers_df.empty:
-            receivers_df.to_sql('receivers', conn, if_exists='append', index=False)
-            print(f"Inserted {len(receivers_df)} receivers")
+        # Stream the CSV files into the new tables; indexes and summary tables are built after the load
+        conn.commit()
+        ingest(conn)
         
-        if not claims_df.empty:
-            claims_df.to_sql('claims', conn, if_exists='append', index=False)
-            print(f"Inserted {len(claims_df)} claims")
+        # Record what was loaded so later runs with --sync only apply changes
+        sync_all(conn, baseline=True, report=lambda message: None)
         
         # Verify data insertion
         print("\nVerifying data insertion:")
@@ -142,8 +119,7 @@ def create_database():
         claims_count = cursor.fetchone()[0]
         print(f"Claims: {claims_count} rows")
         
-        # Commit changes and close connection
-        conn.commit()
+        # Close connection
         conn.close()
         
         print("\nDatabase created and populated successfully!")
@@ -153,4 +129,8 @@ def create_database():
         raise
 
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    # --sync applies CSV changes in place; the default drops and reloads everything
+    if '--sync' in sys.argv[1:]:
+        sync_database()
+    else:
+        create_database()
\ No newline at end of file
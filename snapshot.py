@@ -0,0 +1,371 @@
+"""Columnar snapshot of the reporting joins, answered with NumPy group-bys.
+
+The reports in db_queries.py join claims, food_listings, providers and
+receivers on every call and return object-dtype DataFrames. A snapshot
+stores those joins once, denormalized, as two column sets:
+
+    listings  food_listings LEFT JOIN providers
+    claims    claims LEFT JOIN food_listings, providers, receivers
+
+Text columns are dictionary-encoded: int32 codes (-1 for NULL) plus an array
+of distinct values. Numbers are float64 (NaN for NULL) and primary keys are
+int64. Each column set is one .npz file in <database>.snapshot/, and
+meta.json records the change_log Seq it is current to. Reports are
+bincounts over the codes; reports come back with the same column dtypes as
+their SQL versions (decoder.coerce): Categorical text, datetime64 dates.
+
+refresh() reads change_log (see changelog.py) and re-exports only the rows
+touched since the snapshot's Seq. Changed providers and receivers reach the
+listings and claims that copy their columns. A RESET entry, a log trimmed
+past the snapshot's Seq, or a change set larger than FULL_REFRESH_FRACTION
+of the rows, triggers a full export.
+
+    python snapshot.py [database] [--full] [--check]
+"""
+import argparse
+import json
+import numbers
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from changelog import changes_since, last_seq
+from db_pool import DEFAULT_DB_PATH
+from decoder import coerce
+
+EXPORT_CHUNK_ROWS = 200_000
+FULL_REFRESH_FRACTION = 0.25
+
+# column set -> (primary key, export SQL with a {where} slot, {column: kind}).
+# Kinds: "pk" int64, "num" float64 with NaN, "text" dictionary-encoded, "flag" bool.
+TABLES = {
+    "listings": ("Food_ID", """
+        SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Provider_ID, f.Provider_Type,
+               f.Location, f.Food_Type, f.Meal_Type, p.Name AS Provider_Name, p.City AS Provider_City,
+               p.Provider_ID IS NOT NULL AS Has_Provider
+        FROM food_listings f
+        LEFT JOIN providers p ON p.Provider_ID = f.Provider_ID
+        {where}""", {
+        "Food_ID": "pk", "Food_Name": "text", "Quantity": "num", "Expiry_Date": "text",
+        "Provider_ID": "num", "Provider_Type": "text", "Location": "text", "Food_Type": "text",
+        "Meal_Type": "text", "Provider_Name": "text", "Provider_City": "text", "Has_Provider": "flag",
+    }),
+    "claims": ("Claim_ID", """
+        SELECT c.Claim_ID, c.Status, c.Timestamp, date(c.Timestamp) AS Claim_Date,
+               c.Food_ID, f.Food_Name, f.Food_Type, f.Meal_Type, f.Quantity, f.Expiry_Date,
+               p.Provider_ID, p.Name AS Provider_Name, p.City AS Provider_City,
+               c.Receiver_ID, r.Name AS Receiver_Name, r.City AS Receiver_City,
+               f.Food_ID IS NOT NULL AND p.Provider_ID IS NOT NULL AND r.Receiver_ID IS NOT NULL AS Joined
+        FROM claims c
+        LEFT JOIN food_listings f ON f.Food_ID = c.Food_ID
+        LEFT JOIN providers p ON p.Provider_ID = f.Provider_ID
+        LEFT JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
+        {where}""", {
+        "Claim_ID": "pk", "Status": "text", "Timestamp": "text", "Claim_Date": "text",
+        "Food_ID": "num", "Food_Name": "text", "Food_Type": "text", "Meal_Type": "text",
+        "Quantity": "num", "Expiry_Date": "text", "Provider_ID": "num", "Provider_Name": "text",
+        "Provider_City": "text", "Receiver_ID": "num", "Receiver_Name": "text", "Receiver_City": "text",
+        "Joined": "flag",
+    }),
+}
+
+CLAIMS_FULL_DETAILS = ["Claim_ID", "Status", "Timestamp", "Food_ID", "Food_Name", "Food_Type", "Meal_Type",
+                       "Quantity", "Expiry_Date", "Provider_ID", "Provider_Name", "Provider_City",
+                       "Receiver_ID", "Receiver_Name", "Receiver_City"]
+FOOD_WITH_PROVIDER_DETAILS = ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+                              "Location", "Food_Type", "Meal_Type", "Provider_Name", "Provider_City"]
+
+
+# -- encoding ----------------------------------------------------------------
+
+class _TextColumn:
+    """Growing dictionary encoder for one text column"""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.index = {value: code for code, value in enumerate(self.values)}
+        self._array = None
+
+    def encode(self, series):
+        codes, uniques = pd.factorize(series)
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        mapping[-1] = -1  # factorize's NULL code indexes the last slot
+        for i, value in enumerate(uniques):
+            value = str(value)
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            mapping[i] = code
+        return mapping[codes]
+
+    def array(self):
+        """The distinct values as a NumPy string array (rebuilt only after new values)"""
+        if self._array is None or len(self._array) != len(self.values):
+            self._array = np.array(self.values, dtype=str) if self.values else np.array([], dtype="<U1")
+        return self._array
+
+
+def _export(conn, name, where="", params=(), dictionaries=None):
+    """Read one column set from SQL; return ({column: array}, {text column: _TextColumn})"""
+    pk, sql, kinds = TABLES[name]
+    dictionaries = dictionaries or {column: _TextColumn() for column, kind in kinds.items() if kind == "text"}
+    parts = {column: [] for column in kinds}
+    for chunk in pd.read_sql(sql.format(where=where), conn, params=params, chunksize=EXPORT_CHUNK_ROWS):
+        for column, kind in kinds.items():
+            if kind == "text":
+                parts[column].append(dictionaries[column].encode(chunk[column]))
+            elif kind == "pk":
+                parts[column].append(chunk[column].to_numpy(dtype=np.int64))
+            elif kind == "num":
+                parts[column].append(pd.to_numeric(chunk[column]).to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                parts[column].append(chunk[column].fillna(0).to_numpy(dtype=bool))
+    empty = {"text": np.int32, "pk": np.int64, "num": np.float64, "flag": bool}
+    columns = {column: np.concatenate(parts[column]) if parts[column] else np.empty(0, dtype=empty[kind])
+               for column, kind in kinds.items()}
+    return columns, dictionaries
+
+
+# -- snapshot ----------------------------------------------------------------
+
+class Snapshot:
+    """Columnar copy of the reporting joins, stored in <db_path>.snapshot/"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, path=None):
+        self.db_path = db_path
+        self.path = path or f"{db_path}.snapshot"
+        self.seq = None
+        self.columns = {}        # column set -> {column: codes or values}
+        self.dictionaries = {}   # column set -> {text column: _TextColumn}
+        self._lock = threading.Lock()
+
+    # storage
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self):
+        """Read the files on disk; return False when there is no snapshot yet"""
+        try:
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+            columns, dictionaries = {}, {}
+            for name, (_, _, kinds) in TABLES.items():
+                with np.load(self._file(f"{name}.npz"), allow_pickle=False) as data:
+                    columns[name] = {column: data[column] for column in kinds}
+                    dictionaries[name] = {column: _TextColumn(data[f"{column}.values"].tolist())
+                                          for column, kind in kinds.items() if kind == "text"}
+        except (OSError, KeyError, ValueError):
+            return False
+        self.columns, self.dictionaries, self.seq = columns, dictionaries, meta["seq"]
+        return True
+
+    def save(self):
+        """Write each column set, then meta.json. A crash in between leaves the
+        old Seq behind, and re-applying changes by primary key is idempotent."""
+        os.makedirs(self.path, exist_ok=True)
+        for name, (_, _, kinds) in TABLES.items():
+            arrays = dict(self.columns[name])
+            for column, dictionary in self.dictionaries[name].items():
+                arrays[f"{column}.values"] = dictionary.array()
+            temp = self._file(f"{name}.tmp.npz")
+            np.savez(temp, **arrays)
+            os.replace(temp, self._file(f"{name}.npz"))
+        meta = {"seq": self.seq, "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "rows": {name: len(columns[TABLES[name][0]]) for name, columns in self.columns.items()}}
+        with open(self._file("meta.tmp.json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(self._file("meta.tmp.json"), self._file("meta.json"))
+
+    # building
+
+    def export(self, conn):
+        """Full rebuild from SQL"""
+        seq = last_seq(conn)
+        columns, dictionaries = {}, {}
+        for name in TABLES:
+            columns[name], dictionaries[name] = _export(conn, name)
+        self.columns, self.dictionaries, self.seq = columns, dictionaries, seq
+        self.save()
+
+    def _affected(self, conn, changed):
+        """Primary keys of the listings and claims rows to re-export"""
+        def ids(sql, values):
+            values = list(values)
+            found = set()
+            for start in range(0, len(values), 500):
+                batch = values[start:start + 500]
+                found.update(row[0] for row in conn.execute(sql.format(marks=",".join("?" * len(batch))), batch))
+            return found
+
+        listings = set(changed["food_listings"])
+        listings |= ids("SELECT Food_ID FROM food_listings WHERE Provider_ID IN ({marks})", changed["providers"])
+        claims = set(changed["claims"])
+        claims |= ids("SELECT Claim_ID FROM claims WHERE Food_ID IN ({marks})", listings)
+        claims |= ids("SELECT Claim_ID FROM claims WHERE Receiver_ID IN ({marks})", changed["receivers"])
+        return {"listings": listings, "claims": claims}
+
+    def _apply(self, conn, name, ids):
+        """Replace the rows of one column set whose primary key is in ids"""
+        pk = TABLES[name][0]
+        old = self.columns[name]
+        ids = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        keep = ~np.isin(old[pk], ids)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS snapshot_ids (Row_ID INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.snapshot_ids")
+        conn.executemany("INSERT INTO temp.snapshot_ids VALUES (?)", ((int(i),) for i in ids))
+        alias = "f" if name == "listings" else "c"
+        fresh, _ = _export(conn, name, f"WHERE {alias}.{pk} IN (SELECT Row_ID FROM temp.snapshot_ids)",
+                           dictionaries=self.dictionaries[name])
+        conn.execute("DROP TABLE temp.snapshot_ids")
+        merged = {column: np.concatenate([values[keep], fresh[column]]) for column, values in old.items()}
+        order = np.argsort(merged[pk], kind="stable")
+        self.columns[name] = {column: values[order] for column, values in merged.items()}
+
+    def refresh(self, conn, full=False):
+        """Bring the snapshot up to date; return "current", "incremental" or "full" """
+        with self._lock:
+            if self.seq is None and not full:
+                self.load()
+            if full or self.seq is None:
+                self.export(conn)
+                return "full"
+            if last_seq(conn) == self.seq:
+                return "current"
+            reset, changed, seq = changes_since(conn, self.seq)
+            if reset:
+                self.export(conn)
+                return "full"
+            affected = self._affected(conn, changed)
+            total = sum(len(self.columns[name][TABLES[name][0]]) for name in TABLES)
+            if sum(len(ids) for ids in affected.values()) > FULL_REFRESH_FRACTION * max(total, 1):
+                self.export(conn)
+                return "full"
+            for name, ids in affected.items():
+                if ids:
+                    self._apply(conn, name, ids)
+            self.seq = seq
+            self.save()
+            return "incremental"
+
+    # reports
+
+    def _text(self, name, column, rows=None):
+        codes = self.columns[name][column] if rows is None else self.columns[name][column][rows]
+        return pd.Categorical.from_codes(codes, categories=self.dictionaries[name][column].array())
+
+    def _number(self, name, column, rows=None):
+        values = self.columns[name][column] if rows is None else self.columns[name][column][rows]
+        if not np.isnan(values).any():
+            return values.astype(np.int64)
+        return values
+
+    def _count_by(self, name, column, label, rows=None, by_count=True):
+        """GROUP BY column with COUNT(*); NULL is its own group, like SQL"""
+        codes = self.columns[name][column]
+        if rows is not None:
+            codes = codes[rows]
+        values = self.dictionaries[name][column].values
+        counts = np.bincount(codes + 1, minlength=len(values) + 1)
+        present = np.flatnonzero(counts)
+        keys = [None if i == 0 else values[i - 1] for i in present]
+        result = pd.DataFrame({column: keys, label: counts[present]})
+        if by_count:
+            return coerce(result.sort_values(label, ascending=False, kind="stable", ignore_index=True))
+        # ORDER BY the key itself; NULL sorts first as in SQLite
+        return coerce(result.sort_values(column, na_position="first", kind="stable", ignore_index=True))
+
+    def _rows(self, name, columns, rows):
+        kinds = TABLES[name][2]
+        return coerce(pd.DataFrame({column: self._text(name, column, rows) if kinds[column] == "text"
+                                    else self._number(name, column, rows) for column in columns}))
+
+    def donations_by_city(self):
+        result = self._count_by("listings", "Provider_City", "Total_Donations",
+                                rows=self.columns["listings"]["Has_Provider"])
+        return result.rename(columns={"Provider_City": "City"})
+
+    def donations_by_food_type(self):
+        return self._count_by("listings", "Food_Type", "Total_Donations")
+
+    def donations_by_meal_type(self):
+        return self._count_by("listings", "Meal_Type", "Total_Donations")
+
+    def claims_daily_trend(self):
+        return self._count_by("claims", "Claim_Date", "Total_Claims", by_count=False)
+
+    def claims_full_details(self):
+        return self._rows("claims", CLAIMS_FULL_DETAILS, self.columns["claims"]["Joined"])
+
+    def food_with_provider_details(self):
+        return self._rows("listings", FOOD_WITH_PROVIDER_DETAILS, self.columns["listings"]["Has_Provider"])
+
+
+REPORTS = {
+    "donations_by_city": "get_donations_by_city",
+    "donations_by_food_type": "get_donations_by_food_type",
+    "donations_by_meal_type": "get_donations_by_meal_type",
+    "claims_daily_trend": "get_claims_daily_trend",
+    "claims_full_details": "get_claims_full_details",
+    "food_with_provider_details": "get_food_with_provider_details",
+}
+
+
+def _sort_key(value):
+    if isinstance(value, numbers.Number):
+        return 1, float(value), ""
+    return (0, 0.0, "") if value is None else (2, 0.0, str(value))
+
+
+def canonical(frame):
+    """Order-independent, dtype-independent form of a report for comparison"""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return sorted((tuple(row) for row in frame.itertuples(index=False)),
+                  key=lambda row: [_sort_key(value) for value in row])
+
+
+def check_snapshot(db_path=DEFAULT_DB_PATH, snapshot=None):
+    """Compare every snapshot report with its SQL query; return the names that differ"""
+    from db_queries import DatabaseManager
+    from query_cache import QueryCache
+
+    snapshot = snapshot or Snapshot(db_path)
+    with sqlite3.connect(db_path) as conn:
+        snapshot.refresh(conn)
+    sql = DatabaseManager(db_path, cache=QueryCache(ttl=0))
+    return [report for report, method in REPORTS.items()
+            if canonical(getattr(snapshot, report)()) != canonical(getattr(sql, method)())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the columnar reporting snapshot")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--full", action="store_true", help="rebuild instead of applying the change log")
+    parser.add_argument("--check", action="store_true", help="compare every report with its SQL query")
+    args = parser.parse_args(argv)
+
+    snapshot = Snapshot(args.database)
+    conn = sqlite3.connect(args.database)
+    start = time.perf_counter()
+    kind = snapshot.refresh(conn, full=args.full)
+    conn.close()
+    rows = ", ".join(f"{len(columns[TABLES[name][0]]):,} {name}" for name, columns in snapshot.columns.items())
+    print(f"Snapshot {kind} at Seq {snapshot.seq} in {time.perf_counter() - start:.2f}s ({rows})")
+
+    if args.check:
+        mismatched = check_snapshot(args.database, snapshot)
+        if mismatched:
+            print(f"Reports differing from SQL: {', '.join(mismatched)}")
+            return 1
+        print("All snapshot reports match their SQL queries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""Incremental CSV -> SQLite sync.
+
+Instead of dropping and reloading, each CSV is compared with what the last
+sync saw. A per-file watermark (size, mtime, content hash) makes an unchanged
+file a single os.stat(). For a changed file, every row is hashed and staged
+in a temp table. Rows whose primary key is new or whose hash changed are
+upserted, and rows that disappeared from the CSV are deleted. All of it
+happens in one transaction per file. Rows created in the app (never seen in a
+CSV) are left alone. The first sync of a file into a table that already has
+rows (a database from before sync, or loaded some other way) only records a
+baseline: the CSV may be older than edits made in the app since.
+
+The upsert fires the triggers that keep the derived tables current, and in
+its DO UPDATE branch their INSERT OR IGNORE / OR REPLACE would not resolve a
+conflict. check_sync() syncs a copy of the database after editing a copy of
+each CSV, and compares every derived table with a full recompute.
+
+    python sync.py [database] [--csv-dir DIR] [--force] [--table NAME ...]
+    python sync.py [database] --check            # sync an edited copy, then check app edits and derived tables
+"""
+import argparse
+import csv
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+
+import aggregates
+import claims_fact
+import expiry
+import gazetteer
+import reservations
+import search
+from changelog import last_seq
+from ingest import SOURCES
+from migrations import migrate
+
+STAGE_ROWS = 50_000
+HASH_BLOCK = 1024 * 1024
+
+SYNC_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        Source TEXT PRIMARY KEY,
+        Size INTEGER NOT NULL,
+        Mtime_NS INTEGER NOT NULL,
+        File_Hash TEXT NOT NULL,
+        Synced_At TEXT NOT NULL
+    )""",
+    # Content hash of every CSV row as of the last sync, by primary key
+    """CREATE TABLE IF NOT EXISTS sync_row_hash (
+        Source TEXT NOT NULL,
+        Row_ID INTEGER NOT NULL,
+        Row_Hash INTEGER NOT NULL,
+        PRIMARY KEY (Source, Row_ID)
+    ) WITHOUT ROWID""",
+]
+
+
+class SyncResult:
+    """Counts of what one sync_csv() call changed"""
+
+    __slots__ = ("source", "table", "skipped", "inserted", "updated", "deleted", "unchanged", "seconds")
+
+    def __init__(self, source, table, skipped=False, inserted=0, updated=0, deleted=0, unchanged=0, seconds=0.0):
+        self.source = source
+        self.table = table
+        self.skipped = skipped
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+        self.unchanged = unchanged
+        self.seconds = seconds
+
+    @property
+    def changed(self):
+        return self.inserted + self.updated + self.deleted
+
+    def __repr__(self):
+        if self.skipped:
+            return f"{self.source}: unchanged since last sync ({self.seconds * 1000:.1f} ms)"
+        return (f"{self.source}: {self.inserted:,} inserted, {self.updated:,} updated, "
+                f"{self.deleted:,} deleted, {self.unchanged:,} unchanged in {self.seconds:.2f}s")
+
+
+def create_sync_tables(cursor):
+    for ddl in SYNC_SCHEMA:
+        cursor.execute(ddl)
+
+
+def drop_sync_state(cursor):
+    """Forget every watermark and row hash; the next sync compares from scratch"""
+    cursor.execute("DROP TABLE IF EXISTS sync_row_hash")
+    cursor.execute("DROP TABLE IF EXISTS sync_state")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hash(row):
+    """Signed 64-bit hash of a CSV row's raw field values"""
+    digest = hashlib.blake2b("\x1f".join(row).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _primary_key(conn, table):
+    for _, name, _, _, _, pk in conn.execute(f"PRAGMA table_info({table})"):
+        if pk:
+            return name
+    raise ValueError(f"Table {table} has no primary key")
+
+
+def _watermark(conn, source):
+    return conn.execute("SELECT Size, Mtime_NS, File_Hash FROM sync_state WHERE Source = ?",
+                        (source,)).fetchone()
+
+
+def _save_watermark(conn, source, stat, digest):
+    conn.execute("INSERT OR REPLACE INTO sync_state (Source, Size, Mtime_NS, File_Hash, Synced_At) "
+                 "VALUES (?, ?, ?, ?, ?)",
+                 (source, stat.st_size, stat.st_mtime_ns, digest, datetime.now().isoformat(timespec='seconds')))
+
+
+def _stage(conn, table, path):
+    """Hash every CSV row into temp.sync_stage; return (pk column, CSV columns)"""
+    table_columns = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+    pk = _primary_key(conn, table)
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        unknown = [name for name in header if name not in table_columns]
+        if unknown:
+            raise ValueError(f"{path}: columns {unknown} are not in table {table}")
+        if pk not in header:
+            raise ValueError(f"{path}: primary key column {pk} is missing")
+        pk_index = header.index(pk)
+
+        conn.execute("DROP TABLE IF EXISTS temp.sync_stage")
+        # Same declared types as the table, so values compare as they will be stored
+        columns = ", ".join(f'"{name}" {table_columns[name]}' for name in header)
+        conn.execute(f'CREATE TEMP TABLE sync_stage (Row_Hash INTEGER NOT NULL, {columns}, PRIMARY KEY ("{pk}"))')
+        insert = f"INSERT OR REPLACE INTO sync_stage VALUES ({', '.join('?' * (len(header) + 1))})"
+        rows = ([row_hash(row)] + [value if value != '' else None for value in row]
+                for row in reader if row and row[pk_index] != '')
+        while True:
+            try:
+                if conn.executemany(insert, islice(rows, STAGE_ROWS)).rowcount <= 0:
+                    break
+            except sqlite3.ProgrammingError as e:
+                raise ValueError(f"{path}: malformed row: {e}") from e
+    return pk, header
+
+
+def sync_csv(conn, table, path, force=False, baseline=False):
+    """Apply the changes in one CSV to table and return a SyncResult.
+
+    force ignores the watermark. baseline only records the file's watermark
+    and row hashes (for a table that was just bulk-loaded from this file)
+    without touching the table; it is implied when the file has never been
+    synced and the table already has rows.
+    """
+    source = os.path.basename(path)
+    start = time.perf_counter()
+    create_sync_tables(conn.cursor())
+    conn.commit()
+
+    stat = os.stat(path)
+    watermark = _watermark(conn, source)
+    if watermark is None and not baseline:
+        # Nothing says which of the table's rows came from this file; don't overwrite app edits with it
+        baseline = conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0] == 1
+    if not force and watermark and watermark[:2] == (stat.st_size, stat.st_mtime_ns):
+        return SyncResult(source, table, skipped=True, seconds=time.perf_counter() - start)
+    digest = file_hash(path)
+    if not force and watermark and watermark[2] == digest:
+        _save_watermark(conn, source, stat, digest)
+        conn.commit()
+        return SyncResult(source, table, skipped=True, seconds=time.perf_counter() - start)
+
+    result = SyncResult(source, table)
+    try:
+        pk, header = _stage(conn, table, path)
+        # Changed or new rows, then rows that left the CSV
+        conn.execute(f"""
+            CREATE TEMP TABLE sync_changed AS
+            SELECT s."{pk}" AS Row_ID FROM sync_stage s
+            LEFT JOIN sync_row_hash h ON h.Source = ? AND h.Row_ID = s."{pk}"
+            WHERE h.Row_Hash IS NOT s.Row_Hash""", (source,))
+        conn.execute(f"""
+            CREATE TEMP TABLE sync_deleted AS
+            SELECT Row_ID FROM sync_row_hash
+            WHERE Source = ? AND Row_ID NOT IN (SELECT "{pk}" FROM sync_stage)""", (source,))
+        staged = conn.execute("SELECT COUNT(*) FROM sync_stage").fetchone()[0]
+        if baseline:
+            result.unchanged = staged
+        else:
+            changed = conn.execute("SELECT COUNT(*) FROM sync_changed").fetchone()[0]
+            result.inserted = conn.execute(f"""
+                SELECT COUNT(*) FROM sync_changed
+                WHERE Row_ID NOT IN (SELECT "{pk}" FROM {table})""").fetchone()[0]
+            result.updated = changed - result.inserted
+            result.deleted = conn.execute("SELECT COUNT(*) FROM sync_deleted").fetchone()[0]
+            result.unchanged = staged - changed
+
+            columns = ", ".join(f'"{name}"' for name in header)
+            updates = ", ".join(f'"{name}" = excluded."{name}"' for name in header if name != pk)
+            conn.execute(f"""
+                INSERT INTO {table} ({columns})
+                SELECT {columns} FROM sync_stage
+                WHERE "{pk}" IN (SELECT Row_ID FROM sync_changed)
+                ORDER BY "{pk}"
+                ON CONFLICT ("{pk}") DO UPDATE SET {updates}""")
+            conn.execute(f'DELETE FROM {table} WHERE "{pk}" IN (SELECT Row_ID FROM sync_deleted)')
+        conn.execute(f"""
+            INSERT OR REPLACE INTO sync_row_hash (Source, Row_ID, Row_Hash)
+            SELECT ?, "{pk}", Row_Hash FROM sync_stage
+            WHERE "{pk}" IN (SELECT Row_ID FROM sync_changed)""", (source,))
+        conn.execute("DELETE FROM sync_row_hash WHERE Source = ? AND Row_ID IN (SELECT Row_ID FROM sync_deleted)",
+                     (source,))
+        _save_watermark(conn, source, stat, digest)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        for name in ("sync_stage", "sync_changed", "sync_deleted"):
+            conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def sync_all(conn, sources=SOURCES, csv_dir='.', force=False, baseline=False, report=print):
+    """Sync each (table, csv file) of sources in foreign-key order; return the SyncResults"""
+    results = []
+    for table, filename in sources:
+        path = os.path.join(csv_dir, filename)
+        if not os.path.exists(path):
+            report(f"Warning: {path} not found!")
+            continue
+        result = sync_csv(conn, table, path, force, baseline)
+        report(repr(result))
+        results.append(result)
+    return results
+
+
+# CSV column check_sync changes, per table
+CHECK_COLUMNS = {"providers": "City", "receivers": "City", "food_listings": "Location", "claims": "Status"}
+
+
+def _edit_csv(path, column):
+    """Give the first row the second row's column value, and append a copy of the second row with a new ID"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    header = rows[0]
+    if len(rows) < 3:
+        return
+    position = header.index(column)
+    rows[1][position] = rows[2][position]
+    rows.append([str(max(int(row[0]) for row in rows[1:]) + 1)] + rows[2][1:])
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+
+
+def _derived_differences(conn):
+    """{derived table: description} where a derived table differs from a full recompute"""
+    differences = {table: f"{len(missing)} missing, {len(unexpected)} unexpected"
+                   for table, (missing, unexpected) in aggregates.check_aggregates(conn).items()}
+    for name, (missing, unexpected) in [("claims_fact", claims_fact.check_fact(conn)),
+                                        ("expiry_queue", expiry.check_queue(conn)),
+                                        ("food_stock", reservations.check_stock(conn))]:
+        if missing or unexpected:
+            differences[name] = f"{len(missing)} missing, {len(unexpected)} unexpected"
+    differences.update(search.check_indexes(conn))
+    differences.update({gazetteer.GEO_TABLES[table]: f"{missing} missing, {unexpected} unexpected"
+                        for table, (missing, unexpected) in gazetteer.check(conn).items()})
+    return differences
+
+
+APP_EDIT = "Edited in the app"
+
+
+def _edit_table(conn, table, path, column):
+    """Change column of the CSV's first row and delete its last row in table, as the app would; return their IDs"""
+    pk = _primary_key(conn, table)
+    with open(path, newline="", encoding="utf-8") as f:
+        ids = [row[0] for row in islice(csv.reader(f), 1, None) if row]
+    first, last = int(ids[0]), int(ids[-1])
+    conn.execute(f'UPDATE {table} SET "{column}" = ? WHERE "{pk}" = ?', (APP_EDIT, first))
+    conn.execute(f'DELETE FROM {table} WHERE "{pk}" = ?', (last,))
+    conn.commit()
+    return first, last
+
+
+def check_sync(db_path="food_waste.db", csv_dir=".", sources=SOURCES, report=print):
+    """Sync a copy of db_path, checking that first syncs keep app edits and later ones keep derived tables right.
+
+    The copy forgets its sync state, gets a row changed and a row deleted per
+    table, and is synced: nothing may be written. Then a copy of each CSV
+    gets a changed column and an appended row, and is synced again. Returns
+    {what: problem}: the error that stopped a sync, an app edit the first
+    sync undid, or a derived table that no longer matches a full recompute.
+    The database and CSVs are not touched.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, os.path.basename(db_path))
+        shutil.copy(db_path, copy)
+        for _, filename in sources:
+            shutil.copy(os.path.join(csv_dir, filename), tmp)
+        conn = sqlite3.connect(copy)
+        try:
+            migrate(conn)
+            create_sync_tables(conn.cursor())
+            conn.execute("DELETE FROM sync_state")
+            conn.execute("DELETE FROM sync_row_hash")
+            edits = {table: _edit_table(conn, table, os.path.join(tmp, filename), CHECK_COLUMNS[table])
+                     for table, filename in sources}
+            problems = {}
+            seq = last_seq(conn)
+            for result in sync_all(conn, sources, tmp, report=lambda message: None):
+                report(f"first sync, {result!r}")
+                if result.changed:
+                    problems[f"first sync of {result.source}"] = f"{result.changed} row(s) written"
+            for table, (edited, deleted) in edits.items():
+                pk = _primary_key(conn, table)
+                row = conn.execute(f'SELECT "{CHECK_COLUMNS[table]}" FROM {table} WHERE "{pk}" = ?', (edited,))
+                if (row.fetchone() or [None])[0] != APP_EDIT:
+                    problems[f"{table} row {edited}"] = "edit made in the app was undone by the first sync"
+                if conn.execute(f'SELECT 1 FROM {table} WHERE "{pk}" = ?', (deleted,)).fetchone():
+                    problems[f"{table} row {deleted}"] = "deleted in the app, put back by the first sync"
+            if last_seq(conn) != seq:
+                problems["change_log"] = f"{last_seq(conn) - seq} entries logged by the first sync"
+
+            for table, filename in sources:
+                _edit_csv(os.path.join(tmp, filename), CHECK_COLUMNS[table])
+            for table, filename in sources:
+                try:
+                    report(repr(sync_csv(conn, table, os.path.join(tmp, filename), force=True)))
+                except sqlite3.Error as e:
+                    problems[filename] = f"sync failed: {e}"
+            problems.update(_derived_differences(conn))
+            return problems
+        finally:
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply CSV changes to the food_waste database")
+    parser.add_argument("database", nargs="?", default="food_waste.db")
+    parser.add_argument("--csv-dir", default=".")
+    parser.add_argument("--force", action="store_true", help="re-hash files even if their watermark matches")
+    parser.add_argument("--table", action="append", choices=[table for table, _ in SOURCES],
+                        help="sync only this table (repeatable)")
+    parser.add_argument("--check", action="store_true",
+                        help="sync edited copies of the database and CSVs, then check app edits and derived tables")
+    args = parser.parse_args(argv)
+
+    sources = [source for source in SOURCES if not args.table or source[0] in args.table]
+    if args.check:
+        problems = check_sync(args.database, args.csv_dir, sources)
+        for what, problem in problems.items():
+            print(f"{what}: {problem}")
+        if problems:
+            return 1
+        print("Every change synced; every derived table matches a full recompute")
+        return 0
+    conn = sqlite3.connect(args.database)
+    try:
+        sync_all(conn, sources, args.csv_dir, args.force)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error syncing CSV files: {e}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
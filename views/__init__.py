@@ -0,0 +1,24 @@
+"""One module per sidebar page, imported the first time that page is shown.
+
+Each module has a render() that draws the page. Keeping them apart means a
+worker only imports plotly and the other page dependencies once a page
+that needs them is opened.
+"""
+import importlib
+
+# Sidebar label -> module
+PAGES = {
+    "Dashboard": "views.dashboard",
+    "Providers": "views.providers",
+    "Receivers": "views.receivers",
+    "Food Listings": "views.food_listings",
+    "Claims": "views.claims",
+    "Analytics": "views.analytics",
+    "Map View": "views.map_view",
+    "Recommendations": "views.recommendations",
+    "Bulk Edit": "views.bulk_edit",
+}
+
+
+def render(page):
+    importlib.import_module(PAGES[page]).render()
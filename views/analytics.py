@@ -0,0 +1,117 @@
+"""Analytics page: rates, city and claim breakdowns, expiry lists."""
+import plotly.express as px
+import streamlit as st
+
+from data_layer import (get_kpi_data, get_city_distribution, get_expiry_trend, get_food_type_distribution,
+                        get_meal_type_distribution, get_provider_type_distribution, get_claim_status_distribution,
+                        get_top_receivers, get_claims_by_receiver_city, get_recently_expired, get_expiring_within)
+from views.tables import date_columns
+
+
+def render():
+    st.header("Food Wastage Analytics")
+    
+    # Get KPI data
+    kpi_data = get_kpi_data()
+    
+    # Calculate rates
+    claim_rate = kpi_data.claim_rate
+    pending_rate = kpi_data.pending_rate
+    cancellation_rate = kpi_data.cancellation_rate
+    expiry_rate = kpi_data.expiry_rate
+    
+    # Display rates
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Claim Rate", f"{claim_rate:.1f}%")
+    
+    with col2:
+        st.metric("Pending Rate", f"{pending_rate:.1f}%")
+    
+    with col3:
+        st.metric("Cancellation Rate", f"{cancellation_rate:.1f}%")
+    
+    with col4:
+        st.metric("Expiry Rate", f"{expiry_rate:.1f}%")
+    
+    # System Overview
+    st.subheader("System Overview")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        city_dist = get_city_distribution()
+        fig_city = px.bar(city_dist, x='City', y='Food_Count', title="Food Distribution by City")
+        st.plotly_chart(fig_city, use_container_width=True)
+    
+    with col2:
+        expiry_trend = get_expiry_trend()
+        fig_expiry = px.bar(expiry_trend, x='Expiry_Status', y='Count', title="Expiry Status Distribution")
+        st.plotly_chart(fig_expiry, use_container_width=True)
+    
+    # Donation Analysis
+    st.subheader("Donation Analysis")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        food_types = get_food_type_distribution()
+        fig_food_type = px.pie(food_types, values='Count', names='Food_Type', title="Food Type Distribution")
+        st.plotly_chart(fig_food_type, use_container_width=True)
+    
+    with col2:
+        meal_types = get_meal_type_distribution()
+        fig_meal_type = px.pie(meal_types, values='Count', names='Meal_Type', title="Meal Type Distribution")
+        st.plotly_chart(fig_meal_type, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        provider_types = get_provider_type_distribution()
+        fig_provider_type = px.bar(provider_types, x='Provider_Type', y='Count', title="Provider Type Distribution")
+        st.plotly_chart(fig_provider_type, use_container_width=True)
+    
+    with col2:
+        claim_status = get_claim_status_distribution()
+        fig_claim_status = px.bar(claim_status, x='Status', y='Count', title="Claim Status Distribution")
+        st.plotly_chart(fig_claim_status, use_container_width=True)
+    
+    # Claim Analysis
+    st.subheader("Claim Analysis")
+    
+    # Claims by receiver
+    claims_by_receiver = get_top_receivers(10)
+    
+    # Claims by city
+    claims_by_city = get_claims_by_receiver_city()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_receiver = px.bar(claims_by_receiver, x='Name', y='Claim_Count', title="Top Receivers by Claim Count")
+        st.plotly_chart(fig_receiver, use_container_width=True)
+    
+    with col2:
+        fig_city = px.bar(claims_by_city, x='City', y='Claim_Count', title="Claims by City")
+        st.plotly_chart(fig_city, use_container_width=True)
+    
+    # Expiry Analysis
+    st.subheader("Expiry Analysis")
+    
+    # Most recently expired food
+    display_columns = ['Food_Name', 'Expiry_Date', 'Provider_Name', 'City']
+    expired_food = get_recently_expired()[display_columns]
+    
+    # Food expiring soon
+    expiring_soon = get_expiring_within(3)[display_columns]
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Expired Food")
+        st.dataframe(expired_food, use_container_width=True, column_config=date_columns(expired_food))
+    
+    with col2:
+        st.subheader("Food Expiring Soon")
+        st.dataframe(expiring_soon, use_container_width=True, column_config=date_columns(expiring_soon))
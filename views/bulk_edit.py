@@ -0,0 +1,126 @@
+"""Bulk Edit page: edit many rows at once, import records from CSV, move claims between statuses.
+
+Each change set is one crud.apply_batch call: a single transaction with
+executemany, and the rows that failed listed by their position.
+"""
+import pandas as pd
+import streamlit as st
+
+from crud import COLUMNS, RESERVED, apply_batch, insert_many, set_claim_status
+from data_layer import get_claim_ids, get_page
+from decoder import sql_value
+from pagination import ENTITIES, MAX_PAGE_SIZE
+from views.tables import date_columns
+
+CLAIM_STATUSES = ["Pending", "Claimed", "Completed", "Cancelled"]
+
+
+def changes(table, original, edited):
+    """(inserts, updates, deletes) that turn the original rows into the edited ones"""
+    pk = ENTITIES[table][0]
+    before = {int(row[pk]): row for row in original.to_dict("records")}
+    inserts, updates, kept = [], [], set()
+    for row in edited.to_dict("records"):
+        values = {column: sql_value(column, row[column]) for column in COLUMNS[table]}
+        if sql_value(pk, row[pk]) is None:
+            inserts.append(values)
+            continue
+        row_id = int(row[pk])
+        kept.add(row_id)
+        changed = {column: value for column, value in values.items()
+                   if value != sql_value(column, before[row_id][column])}
+        if changed:
+            updates.append({pk: row_id, **changed})
+    return inserts, updates, [row_id for row_id in before if row_id not in kept]
+
+
+def report(label, result, line_offset=None):
+    """Keep a batch result in session state; show_report draws it after the rerun"""
+    errors = pd.DataFrame(result["errors"], columns=["op", "index", "error"])
+    if line_offset is not None:
+        errors.insert(2, "line", errors["index"] + line_offset)
+    st.session_state["bulk_edit_report"] = (label, result["applied"], errors)
+
+
+def show_report():
+    label, applied, errors = st.session_state.pop("bulk_edit_report", (None, 0, None))
+    if label is None:
+        return
+    if errors.empty:
+        st.success(f"{label}: {applied} row(s) written")
+        return
+    written = f"{applied} row(s) written" if applied else "nothing was written"
+    st.error(f"{label}: {len(errors)} row(s) failed, {written}")
+    st.dataframe(errors, use_container_width=True, hide_index=True)
+
+
+def edit_rows(table):
+    pk = ENTITIES[table][0]
+    st.subheader("Edit Rows")
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.number_input(f"Start after {pk}", min_value=0, key="bulk_edit_start")
+    with col2:
+        limit = st.number_input("Rows", min_value=1, max_value=MAX_PAGE_SIZE, value=100, key="bulk_edit_limit")
+    after = (int(start), int(start)) if start else None
+    rows, _ = get_page(table, after=after, page_size=int(limit))
+    # Categoricals would restrict edits to the values already present
+    rows = rows.astype({column: object for column in rows.columns
+                        if isinstance(rows[column].dtype, pd.CategoricalDtype)})
+    editor_key = f"bulk_edit_{table}_{start}_{limit}"
+    edited = st.data_editor(rows, key=editor_key, num_rows="dynamic", disabled=[pk], hide_index=True,
+                            use_container_width=True, column_config=date_columns(rows))
+    inserts, updates, deletes = changes(table, rows, edited)
+    st.caption(f"{len(inserts)} new, {len(updates)} changed, {len(deletes)} deleted")
+    atomic = st.checkbox("All or nothing", value=True, key="bulk_edit_atomic")
+    if st.button("Save changes", disabled=not (inserts or updates or deletes)):
+        report("Save changes", apply_batch(table, inserts, updates, deletes, atomic))
+        del st.session_state[editor_key]
+        st.rerun()
+
+
+def import_csv(table):
+    st.subheader("Import from CSV")
+    # Imported claims reserve their units; a Quantity column says how many (1 by default)
+    columns = COLUMNS[table] + ((RESERVED,) if table == "claims" else ())
+    upload = st.file_uploader(f"CSV with {table} columns ({', '.join(columns)})", type="csv",
+                              key=f"bulk_import_{table}")
+    if upload is None:
+        return
+    frame = pd.read_csv(upload, dtype=object)
+    known = [column for column in frame.columns if column in columns]
+    ignored = [column for column in frame.columns if column not in columns]
+    if ignored:
+        st.warning(f"Ignoring columns that are not writable in {table}: {', '.join(ignored)}")
+    st.dataframe(frame.head(20), use_container_width=True, hide_index=True)
+    atomic = st.checkbox("All or nothing", value=True, key="bulk_import_atomic")
+    if st.button(f"Import {len(frame)} rows", disabled=not known):
+        records = frame[known].astype(object).where(frame[known].notna(), None).to_dict("records")
+        # line = CSV line number (1 is the header)
+        report(f"Import into {table}", insert_many(table, records, atomic), line_offset=2)
+        st.rerun()
+
+
+def change_claim_status():
+    st.subheader("Change Claim Status")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        from_status = st.selectbox("From status", CLAIM_STATUSES, key="bulk_status_from")
+    with col2:
+        to_status = st.selectbox("To status", CLAIM_STATUSES, index=1, key="bulk_status_to")
+    with col3:
+        before = st.date_input("Only claims made before", value=None, key="bulk_status_before")
+    claim_ids = get_claim_ids(from_status, before)
+    st.caption(f"{len(claim_ids)} {from_status} claims")
+    if st.button(f"Move {len(claim_ids)} claims to {to_status}", disabled=not claim_ids or from_status == to_status):
+        report(f"{from_status} -> {to_status}", set_claim_status(claim_ids, to_status))
+        st.rerun()
+
+
+def render():
+    st.header("Bulk Edit")
+    show_report()
+    table = st.selectbox("Table", list(ENTITIES), key="bulk_edit_table")
+    edit_rows(table)
+    import_csv(table)
+    change_claim_status()
@@ -0,0 +1,86 @@
+"""Claims page: add, list, update and delete claims."""
+import streamlit as st
+
+from crud import create_claim, update_claim, delete_claim
+from data_layer import get_available, get_by_id
+from reservations import NotAvailable, ReservationConflict
+from views.tables import show_paged_table
+
+
+def render():
+    st.header("Claims Management")
+    
+    # Create new claim
+    with st.expander("Add New Claim"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            food_id = st.number_input("Food ID", min_value=1)
+            receiver_id = st.number_input("Receiver ID", min_value=1)
+            left = get_available(food_id)
+            st.caption("No such food listing" if left is None else f"{left} unit(s) available")
+        
+        with col2:
+            status = st.selectbox("Status", ["Pending", "Claimed"])
+            timestamp = st.date_input("Timestamp")
+            quantity = st.number_input("Quantity", min_value=1)
+        
+        if st.button("Add Claim"):
+            try:
+                create_claim(food_id, receiver_id, status, timestamp, quantity)
+                st.success("Claim added successfully!")
+            except (NotAvailable, ReservationConflict, ValueError) as e:
+                st.error(f"Claim not added: {e}")
+    
+    # Display claims
+    st.subheader("Claims List")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filter_status = st.selectbox("Filter by status", ["All", "Pending", "Claimed", "Completed", "Cancelled"],
+                                     key="claims_filter_status")
+    with col2:
+        filter_food = st.number_input("Filter by food ID (0 = all)", min_value=0, key="claims_filter_food")
+    with col3:
+        filter_receiver = st.number_input("Filter by receiver ID (0 = all)", min_value=0, key="claims_filter_receiver")
+    show_paged_table("claims", {"Status": None if filter_status == "All" else filter_status,
+                                "Food_ID": int(filter_food) or None,
+                                "Receiver_ID": int(filter_receiver) or None}, "claims")
+    
+    # Update claim
+    st.subheader("Update Claim")
+    claim_id = st.number_input("Claim ID to Update", min_value=1)
+    
+    claim_data = get_by_id("claims", claim_id)
+    if claim_data is not None:
+        
+        with st.form("update_claim_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                food_id = st.number_input("Food ID", min_value=1, value=int(claim_data['Food_ID']))
+                receiver_id = st.number_input("Receiver ID", min_value=1, value=int(claim_data['Receiver_ID']))
+            
+            with col2:
+                status = st.selectbox("Status", ["Pending", "Claimed", "Cancelled"], 
+                                      index=["Pending", "Claimed", "Cancelled"].index(claim_data['Status']))
+                timestamp = st.date_input("Timestamp", value=claim_data['Timestamp'].date())
+            
+            if st.form_submit_button("Update Claim"):
+                try:
+                    update_claim(claim_id, food_id, receiver_id, status, timestamp)
+                    st.success("Claim updated successfully!")
+                except NotAvailable as e:
+                    st.error(f"Claim not updated: {e}")
+    else:
+        st.warning("Claim ID not found")
+    
+    # Delete claim
+    st.subheader("Delete Claim")
+    delete_id = st.number_input("Claim ID to Delete", min_value=1)
+    
+    if st.button("Delete Claim"):
+        if get_by_id("claims", delete_id) is not None:
+            delete_claim(delete_id)
+            st.success("Claim deleted successfully!")
+        else:
+            st.warning("Claim ID not found")
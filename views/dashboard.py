@@ -0,0 +1,116 @@
+"""Dashboard page: KPI cards and the distribution charts."""
+import plotly.express as px
+import streamlit as st
+
+from data_layer import (get_kpi_data, get_food_type_distribution, get_meal_type_distribution,
+                        get_provider_type_distribution, get_claim_status_distribution, get_expiry_trend)
+
+
+def render():
+    st.header("Dashboard Overview")
+    
+    # Get KPI data
+    kpi_data = get_kpi_data()
+    
+    # Display KPIs
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Total Food Items</div>
+        </div>
+        """.format(kpi_data.total_food), unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Total Providers</div>
+        </div>
+        """.format(kpi_data.total_providers), unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Total Receivers</div>
+        </div>
+        """.format(kpi_data.total_receivers), unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Total Claims</div>
+        </div>
+        """.format(kpi_data.total_claims), unsafe_allow_html=True)
+    
+    # Second row of KPIs
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Claimed Items</div>
+        </div>
+        """.format(kpi_data.claimed_items), unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Pending Claims</div>
+        </div>
+        """.format(kpi_data.pending_claims), unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Cancelled Claims</div>
+        </div>
+        """.format(kpi_data.cancelled_claims), unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">{}</div>
+            <div class="metric-label">Expired Food</div>
+        </div>
+        """.format(kpi_data.expired_food), unsafe_allow_html=True)
+    
+    # Charts
+    st.subheader("Food Distribution")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        food_types = get_food_type_distribution()
+        fig_food_type = px.pie(food_types, values='Count', names='Food_Type', title="Food Type Distribution")
+        st.plotly_chart(fig_food_type, use_container_width=True)
+    
+    with col2:
+        meal_types = get_meal_type_distribution()
+        fig_meal_type = px.pie(meal_types, values='Count', names='Meal_Type', title="Meal Type Distribution")
+        st.plotly_chart(fig_meal_type, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        provider_types = get_provider_type_distribution()
+        fig_provider_type = px.bar(provider_types, x='Provider_Type', y='Count', title="Provider Type Distribution")
+        st.plotly_chart(fig_provider_type, use_container_width=True)
+    
+    with col2:
+        claim_status = get_claim_status_distribution()
+        fig_claim_status = px.bar(claim_status, x='Status', y='Count', title="Claim Status Distribution")
+        st.plotly_chart(fig_claim_status, use_container_width=True)
+    
+    # Expiry trend
+    st.subheader("Expiry Status")
+    expiry_trend = get_expiry_trend()
+    fig_expiry = px.bar(expiry_trend, x='Expiry_Status', y='Count', title="Food Expiry Status")
+    st.plotly_chart(fig_expiry, use_container_width=True)
@@ -0,0 +1,87 @@
+"""Food Listings page: add, list, update and delete food listings."""
+import streamlit as st
+
+from crud import create_food_listing, update_food_listing, delete_food_listing
+from data_layer import get_by_id
+from views.tables import show_paged_table
+
+
+def render():
+    st.header("Food Listings Management")
+    
+    # Create new food listing
+    with st.expander("Add New Food Listing"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            food_name = st.text_input("Food Name")
+            quantity = st.number_input("Quantity", min_value=1)
+            expiry_date = st.date_input("Expiry Date")
+            provider_id = st.number_input("Provider ID", min_value=1)
+            provider_type = st.selectbox("Provider Type", ["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"])
+        
+        with col2:
+            location = st.text_input("Location")
+            food_type = st.selectbox("Food Type", ["Vegetarian", "Non-Vegetarian", "Vegan"])
+            meal_type = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snacks"])
+        
+        if st.button("Add Food Listing"):
+            create_food_listing(food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type)
+            st.success("Food listing added successfully!")
+    
+    # Display food listings
+    st.subheader("Food Listings")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filter_food_type = st.selectbox("Filter by food type", ["All", "Vegetarian", "Non-Vegetarian", "Vegan"],
+                                        key="food_filter_food_type")
+    with col2:
+        filter_meal_type = st.selectbox("Filter by meal type", ["All", "Breakfast", "Lunch", "Dinner", "Snacks"],
+                                        key="food_filter_meal_type")
+    with col3:
+        filter_provider = st.number_input("Filter by provider ID (0 = all)", min_value=0, key="food_filter_provider")
+    show_paged_table("food_listings", {"Food_Type": None if filter_food_type == "All" else filter_food_type,
+                                       "Meal_Type": None if filter_meal_type == "All" else filter_meal_type,
+                                       "Provider_ID": int(filter_provider) or None}, "food_listings")
+    
+    # Update food listing
+    st.subheader("Update Food Listing")
+    food_id = st.number_input("Food ID to Update", min_value=1)
+    
+    food_data = get_by_id("food_listings", food_id)
+    if food_data is not None:
+        
+        with st.form("update_food_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                food_name = st.text_input("Food Name", value=food_data['Food_Name'])
+                quantity = st.number_input("Quantity", min_value=1, value=int(food_data['Quantity']))
+                expiry_date = st.date_input("Expiry Date", value=food_data['Expiry_Date'].date())
+                provider_id = st.number_input("Provider ID", min_value=1, value=int(food_data['Provider_ID']))
+                provider_type = st.selectbox("Provider Type", ["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"], 
+                                      index=["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"].index(food_data['Provider_Type']))
+            
+            with col2:
+                location = st.text_input("Location", value=food_data['Location'])
+                food_type = st.selectbox("Food Type", ["Vegetarian", "Non-Vegetarian", "Vegan"], 
+                                      index=["Vegetarian", "Non-Vegetarian", "Vegan"].index(food_data['Food_Type']))
+                meal_type = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snacks"], 
+                                      index=["Breakfast", "Lunch", "Dinner", "Snacks"].index(food_data['Meal_Type']))
+            
+            if st.form_submit_button("Update Food Listing"):
+                update_food_listing(food_id, food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type)
+                st.success("Food listing updated successfully!")
+    else:
+        st.warning("Food ID not found")
+    
+    # Delete food listing
+    st.subheader("Delete Food Listing")
+    delete_id = st.number_input("Food ID to Delete", min_value=1)
+    
+    if st.button("Delete Food Listing"):
+        if get_by_id("food_listings", delete_id) is not None:
+            delete_food_listing(delete_id)
+            st.success("Food listing deleted successfully!")
+        else:
+            st.warning("Food ID not found")
@@ -0,0 +1,53 @@
+"""Map View page: food listings per city on a map, and the providers near a city."""
+import plotly.express as px
+import streamlit as st
+
+from data_layer import get_city_map, get_nearby
+
+
+def render():
+    st.header("Food Distribution Map")
+
+    # Coordinates come from the gazetteer table (gazetteer.py)
+    city_map = get_city_map()
+    map_df = city_map.dropna(subset=["City", "Lat", "Lon"])
+
+    fig = px.scatter_map(
+        map_df,
+        lat="Lat",
+        lon="Lon",
+        size="Food_Count",
+        color="Food_Count",
+        hover_name="City",
+        hover_data=["Food_Count", "Source"],
+        zoom=3,
+        height=500,
+        title="Food Distribution by City",
+        color_continuous_scale=px.colors.sequential.Blues,
+        size_max=50,
+        map_style="open-street-map"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    approximate = int((~map_df["Source"].isin(["known", "file"])).sum())
+    if approximate:
+        st.caption(f"{approximate} of {len(map_df)} cities are not in the gazetteer and are placed approximately, "
+                   "near the state in their providers' addresses where there is one. "
+                   "Load real coordinates with `python gazetteer.py --load places.csv`.")
+
+    # Providers near a city, from the provider_geo point index
+    st.subheader("Providers Near a City")
+    if not map_df.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            city = st.selectbox("City", map_df["City"].tolist())
+        with col2:
+            radius = st.slider("Radius (km)", min_value=10, max_value=500, value=100, step=10)
+        centre = map_df[map_df["City"] == city].iloc[0]
+        nearby = get_nearby("providers", centre["Lat"], centre["Lon"], radius)
+        st.caption(f"{len(nearby)} provider(s) within {radius} km of {city}, nearest first")
+        st.dataframe(nearby, use_container_width=True)
+
+    # Display city distribution data
+    st.subheader("City Distribution Data")
+    st.dataframe(city_map[["City", "Food_Count"]], use_container_width=True)
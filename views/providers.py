@@ -0,0 +1,74 @@
+"""Providers page: add, list, update and delete providers."""
+import streamlit as st
+
+from crud import create_provider, update_provider, delete_provider
+from data_layer import get_by_id
+from views.tables import show_paged_table
+
+
+def render():
+    st.header("Providers Management")
+    
+    # Create new provider
+    with st.expander("Add New Provider"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("Provider Name")
+            type_ = st.selectbox("Type", ["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"])
+            address = st.text_input("Address")
+        
+        with col2:
+            city = st.text_input("City")
+            contact = st.text_input("Contact")
+        
+        if st.button("Add Provider"):
+            create_provider(name, type_, address, city, contact)
+            st.success("Provider added successfully!")
+    
+    # Display providers
+    st.subheader("Providers List")
+    col1, col2 = st.columns(2)
+    with col1:
+        filter_type = st.selectbox("Filter by type", ["All"] + ["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"], key="providers_filter_type")
+    with col2:
+        filter_city = st.text_input("Filter by city", key="providers_filter_city")
+    show_paged_table("providers", {"Type": None if filter_type == "All" else filter_type,
+                                   "City": filter_city.strip()}, "providers")
+    
+    # Update provider
+    st.subheader("Update Provider")
+    provider_id = st.number_input("Provider ID to Update", min_value=1)
+    
+    provider_data = get_by_id("providers", provider_id)
+    if provider_data is not None:
+        
+        with st.form("update_provider_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name = st.text_input("Provider Name", value=provider_data['Name'])
+                type_ = st.selectbox("Type", ["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"], 
+                                      index=["Restaurant", "Grocery Store", "Catering Service", "Supermarket", "NGO", "Individual"].index(provider_data['Type']))
+                address = st.text_input("Address", value=provider_data['Address'])
+            
+            with col2:
+                city = st.text_input("City", value=provider_data['City'])
+                contact = st.text_input("Contact", value=provider_data['Contact'])
+            
+            if st.form_submit_button("Update Provider"):
+                update_provider(provider_id, name, type_, address, city, contact)
+                st.success("Provider updated successfully!")
+    else:
+        st.warning("Provider ID not found")
+    
+    # Delete provider
+    st.subheader("Delete Provider")
+    delete_id = st.number_input("Provider ID to Delete", min_value=1)
+    
+    if st.button("Delete Provider"):
+        if get_by_id("providers", delete_id) is not None:
+            delete_provider(delete_id)
+            st.success("Provider deleted successfully!")
+        else:
+            st.warning("Provider ID not found")
@@ -0,0 +1,72 @@
+"""Receivers page: add, list, update and delete receivers."""
+import streamlit as st
+
+from crud import create_receiver, update_receiver, delete_receiver
+from data_layer import get_by_id
+from views.tables import show_paged_table
+
+
+def render():
+    st.header("Receivers Management")
+    
+    # Create new receiver
+    with st.expander("Add New Receiver"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("Receiver Name")
+            type_ = st.selectbox("Type", ["Shelter", "NGO", "Individual", "Charity", "Community Center"])
+        
+        with col2:
+            city = st.text_input("City")
+            contact = st.text_input("Contact")
+        
+        if st.button("Add Receiver"):
+            create_receiver(name, type_, city, contact)
+            st.success("Receiver added successfully!")
+    
+    # Display receivers
+    st.subheader("Receivers List")
+    col1, col2 = st.columns(2)
+    with col1:
+        filter_type = st.selectbox("Filter by type", ["All"] + ["Shelter", "NGO", "Individual", "Charity", "Community Center"], key="receivers_filter_type")
+    with col2:
+        filter_city = st.text_input("Filter by city", key="receivers_filter_city")
+    show_paged_table("receivers", {"Type": None if filter_type == "All" else filter_type,
+                                   "City": filter_city.strip()}, "receivers")
+    
+    # Update receiver
+    st.subheader("Update Receiver")
+    receiver_id = st.number_input("Receiver ID to Update", min_value=1)
+    
+    receiver_data = get_by_id("receivers", receiver_id)
+    if receiver_data is not None:
+        
+        with st.form("update_receiver_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name = st.text_input("Receiver Name", value=receiver_data['Name'])
+                type_ = st.selectbox("Type", ["Shelter", "NGO", "Individual", "Charity", "Community Center"], 
+                                      index=["Shelter", "NGO", "Individual", "Charity", "Community Center"].index(receiver_data['Type']))
+            
+            with col2:
+                city = st.text_input("City", value=receiver_data['City'])
+                contact = st.text_input("Contact", value=receiver_data['Contact'])
+            
+            if st.form_submit_button("Update Receiver"):
+                update_receiver(receiver_id, name, type_, city, contact)
+                st.success("Receiver updated successfully!")
+    else:
+        st.warning("Receiver ID not found")
+    
+    # Delete receiver
+    st.subheader("Delete Receiver")
+    delete_id = st.number_input("Receiver ID to Delete", min_value=1)
+    
+    if st.button("Delete Receiver"):
+        if get_by_id("receivers", delete_id) is not None:
+            delete_receiver(delete_id)
+            st.success("Receiver deleted successfully!")
+        else:
+            st.warning("Receiver ID not found")
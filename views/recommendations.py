@@ -0,0 +1,93 @@
+"""Recommendations page: expiring food, proposed matches and demand insights."""
+import streamlit as st
+
+from crud import insert_many
+from data_layer import (get_expiring_within, get_proposed_matches, get_top_receivers, get_high_demand_food_types,
+                        get_high_cancellation_providers, get_most_claimed_food, get_unclaimed_food)
+from matching import proposal_claim_rows
+from views.tables import date_columns
+
+
+def render():
+    st.header("Recommendations")
+    
+    # Food expiring soon
+    st.subheader("Food Items Expiring Soon")
+    expiring = get_expiring_within(3)
+    st.dataframe(expiring, use_container_width=True, column_config=date_columns(expiring))
+    
+    st.markdown("""
+    <div class="recommendation-card">
+        <div class="recommendation-title">Recommendation</div>
+        <div>Prioritize distribution of food items expiring within the next 3 days to minimize waste.</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Unclaimed expiring food matched to receivers in the same city
+    st.subheader("Proposed Matches")
+    match_days = st.slider("Expiring within (days)", 1, 14, 3, key="match_days")
+    proposals = get_proposed_matches(match_days)
+    st.dataframe(proposals, use_container_width=True)
+    st.caption("Each listing goes to the receiver in its city whose past claims best fit its food type, "
+               "meal type and quantity; soonest-expiring listings are matched first.")
+    
+    if st.button("Create Pending Claims", disabled=proposals.empty):
+        # Each claim reserves its listing; a listing claimed since the proposals were made is skipped
+        result = insert_many("claims", proposal_claim_rows(proposals), atomic=False)
+        if result["applied"]:
+            st.success(f"Created {result['applied']} pending claim(s)!")
+        if result["errors"]:
+            st.warning(f"{len(result['errors'])} proposal(s) not claimed: "
+                       + "; ".join(error["error"] for error in result["errors"][:3]))
+    
+    # Most active receivers
+    st.subheader("Most Active Receivers")
+    st.dataframe(get_top_receivers(5), use_container_width=True)
+    
+    st.markdown("""
+    <div class="recommendation-card">
+        <div class="recommendation-title">Recommendation</div>
+        <div>Consider partnering with the most active receivers to ensure efficient food distribution.</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # High demand food types
+    st.subheader("Food Types with High Demand")
+    st.dataframe(get_high_demand_food_types(), use_container_width=True)
+    
+    st.markdown("""
+    <div class="recommendation-card">
+        <div class="recommendation-title">Recommendation</div>
+        <div>Encourage providers to donate more of the high-demand food types to better meet community needs.</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Providers with high cancellation rates
+    st.subheader("Providers with High Cancellation Rates")
+    st.dataframe(get_high_cancellation_providers(), use_container_width=True)
+    
+    st.markdown("""
+    <div class="recommendation-card">
+        <div class="recommendation-title">Recommendation</div>
+        <div>Work with providers who have high cancellation rates to improve their donation process and reliability.</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Additional insights
+    st.subheader("Additional Insights")
+    
+    # Most claimed food items
+    most_claimed = get_most_claimed_food(10)
+    
+    # Unclaimed food items
+    unclaimed = get_unclaimed_food()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Most Claimed Food Items")
+        st.dataframe(most_claimed, use_container_width=True)
+    
+    with col2:
+        st.subheader("Unclaimed Food Items")
+        st.dataframe(unclaimed, use_container_width=True, column_config=date_columns(unclaimed))
@@ -0,0 +1,60 @@
+"""Sortable, keyset-paged table shared by the entity management pages."""
+import streamlit as st
+
+from data_layer import get_page, get_search_page
+from decoder import kind_of
+from pagination import ENTITIES
+from search import SEARCH_COLUMNS, match_expression
+
+
+def date_columns(frame):
+    """column_config showing the date-only columns of frame without a time of day"""
+    return {name: st.column_config.DateColumn(name) for name in frame.columns if kind_of(name) == "date"}
+
+
+def show_paged_table(table, filters, key):
+    """Render search/sort/page controls and the current page of table; cursors live in session state
+
+    Searchable tables get a search box; while it holds words the page lists
+    the matching rows (within the filters), best match first.
+    """
+    pk, sortable, _ = ENTITIES[table]
+    text = ""
+    if table in SEARCH_COLUMNS:
+        text = st.text_input(f"Search {', '.join(SEARCH_COLUMNS[table])}", key=f"{key}_search",
+                             placeholder="Type a name; the last word may be partial")
+    searching = match_expression(text) is not None
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort = st.selectbox("Sort by", sortable, key=f"{key}_sort", disabled=searching)
+    with col2:
+        descending = st.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order",
+                                  disabled=searching) == "Descending"
+    with col3:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key=f"{key}_page_size")
+
+    # Start from the first page whenever the search, sort, filters or page size change
+    view = (text if searching else None, sort, descending, page_size, tuple(sorted(filters.items())))
+    if st.session_state.get(f"{key}_view") != view:
+        st.session_state[f"{key}_view"] = view
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    if searching:
+        rows, next_cursor = get_search_page(table, text, filters, cursors[-1], page_size)
+        rows = rows.drop(columns="Rank")
+    else:
+        rows, next_cursor = get_page(table, sort, descending, filters, cursors[-1], page_size)
+    st.dataframe(rows, use_container_width=True, hide_index=True, column_config=date_columns(rows))
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        if st.button("Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}, {len(rows)} rows")